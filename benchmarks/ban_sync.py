@@ -0,0 +1,101 @@
+"""Benchmark for syncing a ban wave of 200 users from one channel to 39 other channels (7800 bans).
+
+The bans are sent to a local fake Helix server that answers after 50ms. The serial time is extrapolated from 100
+bans sent one after another like the previous callback did. The token bucket is opened up for the benchmark, with
+the default Helix limit of 800 requests per minute the wave is bound by the rate limit instead.
+Run from the repository root with `python -m benchmarks.ban_sync`.
+"""
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import shutil
+import tempfile
+import threading
+import time
+
+from aiohttp import web
+
+from data_types.stream import Stream
+from twitch_api.ban_sync import BanSync
+from twitch_api.helix_client import HelixClient
+from utils.token_bucket import TokenBucket
+
+CHANNEL_COUNT = 40
+USER_COUNT = 200
+LATENCY = 0.05
+
+
+class FakeTwitchAPI:
+    def __init__(self, helix: HelixClient) -> None:
+        self.helix: HelixClient = helix
+
+    async def request_ban(self, channel_id: str, user_id: str, reason: str, duration: int = None) -> None:
+        await self.helix.post("moderation/bans", {"broadcaster_id": channel_id, "moderator_id": "0"}, {"data": {"user_id": user_id, "reason": reason}})
+
+    async def request_unban(self, channel_id: str, user_id: str) -> None:
+        await self.helix.delete("moderation/bans", {"broadcaster_id": channel_id, "moderator_id": "0", "user_id": user_id})
+
+
+def start_fake_helix() -> str:
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    ports = []
+
+    async def ban(_: web.Request) -> web.Response:
+        await asyncio.sleep(LATENCY)
+        return web.json_response({"data": [{}]})
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post("/helix/moderation/bans", ban)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        ports.append(site._server.sockets[0].getsockname()[1])
+        started.set()
+
+    threading.Thread(target=lambda: (loop.run_until_complete(serve()), loop.run_forever()), daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{ports[0]}/helix/"
+
+
+async def main(directory: pathlib.Path) -> None:
+    shutil.copy(pathlib.Path(__file__).resolve().parent.parent / "streams" / "default.yaml", directory / "default.yaml")
+    for number in range(CHANNEL_COUNT):
+        stream = Stream(f"channel{number}", str(number), directory)
+        stream.config['sync-bans'] = True
+        Stream.add_stream(stream)
+    source = Stream.get_stream("channel0")
+
+    helix = HelixClient("id", lambda: "token", lambda: None, start_fake_helix(), loop=asyncio.get_running_loop())
+    twitch_api = FakeTwitchAPI(helix)
+
+    start = time.perf_counter()
+    for number in range(100):
+        await twitch_api.request_ban("1", str(number), "benchmark")
+    serial = (time.perf_counter() - start) / 100 * USER_COUNT * (CHANNEL_COUNT - 1)
+
+    ban_sync = BanSync(twitch_api, directory / "ban_ledger.sqlite", TokenBucket(1e9, 1e9))
+    start = time.perf_counter()
+    sent = sum(await asyncio.gather(*(ban_sync.sync("ban", source, f"user{number}", f"user{number}", "benchmark") for number in range(USER_COUNT))))
+    concurrent = time.perf_counter() - start
+
+    start = time.perf_counter()
+    repeated = sum(await asyncio.gather(*(ban_sync.sync("ban", source, f"user{number}", f"user{number}", "benchmark") for number in range(USER_COUNT))))
+    echo = time.perf_counter() - start
+    await helix.close()
+    ban_sync.close()
+
+    bans = USER_COUNT * (CHANNEL_COUNT - 1)
+    print(f"{USER_COUNT} users banned in 1 of {CHANNEL_COUNT} channels, {bans} bans to sync, {LATENCY * 1e3:.0f}ms server latency")
+    print(f"serial (extrapolated): {serial:.1f}s")
+    print(f"ban sync:              {concurrent:.1f}s for {sent} requests")
+    print(f"same wave again:       {echo * 1e3:.0f}ms for {repeated} requests")
+    print(f"with the Helix limit of 800 per minute the wave takes at least {(bans - 800) / (800 / 60):.0f}s")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        asyncio.run(main(pathlib.Path(temporary_directory)))
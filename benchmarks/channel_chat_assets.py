@@ -0,0 +1,86 @@
+"""Memory of the emote and badge tables of 40 channels and the speed of rendering with them.
+
+Every channel has 60 own emotes and 30 subscriber badges on top of 300 global emotes and 400 global badge
+versions. The payloads are parsed from JSON per channel like the responses of Helix. "full payload per channel" keeps
+the parsed responses like the global tables were kept before, "compact copy per channel" keeps the name and url of the
+global and own entries in a separate table for every channel, "layered, interned" is how ChatMessage stores them.
+Run from the repository root with `python -m benchmarks.channel_chat_assets`.
+"""
+from __future__ import annotations
+
+import gc
+import json
+import timeit
+import tracemalloc
+
+from data_types.chat_message import ChatMessage
+
+CHANNEL_COUNT = 40
+
+
+def emotes_response(prefix: str, count: int) -> str:
+    return json.dumps({"data": [{"id": f"{prefix}{number}", "name": f"{prefix}Emote{number}", "format": ["static", "animated"],
+                                 "scale": ["1.0", "2.0", "3.0"], "theme_mode": ["light", "dark"],
+                                 "images": {size: f"https://static-cdn.jtvnw.net/emoticons/v2/{prefix}{number}/static/light/{scale}"
+                                            for size, scale in [("url_1x", "1.0"), ("url_2x", "2.0"), ("url_4x", "3.0")]}}
+                                for number in range(count)]})
+
+
+def badges_response(set_ids: list[str], versions: int) -> str:
+    return json.dumps({"data": [{"set_id": set_id, "versions": [{"id": str(version), "title": f"{set_id} {version}", "description": set_id,
+                                                                  "image_url_1x": f"https://static-cdn.jtvnw.net/badges/v1/{set_id}-{version}/1",
+                                                                  "image_url_2x": f"https://static-cdn.jtvnw.net/badges/v1/{set_id}-{version}/2",
+                                                                  "image_url_4x": f"https://static-cdn.jtvnw.net/badges/v1/{set_id}-{version}/3"}
+                                                                 for version in range(versions)]}
+                                for set_id in set_ids]})
+
+
+GLOBAL_EMOTES = emotes_response("g", 300)
+GLOBAL_BADGES = badges_response([f"set{number}" for number in range(100)], 4)
+CHANNEL_EMOTES = [emotes_response(f"c{channel}_", 60) for channel in range(CHANNEL_COUNT)]
+CHANNEL_BADGES = [badges_response(["subscriber"], 30) for _ in range(CHANNEL_COUNT)]
+
+
+def full_payloads() -> list:
+    return [(json.loads(GLOBAL_EMOTES), json.loads(GLOBAL_BADGES), json.loads(CHANNEL_EMOTES[channel]), json.loads(CHANNEL_BADGES[channel]))
+            for channel in range(CHANNEL_COUNT)]
+
+
+def compact_copies() -> list:
+    return [({**ChatMessage.compact_emotes(json.loads(GLOBAL_EMOTES)), **ChatMessage.compact_emotes(json.loads(CHANNEL_EMOTES[channel]))},
+             {**ChatMessage.compact_badges(json.loads(GLOBAL_BADGES)), **ChatMessage.compact_badges(json.loads(CHANNEL_BADGES[channel]))})
+            for channel in range(CHANNEL_COUNT)]
+
+
+def layered() -> None:
+    ChatMessage.set_global_emotes(ChatMessage.compact_emotes(json.loads(GLOBAL_EMOTES)))
+    ChatMessage.set_global_badges(ChatMessage.compact_badges(json.loads(GLOBAL_BADGES)))
+    for channel in range(CHANNEL_COUNT):
+        ChatMessage.set_channel_emotes(str(channel), ChatMessage.compact_emotes(json.loads(CHANNEL_EMOTES[channel])))
+        ChatMessage.set_channel_badges(str(channel), ChatMessage.compact_badges(json.loads(CHANNEL_BADGES[channel])))
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main() -> None:
+    print(f"{CHANNEL_COUNT} channels, 300 global emotes, 400 global badges, 60 emotes and 30 badges per channel")
+    for name, build in [("full payload per channel", full_payloads), ("compact copy per channel", compact_copies), ("layered, interned", layered)]:
+        print(f"{name:<26} {measure(build) / 1024:8.0f} KiB")
+
+    number = 20000
+    message, emotes = "c7_Emote3 hello gEmote5 c7_Emote3", "c7_3:0-8,24-32/g5:16-22"
+    rendered = timeit.timeit(lambda: ChatMessage.replace_twitch_emotes(message, emotes, "7"), number=number)
+    print(f"replace_twitch_emotes with channel emotes: {rendered / number * 1e6:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Memory and throughput comparison for buffering 100k chat messages.
+
+Compares the slotted, lazily rendered ChatMessage with a message that keeps a __dict__ and renders its html
+eagerly on construction, which is how ChatMessage used to work.
+Run from the repository root with `python -m benchmarks.chat_message_memory`.
+"""
+from __future__ import annotations
+
+import gc
+import time
+import tracemalloc
+
+from data_types.chat_buffer import ChatBuffer
+from data_types.chat_message import ChatMessage
+
+MESSAGE_COUNT = 100_000
+
+
+class EagerChatMessage:
+    def __init__(self, message: str, tags: dict) -> None:
+        self.received_at = time.monotonic()
+        self.message_id = tags.get('id')
+        self.user_id = tags.get('user-id', '')
+        self.user = tags['display-name']
+        self.user_with_badges = ChatMessage.format_user(tags['badges'], tags['color'], tags['display-name'])
+        self.is_deleted = False
+        self.message = message
+        self.message_with_emotes = ChatMessage.replace_twitch_emotes(message, tags['emotes'])
+        self.size = len(self.user) + len(self.user_with_badges) + len(self.message) + len(self.message_with_emotes)
+
+
+def create_tags(number: int) -> dict:
+    return {
+        'id': f"3a1f0c2e-8b9d-4e5f-a6b7-{number:012d}",
+        'user-id': str(10_000_000 + number % 5000),
+        'display-name': f"viewer_{number % 5000}",
+        'color': "#1E90FF",
+        'badges': "subscriber/12,premium/1" if number % 3 else "",
+        'emotes': "25:0-4" if number % 4 == 0 else "",
+        'first-msg': "0",
+    }
+
+
+def measure(message_class: type, rendered_fraction: float) -> tuple[int, float]:
+    texts = [f"Kappa this is chat message number {number} with a bit of text" for number in range(MESSAGE_COUNT)]
+    tags = [create_tags(number) for number in range(MESSAGE_COUNT)]
+    buffer = ChatBuffer(MESSAGE_COUNT, 2 ** 40, 3600)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for text, message_tags in zip(texts, tags):
+        buffer.append(message_class(text, message_tags))
+    if message_class is ChatMessage and rendered_fraction > 0:
+        for message in buffer.latest(int(MESSAGE_COUNT * rendered_fraction)):
+            _ = message.chat_message
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, elapsed
+
+
+def main() -> None:
+    for name, message_class, rendered_fraction in [("eager, __dict__", EagerChatMessage, 1.0),
+                                                   ("lazy, __slots__, nothing displayed", ChatMessage, 0.0),
+                                                   ("lazy, __slots__, 10% displayed", ChatMessage, 0.1),
+                                                   ("lazy, __slots__, all displayed", ChatMessage, 1.0)]:
+        memory, elapsed = measure(message_class, rendered_fraction)
+        print(f"{name:<36} {memory / 2 ** 20:7.1f} MiB ({memory / MESSAGE_COUNT:6.0f} B/message), "
+              f"{MESSAGE_COUNT / elapsed:9.0f} messages/s")
+
+
+if __name__ == "__main__":
+    main()
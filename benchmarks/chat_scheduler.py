@@ -0,0 +1,106 @@
+"""Benchmark for the outbound chat scheduler with a relay flood in 8 channels.
+
+Every channel receives a burst of relayed messages, a quarter of them repeated, while viewers call commands. The
+window of the rate limits is scaled down from 30s to 0.3s so the run takes a few seconds, the bot moderates two of
+the channels. Sending directly blows through both limits, so Twitch would drop most of the messages, the scheduler
+keeps every window within the limits, answers commands first and drops or coalesces the surplus of the flood.
+Run from the repository root with `python -m benchmarks.chat_scheduler`.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import statistics
+import time
+
+from chat_bot.message_scheduler import MessageScheduler
+from data_types.types_collection import MessagePriority
+
+SCALE = 0.01
+CHANNELS = [f"channel{number}" for number in range(8)]
+MODERATED = set(CHANNELS[:2])
+RELAY_PER_CHANNEL = 80
+COMMANDS_PER_CHANNEL = 4
+
+
+class ScaledScheduler(MessageScheduler):
+    window = MessageScheduler.window * SCALE
+    regular_interval = MessageScheduler.regular_interval * SCALE
+    duplicate_window = MessageScheduler.duplicate_window * SCALE
+    report_interval = 3600.0
+
+
+def build_submissions() -> list[tuple[float, str, str, MessagePriority]]:
+    """(delay, channel, message, priority) for the relay flood and the command calls in between"""
+    random.seed(1)
+    submissions = []
+    for channel in CHANNELS:
+        for number in range(RELAY_PER_CHANNEL):
+            text = f"song added: {number % 20}" if number % 4 == 0 else f"relay {channel} {number}"
+            submissions.append((random.uniform(0, ScaledScheduler.window), channel, text, MessagePriority.RELAY))
+        for number in range(COMMANDS_PER_CHANNEL):
+            submissions.append((random.uniform(0, ScaledScheduler.window * 3), channel, f"reply {channel} {number}", MessagePriority.COMMAND))
+    return sorted(submissions, key=lambda submission: submission[0])
+
+
+def worst_window(sent: list[float], limit_window: float) -> int:
+    """Most messages sent within any window"""
+    sent = sorted(sent)
+    start, worst = 0, 0
+    for end in range(len(sent)):
+        while sent[end] - sent[start] >= limit_window:
+            start += 1
+        worst = max(worst, end - start + 1)
+    return worst
+
+
+async def run(scheduled: bool) -> tuple[list[float], dict]:
+    sent_at: list[float] = []
+    sent_regular_at: list[float] = []
+    submitted_at: dict[tuple[str, str], float] = {}
+    latencies: list[float] = []
+
+    async def send(channel: str, message: str) -> bool:
+        now = time.monotonic()
+        sent_at.append(now)
+        if channel not in MODERATED:
+            sent_regular_at.append(now)
+        if message.startswith("reply"):
+            latencies.append(now - submitted_at[(channel, message)])
+        return True
+
+    scheduler = ScaledScheduler(send, lambda channel: channel in MODERATED)
+    scheduler.start()
+    start = time.monotonic()
+    for delay, channel, message, priority in build_submissions():
+        await asyncio.sleep(max(0.0, start + delay - time.monotonic()))
+        submitted_at[(channel, message)] = time.monotonic()
+        if scheduled:
+            scheduler.submit(channel, message, priority)
+        else:
+            await send(channel, message)
+    while scheduled and scheduler.depth():
+        await asyncio.sleep(ScaledScheduler.window / 10)
+    scheduler.stop()
+    totals = {"sent": len(sent_at)}
+    for stats in scheduler.stats().values():
+        for key in ("dropped", "coalesced"):
+            totals[key] = totals.get(key, 0) + stats[key]
+    totals["most"] = worst_window(sent_at, ScaledScheduler.window)
+    totals["most_regular"] = worst_window(sent_regular_at, ScaledScheduler.window)
+    return latencies, totals
+
+
+def main() -> None:
+    submitted = len(CHANNELS) * (RELAY_PER_CHANNEL + COMMANDS_PER_CHANNEL)
+    print(f"{submitted} messages in {len(CHANNELS)} channels, {len(MODERATED)} moderated, limits per {ScaledScheduler.window:.1f}s: "
+          f"{ScaledScheduler.regular_limit} regular, {ScaledScheduler.moderator_limit} moderator")
+    for name, scheduled in [("direct", False), ("scheduled", True)]:
+        latencies, totals = asyncio.run(run(scheduled))
+        latency = f"median {statistics.median(latencies) * 1e3:6.1f}ms, max {max(latencies) * 1e3:6.1f}ms" if latencies else "-"
+        print(f"{name:<10} sent {totals['sent']:4d}, dropped {totals.get('dropped', 0):4d}, coalesced {totals.get('coalesced', 0):4d}, "
+              f"most in a window {totals['most']:4d} ({totals['most_regular']:3d} not moderated), command replies {latency}")
+
+
+if __name__ == "__main__":
+    main()
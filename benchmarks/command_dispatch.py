@@ -0,0 +1,74 @@
+"""Benchmark for resolving chat commands in cog_check with 500 commands per channel.
+
+Compares the per-stream command table with the previous lookup (stream and global dicts, prefix scan over the
+command names and a linear search through ignore-commands).
+Run from the repository root with `python -m benchmarks.command_dispatch`.
+"""
+from __future__ import annotations
+
+import pathlib
+import random
+import tempfile
+import timeit
+
+from chat_bot.custom_cog import CustomCog
+from data_types.command import Command
+from data_types.command_table import CommandTable
+
+COMMAND_COUNT = 500
+
+
+def previous_dispatch(command_name: str, message: str, stream_commands: dict, ignored: list) -> bool:
+    command = stream_commands.get(command_name)
+    if command is None:
+        command = CustomCog.global_commands.get(command_name)
+    if command is None:
+        return False
+    calling_name = None
+    message = message.replace("!", "", 1)
+    for name in command.names:
+        if message.startswith(name):
+            calling_name = name
+            break
+    if calling_name in ignored:
+        return False
+    return calling_name in stream_commands.keys() or calling_name in CustomCog.global_commands.keys()
+
+
+def table_dispatch(message: str, table: CommandTable) -> bool:
+    resolved = table.resolve(CustomCog.get_calling_name(message, "!"))
+    return resolved is not None and resolved.enabled
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        stream_commands = {}
+        for number in range(COMMAND_COUNT):
+            command_file = pathlib.Path(directory) / f"command{number}.cmd"
+            command_file.write_text(f"name: \"command{number}\"\naliases:\n  - \"alias{number}a\"\n  - \"alias{number}b\"\n"
+                                    f"output:\n    message: \"Output of command {number} for {{user}}\"\n")
+            command = Command(command_file)
+            for name in command.names:
+                stream_commands[name] = command
+    ignored = [f"command{number}" for number in range(0, COMMAND_COUNT, 10)]
+
+    random.seed(1)
+    calls = []
+    for _ in range(10000):
+        number = random.randrange(COMMAND_COUNT)
+        calling_name = random.choice([f"command{number}", f"alias{number}a", f"alias{number}b"])
+        calls.append((f"command{number}", f"!{calling_name} some arguments"))
+
+    number = 20
+    previous = timeit.timeit(lambda: [previous_dispatch(name, message, stream_commands, ignored) for name, message in calls], number=number)
+    build = timeit.timeit(lambda: CommandTable(stream_commands, CustomCog.global_commands, ignored), number=number)
+    table = CommandTable(stream_commands, CustomCog.global_commands, ignored)
+    resolved = timeit.timeit(lambda: [table_dispatch(message, table) for _, message in calls], number=number)
+    dispatches = number * len(calls)
+    print(f"{len(stream_commands)} names for {COMMAND_COUNT} commands, {len(ignored)} ignored")
+    print(f"previous lookup: {previous / dispatches * 1e6:.2f}us per dispatch")
+    print(f"command table:   {resolved / dispatches * 1e6:.2f}us per dispatch, {build / number * 1e3:.2f}ms to build the table")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark for reading the config.yaml and the bundled .cmd files of 50 streams.
+
+Compares the previous loading (pure Python YAML loader, schema with 200 generated param/random keys) with the
+libyaml loader and the regex keyed schema, and with the validated config cache on first start and on restart.
+Run from the repository root with `python -m benchmarks.config_loading`.
+"""
+from __future__ import annotations
+
+import pathlib
+import shutil
+import tempfile
+import time
+
+import yaml
+from schema import And, Optional, Schema
+
+from data_types.command_file import CommandConfig
+from data_types.per_stream_config import PerStreamConfig
+from data_types.validated_config_cache import ValidatedConfigCache
+
+STREAM_COUNT = 50
+
+
+def previous_command_schema() -> Schema:
+    params = {}
+    randoms = {}
+    for i in range(0, 100):
+        params[Optional("param" + str(i))] = {
+            Optional('isRequired', default=False): And(bool),
+            Optional('useCallerNameIfEmpty', default=False): And(bool)
+        }
+        randoms[Optional("random" + str(i))] = And(list)
+    schema = CommandConfig._CommandConfig__schema.schema.copy()
+    schema[Optional("params")] = params
+    schema[Optional("random")] = randoms
+    return Schema(schema)
+
+
+def load_all(config_files: list[pathlib.Path], command_files: list[pathlib.Path]) -> None:
+    for config_file in config_files:
+        PerStreamConfig.load_config(config_file)
+    for command_file in command_files:
+        CommandConfig.load_command_file(command_file)
+
+
+def main() -> None:
+    repository = pathlib.Path(__file__).resolve().parent.parent
+    with tempfile.TemporaryDirectory() as directory:
+        config_files = []
+        command_files = []
+        for number in range(STREAM_COUNT):
+            folder = pathlib.Path(directory) / f"stream{number}"
+            shutil.copytree(repository / "chat_bot" / "commands", folder)
+            shutil.copy(repository / "streams" / "default.yaml", folder / "config.yaml")
+            config_files.append(folder / "config.yaml")
+            command_files.extend(folder.glob("*.cmd"))
+
+        schema = previous_command_schema()
+        per_stream_schema = PerStreamConfig._PerStreamConfig__schema
+        start = time.perf_counter()
+        for config_file in config_files:
+            with open(config_file) as file:
+                per_stream_schema.validate(yaml.safe_load(file))
+        for command_file in command_files:
+            with open(command_file) as file:
+                schema.validate(yaml.safe_load(file))
+        previous = time.perf_counter() - start
+
+        start = time.perf_counter()
+        load_all(config_files, command_files)
+        compiled = time.perf_counter() - start
+
+        cache_file = pathlib.Path(directory) / ".config_cache"
+        ValidatedConfigCache.set_cache(ValidatedConfigCache(cache_file))
+        start = time.perf_counter()
+        load_all(config_files, command_files)
+        ValidatedConfigCache.get_cache().save()
+        first_start = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ValidatedConfigCache.set_cache(ValidatedConfigCache(cache_file))
+        load_all(config_files, command_files)
+        restart = time.perf_counter() - start
+
+    files = len(config_files) + len(command_files)
+    print(f"{STREAM_COUNT} streams, {files} files")
+    print(f"previous loader and schema:     {previous * 1e3:.1f}ms")
+    print(f"libyaml and regex keyed schema: {compiled * 1e3:.1f}ms")
+    print(f"cache, first start:             {first_start * 1e3:.1f}ms")
+    print(f"cache, restart:                 {restart * 1e3:.1f}ms ({restart / files * 1e6:.0f}us per file)")
+
+
+if __name__ == "__main__":
+    main()
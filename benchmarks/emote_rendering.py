@@ -0,0 +1,59 @@
+"""Micro-benchmark for rendering emote heavy chat messages.
+
+The time of a render is the best of 5 repeats.
+Run from the repository root with `python -m benchmarks.emote_rendering`.
+"""
+from __future__ import annotations
+
+import timeit
+
+from data_types.chat_message import ChatMessage
+
+
+def replace_twitch_emotes_str_replace(message: str, emotes: str) -> str:
+    """The previous implementation, one str.replace per distinct emote"""
+    if len(emotes) > 0:
+        replace = {}
+        for emote in emotes.split("/"):
+            emote_parts = emote.split(":")
+            for part in emote_parts[1].split(","):
+                from_str, to_str = part.split("-")
+                name = message[int(from_str):int(to_str) + 1]
+                replace[name] = f"https://static-cdn.jtvnw.net/emoticons/v2/{emote_parts[0]}/default/light/1.0"
+        for name, url in replace.items():
+            message = message.replace(name, f"<img src='{url}'>")
+    return message
+
+
+def build_message(distinct_emotes: int, repetitions: int) -> tuple[str, str]:
+    words = []
+    positions: dict[str, list[str]] = {}
+    offset = 0
+    for repetition in range(repetitions):
+        for emote in range(distinct_emotes):
+            name = f"emote{emote}Hype"
+            positions.setdefault(str(1000 + emote), []).append(f"{offset}-{offset + len(name) - 1}")
+            words.append(name)
+            offset += len(name) + 1
+        words.append("spam")
+        offset += len("spam") + 1
+    emotes = "/".join(f"{emote_id}:{','.join(ranges)}" for emote_id, ranges in positions.items())
+    return " ".join(words), emotes
+
+
+def main() -> None:
+    number = 2000
+    for distinct_emotes, repetitions in [(1, 1), (5, 4), (20, 5), (50, 10)]:
+        message, emotes = build_message(distinct_emotes, repetitions)
+        old = min(timeit.repeat(lambda: replace_twitch_emotes_str_replace(message, emotes), number=number, repeat=5))
+        new = min(timeit.repeat(lambda: ChatMessage.replace_twitch_emotes(message, emotes), number=number, repeat=5))
+        print(f"{distinct_emotes:>3} emotes x {repetitions:>2} ({len(message):>5} chars): "
+              f"str.replace {old / number * 1e6:8.1f}us, single pass {new / number * 1e6:8.1f}us")
+
+    badges = "broadcaster/1,subscriber/3012,sub-gifter/50"
+    cached = timeit.timeit(lambda: ChatMessage.format_user(badges, "#FF0000", "Viewer"), number=number * 10)
+    print(f"format_user with cached badges: {cached / (number * 10) * 1e6:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark for sending 200 bans against a local fake Helix server that answers after 50ms.
+
+Compares blocking requests sent from a coroutine, like the synchronous twitchAPI client did, with the asynchronous
+HelixClient. Besides the total time, the longest stall of the event loop is measured with a ticker coroutine.
+Run from the repository root with `python -m benchmarks.helix_client`.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import requests
+from aiohttp import web
+
+from twitch_api.helix_client import HelixClient
+
+BAN_COUNT = 200
+LATENCY = 0.05
+
+
+async def fake_ban(request: web.Request) -> web.Response:
+    await asyncio.sleep(LATENCY)
+    body = await request.json()
+    return web.json_response({"data": [{"user_id": body["data"]["user_id"], "broadcaster_id": request.query["broadcaster_id"]}]})
+
+
+async def measure_stall(work) -> tuple[float, float]:
+    """Runs the work and returns the time it took and the longest gap between two ticks of the event loop"""
+    longest = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal longest
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+
+    ticker_task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await work()
+    duration = time.perf_counter() - start
+    running = False
+    await ticker_task
+    return duration, longest
+
+
+def start_fake_helix() -> str:
+    """Runs the fake server on its own event loop in a thread, so blocking requests don't block the server"""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    ports = []
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post("/helix/moderation/bans", fake_ban)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        ports.append(site._server.sockets[0].getsockname()[1])
+        started.set()
+
+    threading.Thread(target=lambda: (loop.run_until_complete(serve()), loop.run_forever()), daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{ports[0]}/helix/"
+
+
+async def main() -> None:
+    base_url = start_fake_helix()
+    session = requests.Session()
+
+    async def blocking_bans():
+        for number in range(BAN_COUNT):
+            session.post(base_url + "moderation/bans", params={"broadcaster_id": "1", "moderator_id": "2"},
+                         json={"data": {"user_id": str(number), "reason": "benchmark"}}, headers={"Client-ID": "id", "Authorization": "Bearer token"})
+
+    client = HelixClient("id", lambda: "token", lambda: None, base_url, loop=asyncio.get_running_loop())
+
+    async def async_bans():
+        await asyncio.gather(*(client.post("moderation/bans", {"broadcaster_id": "1", "moderator_id": "2"},
+                                           {"data": {"user_id": str(number), "reason": "benchmark"}}) for number in range(BAN_COUNT)))
+
+    blocking_duration, blocking_stall = await measure_stall(blocking_bans)
+    async_duration, async_stall = await measure_stall(async_bans)
+    await client.close()
+    session.close()
+
+    print(f"{BAN_COUNT} bans, {LATENCY * 1e3:.0f}ms server latency")
+    print(f"blocking client: {blocking_duration * 1e3:.0f}ms total, event loop stalled for up to {blocking_stall * 1e3:.0f}ms")
+    print(f"HelixClient:     {async_duration * 1e3:.0f}ms total, event loop stalled for up to {async_stall * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
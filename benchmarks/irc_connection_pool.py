@@ -0,0 +1,155 @@
+"""Benchmark for the IRC connection pool with 200 channels on a local stand-in for the Twitch chat.
+
+The bot joins the channels over one connection and over four connections of 50 channels. The join window is scaled
+down from 10s to 0.5s, the 20 JOINs per window of the account stay. Viewers write in every channel while the socket
+of the connection with the first channel stalls for a second, afterwards the stand-in drops that connection.
+"startup" is the time until event_ready, "stalled" the share of chat messages that arrived more than 0.5s late and
+"recovered" the time until every channel is joined again after the drop.
+Run from the repository root with `python -m benchmarks.irc_connection_pool`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+from twitchio import Client, Message
+
+from chat_bot.connection_pool import ConnectionPool
+
+CHANNELS = [f"channel{number}" for number in range(200)]
+NICK = "benchbot"
+STALL = 1.0
+MESSAGES_PER_CHANNEL = 20
+
+
+class StandIn:
+    """Answers logins and JOINs like the Twitch chat, writes chat messages and stalls or drops connections"""
+
+    def __init__(self) -> None:
+        self.connections: list[dict] = []
+        self.join_lines: int = 0
+        self.url: str = ""
+        self.__runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/", self.__handle)
+        self.__runner = web.AppRunner(app)
+        await self.__runner.setup()
+        site = web.TCPSite(self.__runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"ws://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+    async def stop(self) -> None:
+        await self.__runner.cleanup()
+
+    def connection_of(self, channel: str) -> dict:
+        return next(connection for connection in self.connections if channel in connection["channels"] and not connection["ws"].closed)
+
+    def all_joined(self) -> bool:
+        joined = set().union(*(connection["channels"] for connection in self.connections if not connection["ws"].closed))
+        return joined.issuperset(CHANNELS)
+
+    async def chat(self) -> None:
+        """Every channel gets a message every 50ms"""
+        for number in range(MESSAGES_PER_CHANNEL):
+            for connection in self.connections:
+                for channel in connection["channels"]:
+                    connection["queue"].put_nowait(f"@badges=;color=;display-name=Viewer;mod=0;subscriber=0;tmi-sent-ts={time.time() * 1000:.3f} "
+                                                   f":viewer!viewer@viewer.tmi.twitch.tv PRIVMSG #{channel} :message {number}")
+            await asyncio.sleep(0.05)
+
+    async def __write(self, connection: dict) -> None:
+        while True:
+            line = await connection["queue"].get()
+            delay = connection["stalled_until"] - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await connection["ws"].send_str(line + "\r\n")
+
+    async def __handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connection = {"ws": ws, "channels": set(), "queue": asyncio.Queue(), "stalled_until": 0.0}
+        self.connections.append(connection)
+        writer = asyncio.ensure_future(self.__write(connection))
+        async for message in ws:
+            for line in message.data.split("\r\n"):
+                if line.startswith("NICK"):
+                    connection["queue"].put_nowait(f":tmi.twitch.tv 001 {NICK} :Welcome, GLHF!")
+                elif line.startswith("JOIN"):
+                    self.join_lines += 1
+                    for channel in line[5:].split(","):
+                        channel = channel.strip().lstrip("#")
+                        connection["channels"].add(channel)
+                        connection["queue"].put_nowait(f":{NICK}!{NICK}@{NICK}.tmi.twitch.tv JOIN #{channel}")
+                        connection["queue"].put_nowait(f":{NICK}.tmi.twitch.tv 353 {NICK} = #{channel} :{NICK}")
+        writer.cancel()
+        return ws
+
+
+class ScaledConnectionPool(ConnectionPool):
+    join_window = 0.5
+
+
+class BenchmarkClient(Client):
+    def __init__(self) -> None:
+        super().__init__(token="oauth:benchmark")
+        self._http.nick = NICK
+        self._http.session = aiohttp.ClientSession()
+        self.latencies: list[float] = []
+        self.ready: asyncio.Event = asyncio.Event()
+
+    async def event_ready(self) -> None:
+        self.ready.set()
+
+    async def event_message(self, message: Message) -> None:
+        self.latencies.append(time.time() - float(message.tags["tmi-sent-ts"]) / 1000)
+
+
+async def run(channels_per_connection: int) -> dict:
+    stand_in = StandIn()
+    await stand_in.start()
+    client = BenchmarkClient()
+    pool = ScaledConnectionPool(client, "oauth:benchmark", CHANNELS, channels_per_connection)
+    pool.host = stand_in.url
+    start = time.monotonic()
+    await pool.start()
+    await client.ready.wait()
+    result = {"connections": len(pool.connections), "startup": time.monotonic() - start, "join_lines": stand_in.join_lines}
+
+    stand_in.connection_of(CHANNELS[0])["stalled_until"] = time.monotonic() + STALL
+    await stand_in.chat()
+    await asyncio.sleep(STALL)
+    result["stalled"] = sum(latency > 0.5 for latency in client.latencies) / len(client.latencies)
+    result["median"] = statistics.median(client.latencies)
+
+    start = time.monotonic()
+    await stand_in.connection_of(CHANNELS[0])["ws"].close()
+    while not stand_in.all_joined() or len(pool.connected_channels) < len(CHANNELS):
+        await asyncio.sleep(0.01)
+    result["recovered"] = time.monotonic() - start
+
+    await pool.stop()
+    await stand_in.stop()
+    return result
+
+
+def main() -> None:
+    # the dropped connection is expected
+    logging.getLogger("chat_bot.connection_pool").setLevel(logging.ERROR)
+    print(f"{len(CHANNELS)} channels, {ScaledConnectionPool.join_limit} JOINs per {ScaledConnectionPool.join_window}s, "
+          f"one connection stalls for {STALL:.0f}s and drops")
+    for channels_per_connection in (len(CHANNELS), 50):
+        result = asyncio.run(run(channels_per_connection))
+        print(f"{result['connections']} connections: startup {result['startup']:5.2f}s with {result['join_lines']:3d} JOIN lines, "
+              f"stalled {result['stalled']:6.1%} of the messages (median {result['median'] * 1e3:5.1f}ms), "
+              f"recovered after {result['recovered']:5.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark for serving the notification media of 50 streams from the MediaStore.
+
+Every stream has an image and a sound, half of them shared with the other streams. "unchanged" is the time of a media
+request while the files are untouched, "touched" the time of the first request after the modification time of every
+file changed without a change of the content, "edited" the same after the content of every file changed. Touched
+files keep their url, edited files move to a new one.
+Run from the repository root with `python -m benchmarks.media_store`.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from data_types.media_store import MediaStore
+
+STREAMS = 50
+FILE_SIZE = 256 * 1024
+REQUESTS = 20_000
+
+
+def create_files(directory: Path) -> list[tuple[Path, str]]:
+    files = []
+    for number in range(STREAMS):
+        for name, mimetype in (("image.gif", "image/gif"), ("sound.mp3", "audio/mpeg")):
+            path = directory / f"stream{number}_{name}"
+            # every second stream uses the default media
+            seed = number if number % 2 else 0
+            path.write_bytes(bytes([seed % 256, len(name)]) * (FILE_SIZE // 2))
+            files.append((path, mimetype))
+    return files
+
+
+def first_requests(keys: list[str]) -> float:
+    """Average time of a request for every key, checks that every key is still served"""
+    start = time.perf_counter()
+    for key in keys:
+        assert MediaStore.get(key) is not None, f"{key} is not served anymore"
+    return (time.perf_counter() - start) / len(keys)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        files = create_files(Path(directory))
+        start = time.perf_counter()
+        keys = [MediaStore.add(path, mimetype) for path, mimetype in files]
+        registered = time.perf_counter() - start
+        print(f"{len(files)} files of {FILE_SIZE // 1024}kB, {len(set(keys))} different contents, registered in {registered * 1e3:.1f}ms")
+
+        start = time.perf_counter()
+        for number in range(REQUESTS):
+            MediaStore.get(keys[number % len(keys)])
+        print(f"unchanged: {(time.perf_counter() - start) / REQUESTS * 1e6:8.1f}us per request")
+
+        for path, _ in files:
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns + 1_000_000_000))
+        print(f"touched:   {first_requests(keys) * 1e6:8.1f}us per request")
+        assert [MediaStore.add(path, mimetype) for path, mimetype in files] == keys
+
+        for path, _ in files:
+            path.write_bytes(path.read_bytes()[::-1] + b"edited")
+        start = time.perf_counter()
+        new_keys = [MediaStore.add(path, mimetype) for path, mimetype in files]
+        print(f"edited:    {(time.perf_counter() - start) / len(files) * 1e6:8.1f}us per file, "
+              f"{sum(MediaStore.get(key) is None for key in set(keys))} of {len(set(keys))} old urls gone")
+        assert not set(new_keys) & set(keys)
+
+
+if __name__ == "__main__":
+    main()
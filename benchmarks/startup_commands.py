@@ -0,0 +1,52 @@
+"""Benchmark for loading the commands of 50 streams at startup.
+
+Every stream has a copy of the bundled .cmd files. Compares loading them with the process-wide builtin command
+registry against the previous behaviour, where every loaded command inspected all cog modules again.
+Run from the repository root with `python -m benchmarks.startup_commands`.
+"""
+from __future__ import annotations
+
+import pathlib
+import shutil
+import tempfile
+import time
+
+from chat_bot.custom_cog import CustomCog
+from data_types.command import Command
+
+STREAM_COUNT = 50
+
+
+def load_streams(stream_folders: list[pathlib.Path], inspect_every_command: bool) -> int:
+    loaded = 0
+    for folder in stream_folders:
+        for command_file in folder.glob("**/*.cmd"):
+            if inspect_every_command:
+                CustomCog.get_commands()
+            Command(command_file)
+            loaded += 1
+    return loaded
+
+
+def main() -> None:
+    bundled = pathlib.Path(__file__).resolve().parent.parent / "chat_bot" / "commands"
+    with tempfile.TemporaryDirectory() as directory:
+        stream_folders = []
+        for number in range(STREAM_COUNT):
+            folder = pathlib.Path(directory) / f"stream{number}"
+            shutil.copytree(bundled, folder)
+            stream_folders.append(folder)
+
+        start = time.perf_counter()
+        loaded = load_streams(stream_folders, inspect_every_command=True)
+        previous = time.perf_counter() - start
+        start = time.perf_counter()
+        load_streams(stream_folders, inspect_every_command=False)
+        registry = time.perf_counter() - start
+    print(f"{STREAM_COUNT} streams, {loaded} commands")
+    print(f"inspecting the cogs per command: {previous * 1e3:.1f}ms")
+    print(f"builtin command registry:        {registry * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark for third party emotes with 10k emotes per channel.
+
+A local stand-in for BetterTTV and 7TV serves 5000 emotes per provider for the channel, they are loaded through
+ThirdPartyEmotes into ChatMessage. Chat messages are then rendered by splitting them into words once and probing the
+emote table per word, compared to checking every emote name against the message and replacing it.
+Run from the repository root with `python -m benchmarks.third_party_emotes`.
+"""
+from __future__ import annotations
+
+import asyncio
+import html
+import pathlib
+import random
+import shutil
+import tempfile
+import time
+
+from aiohttp import web
+
+from data_types.chat_message import ChatMessage
+from data_types.stream import Stream
+from emote_providers import ThirdPartyEmotes
+from emote_providers.providers import BTTVEmoteProvider, SevenTVEmoteProvider
+
+EMOTES_PER_PROVIDER = 5000
+MESSAGE_COUNT = 20000
+
+
+def emote_names(prefix: str) -> list[str]:
+    return [f"{prefix}{number}Pog" for number in range(EMOTES_PER_PROVIDER)]
+
+
+async def start_stand_in() -> tuple[web.AppRunner, str]:
+    async def bttv_global(_: web.Request) -> web.Response:
+        return web.json_response([])
+
+    async def bttv_user(_: web.Request) -> web.Response:
+        return web.json_response({"channelEmotes": [{"id": f"b{number}", "code": name} for number, name in enumerate(emote_names("bttv"))],
+                                  "sharedEmotes": []})
+
+    async def seventv_global(_: web.Request) -> web.Response:
+        return web.json_response({"emotes": []})
+
+    async def seventv_user(_: web.Request) -> web.Response:
+        return web.json_response({"emote_set": {"emotes": [{"name": name, "data": {"host": {"url": f"//cdn.7tv.app/emote/s{number}"}}}
+                                                           for number, name in enumerate(emote_names("7tv"))]}})
+
+    app = web.Application()
+    app.router.add_get("/bttv/cached/emotes/global", bttv_global)
+    app.router.add_get("/bttv/cached/users/twitch/{user_id}", bttv_user)
+    app.router.add_get("/7tv/emote-sets/global", seventv_global)
+    app.router.add_get("/7tv/users/twitch/{user_id}", seventv_user)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/"
+
+
+def replace_by_emote(message: str, emotes: dict[str, str]) -> str:
+    """Checks every emote name against the message"""
+    message = html.escape(message, quote=False)
+    for name, url in emotes.items():
+        if name in message:
+            message = " ".join(f"<img src='{url}'>" if word == name else word for word in message.split(" "))
+    return message
+
+
+def build_messages(emotes: list[str]) -> list[str]:
+    words = ["hello", "chat", "LUL", "what", "is", "this", "gg", "<3", "wow", "no", "way"]
+    random.seed(1)
+    messages = []
+    for _ in range(MESSAGE_COUNT):
+        message = random.choices(words, k=random.randint(3, 15))
+        for _ in range(random.randint(0, 3)):
+            message.insert(random.randrange(len(message) + 1), random.choice(emotes))
+        messages.append(" ".join(message))
+    return messages
+
+
+async def main(directory: pathlib.Path) -> None:
+    shutil.copy(pathlib.Path(__file__).resolve().parent.parent / "streams" / "default.yaml", directory / "default.yaml")
+    stream = Stream("Channel", "1", directory)
+    Stream.add_stream(stream)
+    runner, url = await start_stand_in()
+
+    third_party_emotes = ThirdPartyEmotes([BTTVEmoteProvider(url + "bttv/"), SevenTVEmoteProvider(url + "7tv/")], directory / "third_party_emotes.json")
+    start = time.perf_counter()
+    await third_party_emotes.refresh()
+    loaded = time.perf_counter() - start
+    await runner.cleanup()
+    start = time.perf_counter()
+    ThirdPartyEmotes([BTTVEmoteProvider(), SevenTVEmoteProvider()], directory / "third_party_emotes.json").load()
+    from_snapshot = time.perf_counter() - start
+
+    names = emote_names("bttv") + emote_names("7tv")
+    emotes = {name: f"https://cdn.example/{name}" for name in names}
+    messages = build_messages(names)
+
+    start = time.perf_counter()
+    for message in messages[:MESSAGE_COUNT // 20]:
+        replace_by_emote(message, emotes)
+    per_emote = (time.perf_counter() - start) / (MESSAGE_COUNT // 20)
+
+    start = time.perf_counter()
+    for message in messages:
+        ChatMessage.replace_twitch_emotes(message, "", stream.user_id)
+    per_word = (time.perf_counter() - start) / MESSAGE_COUNT
+
+    print(f"{len(names)} third party emotes in the channel")
+    print(f"loaded from the stand-in: {loaded * 1e3:.0f}ms, from the snapshot: {from_snapshot * 1e3:.0f}ms")
+    print(f"check every emote name:  {per_emote * 1e6:8.1f}us per message, {1 / per_emote:10.0f} messages/s")
+    print(f"one dict probe per word: {per_word * 1e6:8.1f}us per message, {1 / per_word:10.0f} messages/s")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        asyncio.run(main(pathlib.Path(temporary_directory)))
@@ -6,10 +6,13 @@ from typing import TYPE_CHECKING, Optional
 from twitchio.ext import commands
 from twitchio.ext.commands import MissingRequiredArgument
 
-from data_types.types_collection import ChatBotModuleType
+from chat_bot.connection_pool import ConnectionPool
+from chat_bot.message_scheduler import MessageScheduler
+from data_types.types_collection import ChatBotModuleType, MessagePriority
 
 if TYPE_CHECKING:
     from twitchio import Channel, Message
+    from data_types.stream import Stream
 
 log = logging.getLogger(__name__)
 logging.getLogger("twitchio.websocket").disabled = True
@@ -28,20 +31,21 @@ class ChatBot(commands.Bot):
     def get_bot(cls) -> ChatBot:
         return cls.__bot
 
-    def __init__(self, username: str, oauth: str, prefix: Optional[str] = "!") -> None:
+    def __init__(self, username: str, oauth: str, prefix: Optional[str] = "!", channels_per_connection: int = 50) -> None:
         log.debug("Bot Object created")
-        # the .lower() is needed in twitchio 2.2.0 because of a bug that does not call event_ready if there
-        # are uppercase characters in the channel list
         self._channels: list[str] = [stream.streamer.lower() for stream in self.Stream.get_streams() if stream.config['chat-bot']['enabled']]
         self._prefix: str = prefix
         self.display_nick: str = username
         self._bot_tags: dict[str, dict] = dict()
+        self._command_names: Optional[frozenset[str]] = None
+        self.message_scheduler: MessageScheduler = MessageScheduler(self.__send_now, self.is_moderator)
         super().__init__(
             token=oauth,
             nick=username,
-            prefix=self._prefix,
-            initial_channels=self._channels
+            prefix=self._prefix
         )
+        # the channels are joined by the connections of the pool instead of the connection of twitchio
+        self.connection_pool: ConnectionPool = ConnectionPool(self, oauth, self._channels, channels_per_connection, self._heartbeat)
 
         from chat_bot.custom_cog import CustomCog
         CustomCog.load_global_commands()
@@ -68,6 +72,38 @@ class ChatBot(commands.Bot):
         for module_type in ChatBotModuleType:
             self.unload_module_by_type(module_type)
 
+    def add_command(self, command: commands.Command) -> None:
+        super().add_command(command)
+        self._command_names = None
+
+    def remove_command(self, name: str) -> None:
+        super().remove_command(name)
+        self._command_names = None
+
+    @property
+    def command_names(self) -> frozenset[str]:
+        """Every name and alias twitchio can dispatch a command for"""
+        if self._command_names is None:
+            self._command_names = frozenset(self.commands.keys()) | frozenset(self._command_aliases.keys())
+        return self._command_names
+
+    def is_command_invocation(self, message: Message, stream: Stream) -> bool:
+        """Checks if the message calls a command that exists and is not disabled in this channel,
+        so plain chat messages never reach the twitchio command handling"""
+        content = message.content
+        if "reply-parent-msg-id" in message.tags:
+            # twitchio only looks at the word after the @mention of a reply
+            parts = content.split(" ")
+            content = parts[1] if len(parts) > 1 else ""
+        if not content.startswith(self._prefix):
+            return False
+        from chat_bot.custom_cog import CustomCog
+        name = CustomCog.get_calling_name(content, self._prefix)
+        if name not in self.command_names:
+            return False
+        resolved = stream.command_table.resolve(name)
+        return resolved is None or resolved.enabled
+
     def setup_global_aliases(self) -> None:
         from chat_bot.custom_cog import CustomCog
         for command_name, command in CustomCog.global_commands.items():
@@ -80,8 +116,28 @@ class ChatBot(commands.Bot):
                 self.remove_command(command_name)
                 self.add_command(cog_command)
 
+    async def connect(self) -> None:
+        await self.connection_pool.start()
+
+    async def close(self) -> None:
+        await self.connection_pool.stop()
+
+    def get_channel(self, name: str) -> Optional[Channel]:
+        return self.connection_pool.get_channel(name)
+
+    @property
+    def connected_channels(self) -> list[Channel]:
+        return self.connection_pool.connected_channels
+
+    async def join_channels(self, channels: list[str] | tuple[str]) -> None:
+        await self.connection_pool.join_channels(channels)
+
+    async def part_channels(self, channels: list[str] | tuple[str]) -> None:
+        await self.connection_pool.part_channels(channels)
+
     async def start_chat_bot(self) -> None:
         log.info("Starting ChatBot")
+        self.message_scheduler.start()
         await self.connect()
         log.debug("ChatBot started")
 
@@ -94,20 +150,21 @@ class ChatBot(commands.Bot):
 
     async def stop_chat_bot(self) -> None:
         log.info("Stopping ChatBot")
+        await self.message_scheduler.drain(timeout=5.0)
+        self.message_scheduler.stop()
         await self.send_chat_message_on_stop()
         await self.close()
         log.debug("ChatBot stopped")
 
     async def event_ready(self) -> None:
         for stream in self.Stream.get_streams():
-            channel = self.get_channel(stream.streamer)
-            if channel:
-                await channel.send(stream.config['chat-bot']['online-message'].format(bot_name=self.display_nick))
+            if self.get_channel(stream.streamer):
+                await self.send(stream.config['chat-bot']['online-message'].format(bot_name=self.display_nick), stream.streamer, MessagePriority.ANNOUNCEMENT)
         log.info(f'{self.display_nick} online!')
 
     async def event_command_error(self, ctx: commands.Context, error):
         if isinstance(error, MissingRequiredArgument):
-            await ctx.channel.send(f"This command is missing required arguments")
+            await self.send(f"This command is missing required arguments", ctx.channel.name, MessagePriority.COMMAND)
         elif isinstance(error, TypeError):
             log.warning(f"TypeError: {error.args[0]}")
         else:
@@ -122,7 +179,8 @@ class ChatBot(commands.Bot):
                     badges += f"{key}/{value}"
                 else:
                     badges += f",{key}/{value}"
-            self._bot_tags[channel.name] = {'badges': badges, 'display-name': chatter.display_name, 'emotes': ''}
+            user_id = str(self.user_id) if self.user_id else ''
+            self._bot_tags[channel.name] = {'badges': badges, 'display-name': chatter.display_name, 'user-id': user_id, 'emotes': ''}
 
     async def get_bot_tags_for_channel(self, channel: Channel) -> dict[str, dict]:
         if channel.name not in self._bot_tags:
@@ -137,23 +195,32 @@ class ChatBot(commands.Bot):
             log.debug(f"{message.channel.name} -> {self.display_nick}: {message.content}")
             return
         stream.write_into_chatlog(message.author.display_name, message.content)
-        if message.content[0] == self._prefix:
-            if stream.config['stream-overlays']['chat']['include-commands']:
-                stream.add_chat_message(message.content, message.tags)
-        else:
+        if not message.content.startswith(self._prefix) or stream.config['stream-overlays']['chat']['include-commands']:
             stream.add_chat_message(message.content, message.tags)
         log.debug(f"{message.channel.name} -> {message.author.display_name}: {message.content}")
-        await self.handle_commands(message)
+        if self.is_command_invocation(message, stream):
+            await self.handle_commands(message)
 
-    async def send(self, message: str, channel_name: str) -> None:
+    def is_moderator(self, channel_name: str) -> bool:
+        """Checks if the bot moderates the channel, which raises its chat rate limit"""
         channel = self.get_channel(channel_name)
-        if channel:
-            await channel.send(message)
+        chatter = channel.get_chatter(self.nick) if channel else None
+        # the chatter is a PartialChatter without is_mod until the USERSTATE of the channel arrived
+        return bool(getattr(chatter, "is_mod", False))
 
-    async def announce(self, message: str, channel_name: str) -> None:
+    async def __send_now(self, channel_name: str, message: str) -> bool:
         channel = self.get_channel(channel_name)
-        if channel:
-            await channel.send("/announce " + message)
+        if channel is None:
+            return False
+        await channel.send(message)
+        return True
+
+    async def send(self, message: str, channel_name: str, priority: MessagePriority = MessagePriority.RELAY) -> None:
+        """Queues the message, the message scheduler sends it within the rate limits"""
+        self.message_scheduler.submit(channel_name, message, priority)
+
+    async def announce(self, message: str, channel_name: str) -> None:
+        await self.send("/announce " + message, channel_name, MessagePriority.ANNOUNCEMENT)
 
     @property
     def prefix(self):
@@ -24,65 +24,45 @@ class BaseCommands(CustomCog):
     @commands.command(name='uptime')
     async def uptime(self, ctx: commands.Context, *_, **__):
         command = ctx.kwargs["command"]
-        if ctx.kwargs["stream"].is_live:
-            message = command.get_message("online")
-        else:
-            message = command.get_message("offline")
         try:
-            message = message.format(**self.get_format_dicts(ctx))
-            await ctx.send(message)
+            message = self.format_command_message(ctx, "online" if ctx.kwargs["stream"].is_live else "offline")
+            await self.reply(ctx, message)
         except KeyError as e:
             log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
     @commands.command(name="game")
     async def game(self, ctx: commands.Context, *_, **__):
         command = ctx.kwargs["command"]
-        if ctx.kwargs["stream"].is_live:
-            message = command.get_message("online")
-        else:
-            message = command.get_message("offline")
         try:
-            message = message.format(**self.get_format_dicts(ctx))
-            await ctx.send(message)
+            message = self.format_command_message(ctx, "online" if ctx.kwargs["stream"].is_live else "offline")
+            await self.reply(ctx, message)
         except KeyError as e:
             log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
     @commands.command(name="title")
     async def title(self, ctx: commands.Context, *_, **__):
         command = ctx.kwargs["command"]
-        if ctx.kwargs["stream"].is_live:
-            message = command.get_message("online")
-        else:
-            message = command.get_message("offline")
         try:
-            message = message.format(**self.get_format_dicts(ctx))
-            await ctx.send(message)
+            message = self.format_command_message(ctx, "online" if ctx.kwargs["stream"].is_live else "offline")
+            await self.reply(ctx, message)
         except KeyError as e:
             log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
     @commands.command(name="lurk")
     async def lurk(self, ctx: commands.Context, *_, **__):
         command = ctx.kwargs["command"]
-        if ctx.kwargs["stream"].is_live:
-            message = command.get_message("online")
-        else:
-            message = command.get_message("offline")
         try:
-            message = message.format(**self.get_format_dicts(ctx))
-            await ctx.send(message)
+            message = self.format_command_message(ctx, "online" if ctx.kwargs["stream"].is_live else "offline")
+            await self.reply(ctx, message)
         except KeyError as e:
             log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
     @commands.command(name="unlurk")
     async def unlurk(self, ctx: commands.Context, *_, **__):
         command = ctx.kwargs["command"]
-        if ctx.kwargs["stream"].is_live:
-            message = command.get_message("online")
-        else:
-            message = command.get_message("offline")
         try:
-            message = message.format(**self.get_format_dicts(ctx))
-            await ctx.send(message)
+            message = self.format_command_message(ctx, "online" if ctx.kwargs["stream"].is_live else "offline")
+            await self.reply(ctx, message)
         except KeyError as e:
             log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
@@ -0,0 +1,24 @@
+name: "ban_queue"
+aliases: "banqueue"
+rights:
+    user: false
+    moderator: true
+output:
+    message:
+        success: "{param1} removed from the ban queue."
+        fail: "Valid options are 'list', 'remove NAME', 'clear', 'ban [reason]', 'timeout SECONDS [reason]', 'status' and 'cancel'."
+        not_found: "{param1} is not in the ban queue."
+        list: "Ban queue ({count}): {entries}"
+        clear: "Ban queue cleared."
+        timeout_usage: "Usage: ban_queue timeout SECONDS [reason]"
+        running: "Ban queue is already being processed: {progress}"
+        empty: "Ban queue is empty."
+        processing: "Processing {count} users in the ban queue, use 'cancel' to stop."
+        status: "Ban queue: {progress}"
+        not_running: "Ban queue ({count}) is not being processed."
+        cancelled: "Ban queue cancelled after {seconds}s: {progress}"
+        stopped: "Ban queue stopped, could not look up the users: {progress}"
+        finished: "Ban queue finished in {seconds}s: {progress}."
+        finished_with_failures: "Ban queue finished in {seconds}s: {progress}. Failed: {failed}"
+parameter-count: 2
+fields: ["count", "entries", "progress", "failed", "seconds"]
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from functools import partial
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import aiohttp
+from twitchio import Channel
+from twitchio.websocket import HOST, WSConnection
+
+if TYPE_CHECKING:
+    from twitchio import Client
+
+log = logging.getLogger(__name__)
+
+
+class PooledConnection(WSConnection):
+    """A twitchio IRC connection of the ConnectionPool, the pool decides which channels it joins and when the bot is
+    ready. Events are dispatched to the client like those of its own connection."""
+
+    def __init__(self, pool: ConnectionPool, number: int, client: Client, token: str, heartbeat: Optional[float]) -> None:
+        super().__init__(loop=client.loop, heartbeat=heartbeat, client=client, token=token, initial_channels=[])
+        self.number: int = number
+        self.logged_in: asyncio.Event = asyncio.Event()
+        self.__pool: ConnectionPool = pool
+        self.__connected_before: bool = False
+
+    async def _connect(self) -> None:
+        """Connects and logs in, a connection that dropped hands its channels to the other connections first"""
+        self.is_ready.clear()
+        self.logged_in.clear()
+        if self._keeper:
+            self._keeper.cancel()
+        if self.is_alive:
+            await self._websocket.close()
+        if self.__connected_before:
+            self._cache.clear()
+            self._join_pending.clear()
+            self.__pool.connection_lost(self)
+        http = self._client._http
+        if not http.nick:
+            await http.validate(token=self._token)
+        self.nick, self.user_id = http.nick, http.user_id
+        while True:
+            try:
+                self._websocket = await http.session.ws_connect(url=self.__pool.host, heartbeat=self._heartbeat)
+                break
+            except Exception as e:
+                retry = self._backoff.delay()
+                log.warning(f"Chat connection {self.number} failed: {e}, retrying in {retry:.1f}s")
+                await asyncio.sleep(retry)
+        self.__connected_before = True
+        self._last_ping = time.time()
+        # a new socket always has to log in again, twitchio only does so after a RECONNECT or a missed PING
+        await self.authenticate([])
+        self._keeper = asyncio.create_task(self._keep_alive())
+        self._ws_ready_event.set()
+
+    async def _keep_alive(self) -> None:
+        """Processes the received lines until the socket closes and reconnects, twitchio stops for good on a close
+        frame of the server"""
+        await self._ws_ready_event.wait()
+        self._ws_ready_event.clear()
+        while not self._websocket.closed:
+            message = await self._websocket.receive()
+            if message.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                log.warning(f"Chat connection {self.number} was closed: {message.extra or message.data}")
+                break
+            if message.type is not aiohttp.WSMsgType.TEXT:
+                continue
+            self.dispatch("raw_data", message.data)
+            for line in message.data.split("\r\n"):
+                if line:
+                    task = asyncio.create_task(self._process_data(line))
+                    task.add_done_callback(partial(self._task_callback, line))
+        asyncio.create_task(self._connect())
+
+    async def _code(self, parsed: dict, code: int) -> None:
+        if code == 1:
+            log.debug(f"Chat connection {self.number} logged in")
+            self.logged_in.set()
+            self.is_ready.set()
+        elif code == 353:
+            self._cache_add(parsed)
+
+    async def _close(self) -> None:
+        """Closes the socket, the http session of the client is shared by every connection of the pool"""
+        if self._keeper:
+            self._keeper.cancel()
+        self.is_ready.clear()
+        self.logged_in.clear()
+        if self._websocket:
+            await self._websocket.close()
+
+
+class ConnectionPool:
+    """Shards the channels of the bot over several IRC connections.
+
+    Every connection gets up to channels_per_connection channels, so a slow socket only delays the chat of its own
+    channels. The JOINs of all connections share the join limit of the account and are sent in batches of channels.
+    If a connection drops, its channels are joined by the remaining connections right away and the dropped connection
+    takes new channels once it is back. Every connection dispatches its events to the client, so the messages of all
+    connections arrive in the same event_message.
+    """
+    host: str = HOST
+    join_limit: int = 20
+    join_window: float = 10.0
+    # channels per JOIN line, IRC lines are limited to 512 bytes and channel names to 25 characters
+    join_batch_size: int = 15
+    join_timeout: float = 11.0
+
+    def __init__(self, client: Client, token: str, channels: Iterable[str], channels_per_connection: int = 50,
+                 heartbeat: Optional[float] = 30.0) -> None:
+        self.__client: Client = client
+        self.__token: str = token.replace("oauth:", "")
+        self.__channels: list[str] = list(dict.fromkeys(channel.lower().lstrip("#") for channel in channels))
+        self.channels_per_connection: int = channels_per_connection
+        self.__heartbeat: Optional[float] = heartbeat
+        self.__connections: list[PooledConnection] = []
+        # channel -> connection that joined or is joining it
+        self.__assignments: dict[str, PooledConnection] = {}
+        # send times of the JOINs within the join window
+        self.__joins: deque[float] = deque()
+        self.__tasks: set[asyncio.Future] = set()
+
+    @property
+    def connections(self) -> list[PooledConnection]:
+        return list(self.__connections)
+
+    def get_channel(self, name: str) -> Optional[Channel]:
+        """The channel if it is joined, bound to the connection that joined it"""
+        name = name.lower().lstrip("#")
+        connection = self.__assignments.get(name)
+        if connection is not None and name in connection._cache:
+            return Channel(name=name, websocket=connection)
+        return None
+
+    @property
+    def connected_channels(self) -> list[Channel]:
+        return [channel for channel in map(self.get_channel, self.__assignments) if channel is not None]
+
+    def channel_counts(self) -> dict[int, int]:
+        """Number of channels assigned to every connection"""
+        counts = {connection.number: 0 for connection in self.__connections}
+        for connection in self.__assignments.values():
+            counts[connection.number] += 1
+        return counts
+
+    async def start(self) -> None:
+        """Connects, joins every channel and dispatches event_ready once all connections are done"""
+        start = time.monotonic()
+        count = max(1, math.ceil(len(self.__channels) / self.channels_per_connection))
+        self.__connections = [self.__create_connection(number) for number in range(count)]
+        for index, channel in enumerate(self.__channels):
+            self.__assignments[channel] = self.__connections[index % count]
+        await asyncio.gather(*(connection._connect() for connection in self.__connections))
+        await asyncio.gather(*(self.__join(connection, self.__assigned_to(connection)) for connection in self.__connections))
+        log.info(f"Joined {len(self.connected_channels)} of {len(self.__channels)} channels over {count} connections "
+                 f"in {time.monotonic() - start:.2f}s")
+        self.__client.run_event("ready")
+
+    async def stop(self) -> None:
+        for task in list(self.__tasks):
+            task.cancel()
+        await asyncio.gather(*(connection._close() for connection in self.__connections), return_exceptions=True)
+        if self.__client._http.session:
+            await self.__client._http.session.close()
+
+    async def join_channels(self, channels: Iterable[str]) -> None:
+        """Joins the channels over the connection with the fewest channels, a new one if all of them are full"""
+        channels = [channel.lower().lstrip("#") for channel in channels if channel.lower().lstrip("#") not in self.__assignments]
+        by_connection: dict[PooledConnection, list[str]] = {}
+        for channel in channels:
+            connection = self.__least_loaded(self.__connections)
+            if connection is None or self.channel_counts()[connection.number] >= self.channels_per_connection:
+                connection = self.__create_connection(len(self.__connections))
+                self.__connections.append(connection)
+                await connection._connect()
+            self.__assignments[channel] = connection
+            by_connection.setdefault(connection, []).append(channel)
+        await asyncio.gather(*(self.__join(connection, names) for connection, names in by_connection.items()))
+
+    async def part_channels(self, channels: Iterable[str]) -> None:
+        for channel in channels:
+            channel = channel.lower().lstrip("#")
+            connection = self.__assignments.pop(channel, None)
+            if connection is not None and connection.is_alive:
+                await connection.part_channels(channel)
+
+    def connection_lost(self, connection: PooledConnection) -> None:
+        """Moves the channels of the dropped connection to the connections that are still logged in"""
+        channels = self.__assigned_to(connection)
+        if not channels:
+            return
+        targets = [target for target in self.__connections if target is not connection and target.logged_in.is_set()]
+        if not targets:
+            log.warning(f"Chat connection {connection.number} dropped, its {len(channels)} channels are joined again once it is back")
+            self.__run(self.__join(connection, channels))
+            return
+        log.warning(f"Chat connection {connection.number} dropped, moving its {len(channels)} channels to {len(targets)} other connections")
+        by_connection: dict[PooledConnection, list[str]] = {}
+        for channel in channels:
+            target = self.__least_loaded(targets)
+            self.__assignments[channel] = target
+            by_connection.setdefault(target, []).append(channel)
+        for target, names in by_connection.items():
+            self.__run(self.__join(target, names))
+
+    def join_failed(self, connection: PooledConnection, channel: str) -> None:
+        """Twitch didn't confirm the JOIN in time, the channel stays assigned and is joined again on a reconnect"""
+        if self.__assignments.get(channel) is connection:
+            log.warning(f"Chat connection {connection.number} could not join {channel}")
+
+    def __create_connection(self, number: int) -> PooledConnection:
+        return PooledConnection(self, number, self.__client, self.__token, self.__heartbeat)
+
+    def __assigned_to(self, connection: PooledConnection) -> list[str]:
+        return [channel for channel, assigned in self.__assignments.items() if assigned is connection]
+
+    def __least_loaded(self, connections: list[PooledConnection]) -> Optional[PooledConnection]:
+        counts = self.channel_counts()
+        return min(connections, key=lambda connection: counts[connection.number], default=None)
+
+    def __run(self, coroutine) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def __acquire_joins(self, wanted: int) -> int:
+        """Waits until the join limit of the account allows a JOIN, returns how many of the wanted JOINs may be sent"""
+        while True:
+            now = time.monotonic()
+            while self.__joins and self.__joins[0] <= now - self.join_window:
+                self.__joins.popleft()
+            granted = min(wanted, self.join_limit - len(self.__joins))
+            if granted > 0:
+                self.__joins.extend([now] * granted)
+                return granted
+            await asyncio.sleep(self.__joins[0] + self.join_window - now)
+
+    async def __join(self, connection: PooledConnection, channels: list[str]) -> None:
+        """Joins the channels over the connection in batches and waits until Twitch confirmed them"""
+        await connection.logged_in.wait()
+        pending = list(channels)
+        joins: dict[str, asyncio.Future] = {}
+        while pending:
+            granted = await self.__acquire_joins(min(len(pending), self.join_batch_size))
+            # channels that moved to another connection in the meantime are left to it
+            batch = [channel for channel in pending[:granted] if self.__assignments.get(channel) is connection]
+            del pending[:granted]
+            if not batch:
+                continue
+            for channel in batch:
+                joins[channel] = connection._join_pending[channel] = connection._loop.create_future()
+            try:
+                await connection.send("JOIN " + ",".join(f"#{channel}" for channel in batch))
+            except Exception as e:
+                log.warning(f"Chat connection {connection.number} could not send JOIN: {e}")
+                return
+        if joins:
+            _, not_done = await asyncio.wait(joins.values(), timeout=self.join_timeout)
+            for channel, join in joins.items():
+                if join in not_done:
+                    if connection._join_pending.get(channel) is join:
+                        del connection._join_pending[channel]
+                    self.join_failed(connection, channel)
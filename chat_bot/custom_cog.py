@@ -5,16 +5,18 @@ import inspect
 import logging
 import pathlib
 import random
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from twitchio.ext import commands
 
 import chat_bot
-from data_types.types_collection import ChatBotModuleType, ValidationException
+from data_types.command_template import CommandTemplate
+from data_types.types_collection import ChatBotModuleType, MessagePriority, ValidationException
 from utils import timedelta
 
 if TYPE_CHECKING:
     from data_types.command import Command
+    from data_types.command_table import ResolvedCommand
 
 log = logging.getLogger(__name__)
 
@@ -24,13 +26,19 @@ class CustomCog(commands.Cog):
     from data_types.stream import Stream
 
     global_commands: dict[str, Command] = {}
+    __builtin_commands: Optional[frozenset[str]] = None
+
+    @staticmethod
+    def get_builtin_commands() -> frozenset[str]:
+        """Names of the commands implemented by the cogs, the modules are only inspected once per process"""
+        if CustomCog.__builtin_commands is None:
+            CustomCog.__builtin_commands = frozenset(CustomCog.get_commands())
+        return CustomCog.__builtin_commands
 
     @staticmethod
     def get_commands() -> list[str]:
         names = []
         for module_type in ChatBotModuleType:
-            if module_type == ChatBotModuleType.CUSTOM or module_type == ChatBotModuleType.BEATSABER:
-                pass
             module = importlib.import_module(module_type.value)
             for x in module.__dict__:
                 attr = getattr(module, x)
@@ -52,6 +60,8 @@ class CustomCog(commands.Cog):
                     cls.global_commands[name] = command
             except ValidationException as e:
                 log.warning(f"Problem loading command {command_file.name}: {e}")
+        for stream in cls.Stream.get_streams():
+            stream.invalidate_command_table()
 
     @classmethod
     def get_command(cls, command_name: str, stream: Stream = None) -> Command | None:
@@ -64,11 +74,8 @@ class CustomCog(commands.Cog):
 
     @classmethod
     def is_command_enabled(cls, command_name: str, stream: Stream) -> bool:
-        if command_name in stream.config['chat-bot']['ignore-commands']:
-            return False
-        if command_name in stream.commands.keys():
-            return True
-        return command_name in cls.global_commands.keys()
+        resolved = stream.command_table.resolve(command_name)
+        return resolved is not None and resolved.enabled
 
     def __init__(self, bot: chat_bot.ChatBot) -> None:
         self.bot: chat_bot.ChatBot = bot
@@ -85,36 +92,51 @@ class CustomCog(commands.Cog):
         stream = self.Stream.get_stream(ctx.channel.name)
         if stream is None:
             return False
-        command = self.get_command(ctx.command.name, stream)
-        if command is None:
-            return False
-        calling_name = self.get_calling_name(command, ctx.message.content, ctx.prefix)
-        if self.is_command_enabled(calling_name, stream) and self.has_user_right(ctx, command):
+        resolved = stream.command_table.resolve(self.get_calling_name(ctx.message.content, ctx.prefix))
+        if resolved is not None and resolved.enabled and self.has_user_right(ctx, resolved):
             ctx.kwargs["stream"] = stream
-            ctx.kwargs["command"] = command
+            ctx.kwargs["command"] = resolved.command
             return True
         return False
 
     @staticmethod
-    def get_calling_name(command: Command, message: str, prefix: str) -> str:
-        message = message.replace(prefix, "", 1)
-        for name in command.names:
-            if message.startswith(name):
-                return name
-        log.error("there can't be a command that was executed but does not match any name")
+    async def reply(ctx: commands.Context, message: str, priority: MessagePriority = MessagePriority.COMMAND) -> None:
+        """Queues the message in the channel of the command, ahead of relayed messages"""
+        await ctx.bot.send(message, ctx.channel.name, priority)
 
     @staticmethod
-    def has_user_right(ctx: commands.Context, command: Command) -> bool:
+    def get_calling_name(message: str, prefix: str) -> str:
+        """Returns the name or alias the command was called with, the same way twitchio parses it"""
+        return message[len(prefix):].lstrip().split(" ", 1)[0]
+
+    @staticmethod
+    def has_user_right(ctx: commands.Context, command: Command | ResolvedCommand) -> bool:
         return command.user_command or command.moderator_command and ctx.author.is_mod or command.broadcaster_command and ctx.author.is_broadcaster
 
     @staticmethod
-    def get_format_dicts(ctx: commands.Context) -> dict:
-        return {
-            **CustomCog.__create_param_dict(ctx),
-            **CustomCog.__create_stream_dict(ctx.kwargs["stream"]),
-            **CustomCog.__create_context_dict(ctx),
-            **CustomCog.__create_random_dict(ctx.kwargs["command"])
-        }
+    def format_command_message(ctx: commands.Context, message_type: Optional[str] = None, extra_values: Optional[dict[str, str]] = None) -> str:
+        """Renders the message of the command, only the placeholders used by the message are computed. extra_values
+        are filled in by the command itself, declared as fields in its command file, and take precedence over the
+        parameters"""
+        command = ctx.kwargs["command"]
+        template = command.get_template(message_type)
+        values = dict(extra_values or {})
+        fields = template.fields
+        if fields & CommandTemplate.context_fields:
+            values.update(CustomCog.__create_context_dict(ctx))
+        if fields & CommandTemplate.stream_fields:
+            values.update(CustomCog.__create_stream_dict(ctx.kwargs["stream"], fields))
+        random_options = command.get_random()
+        if random_options is not None:
+            for key in fields & random_options.keys():
+                values[key] = random.choice(random_options[key])
+        for number in range(0, command.parameter_count):
+            param = "param" + str(number)
+            if param in fields and param not in values:
+                value = CustomCog.__create_param(ctx, number)
+                if value is not None:
+                    values[param] = value
+        return template.render(values)
 
     @staticmethod
     def __create_context_dict(ctx: commands.Context) -> dict:
@@ -126,39 +148,27 @@ class CustomCog(commands.Cog):
         return context_dict
 
     @staticmethod
-    def __create_stream_dict(stream: Stream) -> dict:
+    def __create_stream_dict(stream: Stream, fields: frozenset[str]) -> dict:
         stream_param_dict = {
             "streamer": stream.streamer,
         }
         if stream.is_live:
             stream_param_dict["title"] = stream.title
             stream_param_dict["game"] = stream.game
-            if stream.uptime:
+            if stream.uptime and ("uptime_hours" in fields or "uptime_minutes" in fields):
                 delta = timedelta.format_timedelta(stream.uptime)
                 stream_param_dict["uptime_hours"] = delta["hours"]
                 stream_param_dict["uptime_minutes"] = delta["minutes"]
         return stream_param_dict
 
     @staticmethod
-    def __create_param_dict(ctx: commands.Context) -> dict:
-        param_dict = {}
+    def __create_param(ctx: commands.Context, number: int) -> Optional[str]:
         command = ctx.kwargs["command"]
-        for number in range(0, command.parameter_count):
-            param = "param" + str(number)
-            if len(ctx.args) > number:
-                param_dict[param] = ctx.args[number]
-            elif command.replace_param_with_caller(param):
-                param_dict[param] = ctx.author.display_name
-            elif not command.is_param_required(param):
-                param_dict[param] = ""
-        return param_dict
-
-    @staticmethod
-    def __create_random_dict(command: Command) -> dict:
-        random_dict = {}
-        random_options = command.get_random()
-        if random_options is not None:
-            for key, value in random_options.items():
-                random_dict[key] = random.choice(value)
-
-        return random_dict
+        param = "param" + str(number)
+        if len(ctx.args) > number:
+            return ctx.args[number]
+        elif command.replace_param_with_caller(param):
+            return ctx.author.display_name
+        elif not command.is_param_required(param):
+            return ""
+        return None
@@ -27,29 +27,32 @@ class CustomCommands(CustomCog):
         log.info(f'Custom Commands loaded: {self.name}')
 
     def load_custom_commands(self, stream: Optional[Stream] = None):
+        """Registers the custom commands of the stream or of all streams, commands whose aliases changed are
+        registered again with the aliases of every stream using them"""
         log.info("Loading custom Commands")
-        display_commands = []
-        command_aliases = {}
-
         if stream:
             log.debug(f"CustomCommands for {stream.streamer}")
-            display_commands = stream.get_custom_commands()
-            for command_name in display_commands:
-                command_aliases[command_name] = self._commands.get(command_name).aliases + stream.get_command(command_name).aliases
+            display_commands = set(stream.get_custom_commands())
         else:
             log.debug("CustomCommands for all streams loaded")
-            for stream in self.Stream.get_streams():
-                for command_name in stream.get_custom_commands():
-                    display_commands.append(command_name)
-                    if command_name in command_aliases:
-                        command_aliases[command_name].extend(stream.get_command(command_name).aliases)
-                    else:
-                        command_aliases[command_name] = stream.get_command(command_name).aliases
+            display_commands = {command_name for stream in self.Stream.get_streams() for command_name in stream.get_custom_commands()}
+
+        command_aliases = {command_name: [] for command_name in display_commands}
+        for any_stream in self.Stream.get_streams():
+            for command_name in any_stream.get_custom_commands():
+                if command_name in command_aliases:
+                    command_aliases[command_name].extend(any_stream.get_command(command_name).aliases)
 
         for command_name in display_commands:
-            if command_name not in self.bot.commands.keys() and command_name not in self.commands:
-                bot_command = commands.Command(command_name, self.display_command, aliases=command_aliases[command_name])
-                self.add_command(bot_command)
+            aliases = list(dict.fromkeys(command_aliases[command_name]))
+            if command_name in self.commands:
+                if set(self.commands[command_name].aliases) == set(aliases):
+                    continue
+                self.remove_command(command_name)
+            elif command_name in self.bot.commands.keys():
+                continue
+            bot_command = commands.Command(command_name, self.display_command, aliases=aliases)
+            self.add_command(bot_command)
 
     @classmethod
     async def display_command(cls, ctx: commands.Context, *_, **__):
@@ -59,8 +62,8 @@ class CustomCommands(CustomCog):
             ctx.kwargs["stream"] = stream
             ctx.kwargs["command"] = command
             try:
-                message = command.get_message().format(**cls.get_format_dicts(ctx))
-                await ctx.send(message)
+                message = cls.format_command_message(ctx)
+                await cls.reply(ctx, message)
             except KeyError as e:
                 log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
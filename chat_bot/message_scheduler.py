@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from data_types.types_collection import MessagePriority
+
+log = logging.getLogger(__name__)
+
+
+class MessageScheduler:
+    """Sends the chat messages of the bot within the rate limits of Twitch.
+
+    Messages are queued per channel and sent by priority, oldest first. The account may send moderator_limit messages
+    per window, at most regular_limit of them to channels it doesn't moderate, and one message per regular_interval
+    in such a channel. The last reserved messages of both limits are kept for moderation and command replies. A
+    message is coalesced with an identical one for the same channel that is still queued or was sent within
+    duplicate_window seconds. If the queue of a channel is full, the oldest message with the lowest priority is
+    dropped. A message the send callback couldn't deliver, e.g. because the channel isn't joined, counts as failed
+    and doesn't use up the rate limits.
+    """
+    window: float = 30.0
+    regular_limit: int = 20
+    moderator_limit: int = 100
+    regular_interval: float = 1.0
+    duplicate_window: float = 30.0
+    reserved: int = 4
+    max_depth: int = 50
+    report_interval: float = 60.0
+
+    def __init__(self, send: Callable[[str, str], Awaitable[bool]], is_moderator: Callable[[str], bool]) -> None:
+        self.__send: Callable[[str, str], Awaitable[bool]] = send
+        self.__is_moderator: Callable[[str], bool] = is_moderator
+        # channel -> heap of (priority, sequence number, message)
+        self.__queues: dict[str, list[tuple[int, int, str]]] = dict()
+        self.__sequence: itertools.count = itertools.count()
+        # send times of the account within the window, in total and to channels the account doesn't moderate
+        self.__sent: deque[float] = deque()
+        self.__sent_regular: deque[float] = deque()
+        self.__last_sent: dict[str, float] = dict()
+        # channel -> message -> send time
+        self.__recent: dict[str, dict[str, float]] = dict()
+        # channel -> counter name -> count
+        self.__stats: dict[str, dict[str, int]] = dict()
+        # channel -> dropped and failed messages at the last report
+        self.__reported: dict[str, tuple[int, int]] = dict()
+        self.__wakeup: asyncio.Event = asyncio.Event()
+        self.__task: Optional[asyncio.Future] = None
+
+    def submit(self, channel: str, message: str, priority: MessagePriority = MessagePriority.RELAY) -> bool:
+        """Queues the message, returns False if it was coalesced with an identical message or dropped"""
+        channel = channel.lower()
+        queue = self.__queues.setdefault(channel, [])
+        stats = self.__channel_stats(channel)
+        if message in self.__recent.get(channel, {}) or any(queued == message for _, _, queued in queue):
+            stats["coalesced"] += 1
+            return False
+        entry = (int(priority), next(self.__sequence), message)
+        if len(queue) >= self.max_depth:
+            # the oldest message of the lowest priority
+            lowest = max(queue, key=lambda queued: (queued[0], -queued[1]))
+            stats["dropped"] += 1
+            if lowest[0] < entry[0]:
+                log.debug(f"Chat queue of {channel} is full, dropped: {message}")
+                return False
+            log.debug(f"Chat queue of {channel} is full, dropped: {lowest[2]}")
+            queue.remove(lowest)
+            heapq.heapify(queue)
+        heapq.heappush(queue, entry)
+        stats["queued"] += 1
+        stats["max_depth"] = max(stats["max_depth"], len(queue))
+        self.__wakeup.set()
+        return True
+
+    def depth(self, channel: Optional[str] = None) -> int:
+        """Number of queued messages for the channel or for all channels"""
+        if channel is not None:
+            return len(self.__queues.get(channel.lower(), []))
+        return sum(len(queue) for queue in self.__queues.values())
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Counters by channel: queued, sent, failed, dropped, coalesced, max_depth and the current depth"""
+        return {channel: {**stats, "depth": self.depth(channel)} for channel, stats in self.__stats.items()}
+
+    def start(self) -> None:
+        if self.__task is None or self.__task.done():
+            self.__task = asyncio.ensure_future(self.__run())
+
+    async def drain(self, timeout: float) -> None:
+        """Waits up to timeout seconds until every queued message was sent"""
+        deadline = time.monotonic() + timeout
+        while self.depth() and self.__task is not None and not self.__task.done() and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+    def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+        for channel, queue in self.__queues.items():
+            if queue:
+                self.__stats[channel]["dropped"] += len(queue)
+                log.warning(f"Dropped {len(queue)} queued messages for {channel}: {', '.join(message for _, _, message in sorted(queue))}")
+                queue.clear()
+
+    def __channel_stats(self, channel: str) -> dict[str, int]:
+        if channel not in self.__stats:
+            self.__stats[channel] = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0, "coalesced": 0, "max_depth": 0}
+        return self.__stats[channel]
+
+    def __expire(self, now: float) -> None:
+        for sent in (self.__sent, self.__sent_regular):
+            while sent and sent[0] <= now - self.window:
+                sent.popleft()
+        for recent in self.__recent.values():
+            for message in [message for message, sent_at in recent.items() if sent_at <= now - self.duplicate_window]:
+                del recent[message]
+
+    def __ready_at(self, sent: deque[float], limit: int, now: float) -> float:
+        return sent[len(sent) - limit] + self.window if len(sent) >= limit else now
+
+    def __next_channel(self, now: float) -> tuple[Optional[str], Optional[bool], Optional[float]]:
+        """The channel whose first message goes next and if the account moderates it, otherwise the seconds until a
+        queued message may be sent"""
+        best: Optional[str] = None
+        best_is_moderator: Optional[bool] = None
+        wait: Optional[float] = None
+        for channel, queue in self.__queues.items():
+            if not queue:
+                continue
+            is_moderator = self.__is_moderator(channel)
+            reserved = self.reserved if queue[0][0] > MessagePriority.COMMAND else 0
+            ready_at = self.__ready_at(self.__sent, self.moderator_limit - reserved, now)
+            if not is_moderator:
+                ready_at = max(ready_at, self.__ready_at(self.__sent_regular, self.regular_limit - reserved, now))
+                if channel in self.__last_sent:
+                    ready_at = max(ready_at, self.__last_sent[channel] + self.regular_interval)
+            if ready_at > now:
+                wait = ready_at - now if wait is None else min(wait, ready_at - now)
+            elif best is None or queue[0] < self.__queues[best][0]:
+                best, best_is_moderator = channel, is_moderator
+        return best, best_is_moderator, wait
+
+    async def __run(self) -> None:
+        next_report = time.monotonic() + self.report_interval
+        while True:
+            try:
+                next_report = await self.__step(next_report)
+            except Exception as e:
+                # a single failing message or moderator check must not silence the bot in every channel
+                log.exception(f"Error in the chat queue: {e}")
+                await asyncio.sleep(1.0)
+
+    async def __step(self, next_report: float) -> float:
+        """Sends the next message or waits until one may be sent, returns when the next report is due"""
+        now = time.monotonic()
+        self.__expire(now)
+        if now >= next_report:
+            self.__report()
+            next_report = now + self.report_interval
+        channel, is_moderator, wait = self.__next_channel(now)
+        if channel is None:
+            self.__wakeup.clear()
+            timeout = min(wait, next_report - now) if wait is not None else next_report - now
+            try:
+                await asyncio.wait_for(self.__wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return next_report
+        _, _, message = heapq.heappop(self.__queues[channel])
+        try:
+            sent = await self.__send(channel, message)
+        except Exception as e:
+            # the message may have reached Twitch, so it still counts against the limits
+            sent = None
+            log.warning(f"Could not send a message to {channel}: {e}")
+        if sent is False:
+            log.warning(f"Could not deliver a message to {channel}: {message}")
+        else:
+            self.__sent.append(now)
+            if not is_moderator:
+                self.__sent_regular.append(now)
+            self.__last_sent[channel] = now
+            self.__recent.setdefault(channel, {})[message] = now
+        self.__stats[channel]["sent" if sent else "failed"] += 1
+        return next_report
+
+    def __report(self) -> None:
+        """Logs the channels with queued messages or with messages that were dropped or failed since the last report"""
+        for channel, stats in self.stats().items():
+            counters = (stats["dropped"], stats["failed"])
+            if stats["depth"] > 0 or counters != self.__reported.get(channel, (0, 0)):
+                self.__reported[channel] = counters
+                log.info(f"Chat queue of {channel}: {stats['depth']} queued (max {stats['max_depth']}), {stats['sent']} sent, "
+                         f"{stats['dropped']} dropped, {stats['coalesced']} coalesced, {stats['failed']} failed")
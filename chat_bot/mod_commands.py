@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import logging
-from typing import Union, TYPE_CHECKING
+from functools import partial
+from typing import TYPE_CHECKING
 
 from twitchio.ext import commands
 
 from chat_bot.custom_cog import CustomCog
 from chat_bot.custom_commands import CustomCommands
-from data_types.types_collection import NotificationType
+from data_types.types_collection import MessagePriority, NotificationType
+from data_types.validated_config_cache import ValidatedConfigCache
+from twitch_api import TwitchAPI
+from twitch_api.bulk_moderation import BulkModerationJob
 
 if TYPE_CHECKING:
     from chat_bot import ChatBot
@@ -36,49 +40,88 @@ class ModCommands(CustomCog):
             return
         ctx.kwargs["stream"].add_to_queue(name, notification_type)
         try:
-            message = command.get_message().format(**self.get_format_dicts(ctx))
-            await ctx.send(message)
+            message = self.format_command_message(ctx)
+            await self.reply(ctx, message, MessagePriority.MODERATION)
         except KeyError as e:
             log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
     @commands.command(name="reload")
     async def reload(self, ctx: commands.Context, *_, **__):
         command = ctx.kwargs["command"]
-        ctx.kwargs["stream"].load_resources_and_settings()
+        await ctx.kwargs["stream"].reload_resources_and_settings()
         cog = self.bot.get_cog("CustomCommands")
         if isinstance(cog, CustomCommands):
             cog.load_custom_commands(ctx.kwargs["stream"])
+            if ValidatedConfigCache.get_cache():
+                ValidatedConfigCache.get_cache().save()
             try:
-                message = command.get_message().format(**self.get_format_dicts(ctx))
-                await ctx.send(message)
+                message = self.format_command_message(ctx)
+                await self.reply(ctx, message, MessagePriority.MODERATION)
             except KeyError as e:
                 log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
-    # @commands.command(name="ban_queue")
-    async def ban_queue(self, ctx: commands.Context, option: str = None, value: Union[str, int] = None):
-        if ctx.author.is_mod:
-            stream = self.Stream.get_stream(ctx.channel.name)
-            if option == "list":
-                counter = 0
-                message = "Ban Queue:              "
-                for entry in stream.ban_queue:
-                    message += f"{counter} - {entry}"
-                    counter += 1
-                await ctx.send(message)
-            elif option == "remove":
-                if value is not None:
-                    if type(value) is int and len(stream.ban_queue) >= value:
-                        stream.ban_queue.pop(value)
-                    elif type(value) is str and value in stream.ban_queue:
-                        stream.ban_queue.remove(value)
-            elif option == "clear":
-                stream.ban_queue = []
-            elif option == "ban":
-                for entry in stream.ban_queue:
-                    await ctx.send(f"/ban {entry}")
+    @commands.command(name="ban_queue")
+    async def ban_queue(self, ctx: commands.Context, option: str = None, value: str = None, *reason_words: str, **__):
+        command = ctx.kwargs["command"]
+        stream = ctx.kwargs["stream"]
+        job = stream.ban_queue_job
+        message_type = "fail"
+        values = {"count": str(len(stream.ban_queue))}
+        if option == "list":
+            message_type = "list"
+            values["entries"] = ", ".join(f"{number} - {name}" for number, name in enumerate(list(stream.ban_queue)[:40]))
+        elif option == "remove" and value is not None:
+            names = list(stream.ban_queue)
+            name = names[int(value)] if value.isdigit() and int(value) < len(names) else value
+            values["param1"] = name
+            message_type = "not_found"
+            if name in stream.ban_queue:
+                del stream.ban_queue[name]
+                message_type = "success"
+        elif option == "clear":
+            stream.ban_queue.clear()
+            message_type = "clear"
+        elif option == "timeout" and (value is None or not value.isdigit()):
+            message_type = "timeout_usage"
+        elif option in ("ban", "timeout"):
+            duration = None
+            if option == "timeout":
+                duration = int(value)
+                value = None
+            if job is not None and job.is_running:
+                message_type = "running"
+                values["progress"] = job.progress()
+            elif len(stream.ban_queue) == 0:
+                message_type = "empty"
             else:
-                await ctx.send(
-                    "Valid options are 'list' to show queue, 'remove value' to remove 'value' from queue, 'clear' to clear the whole queue and 'ban' to ban everyone in queue.")
+                reason = " ".join(word for word in (value, *reason_words) if word) or f"ban queue of {stream.streamer}"
+                twitch_api = TwitchAPI.get_twitch_api()
+                stream.ban_queue_job = BulkModerationJob(stream, twitch_api, twitch_api.moderation_rate_limit,
+                                                         partial(self.__report_ban_queue, ctx), reason, duration)
+                stream.ban_queue_job.start()
+                message_type = "processing"
+                values["count"] = str(len(stream.ban_queue_job.names))
+        elif option == "status":
+            message_type = "not_running"
+            if job is not None:
+                message_type = "status"
+                values["progress"] = job.progress()
+        elif option == "cancel":
+            if job is not None and job.cancel():
+                return
+            message_type = "not_running"
+        try:
+            message = self.format_command_message(ctx, message_type, values)
+            await self.reply(ctx, message[:480], MessagePriority.MODERATION)
+        except KeyError as e:
+            log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
+
+    async def __report_ban_queue(self, ctx: commands.Context, message_type: str, values: dict[str, str]) -> None:
+        try:
+            message = self.format_command_message(ctx, message_type, values)
+            await self.reply(ctx, message[:480], MessagePriority.MODERATION)
+        except KeyError as e:
+            log.warning(f"Key {e} was not defined in {ctx.kwargs['command'].name}.cmd file. Please correct.")
 
     @commands.command(name="disable_command")
     async def disable_command(self, ctx: commands.Context, cmd: str, *_, **__):
@@ -91,14 +134,15 @@ class ModCommands(CustomCog):
             if cmd not in stream.config['chat-bot']['ignore-commands']:
                 stream.config['chat-bot']['ignore-commands'].append(cmd)
                 stream.save_settings()
-                message = command.get_message("success")
+                stream.invalidate_command_table()
+                message_type = "success"
             else:
-                message = command.get_message("fail")
+                message_type = "fail"
         else:
-            message = command.get_message("not_found")
+            message_type = "not_found"
         try:
-            message = message.format(**self.get_format_dicts(ctx))
-            await ctx.send(message)
+            message = self.format_command_message(ctx, message_type)
+            await self.reply(ctx, message, MessagePriority.MODERATION)
         except KeyError as e:
             log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
@@ -113,14 +157,15 @@ class ModCommands(CustomCog):
             if cmd in stream.config['chat-bot']['ignore-commands']:
                 stream.config['chat-bot']['ignore-commands'].remove(cmd)
                 stream.save_settings()
-                message = command.get_message("success")
+                stream.invalidate_command_table()
+                message_type = "success"
             else:
-                message = command.get_message("fail")
+                message_type = "fail"
         else:
-            message = command.get_message("not_found")
+            message_type = "not_found"
         try:
-            message = message.format(**self.get_format_dicts(ctx))
-            await ctx.send(message)
+            message = self.format_command_message(ctx, message_type)
+            await self.reply(ctx, message, MessagePriority.MODERATION)
         except KeyError as e:
             log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
@@ -129,13 +174,13 @@ class ModCommands(CustomCog):
         command = ctx.kwargs["command"]
         stream = ctx.kwargs["stream"]
         if stream.config["chat-bot"]["enable-channel-edit-commands"] and stream.get_twitch_user_api() is not None:
-            if stream.get_twitch_user_api().set_title(stream, title):
-                message = command.get_message("success")
+            if await stream.get_twitch_user_api().set_title(stream, title):
+                message_type = "success"
             else:
-                message = command.get_message("fail")
+                message_type = "fail"
             try:
-                message = message.format(**self.get_format_dicts(ctx))
-                await ctx.send(message)
+                message = self.format_command_message(ctx, message_type)
+                await self.reply(ctx, message, MessagePriority.MODERATION)
             except KeyError as e:
                 log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
@@ -144,13 +189,13 @@ class ModCommands(CustomCog):
         command = ctx.kwargs["command"]
         stream = ctx.kwargs["stream"]
         if stream.config["chat-bot"]["enable-channel-edit-commands"] and stream.get_twitch_user_api() is not None:
-            if stream.get_twitch_user_api().set_game(stream, game):
-                message = command.get_message("success")
+            if await stream.get_twitch_user_api().set_game(stream, game):
+                message_type = "success"
             else:
-                message = command.get_message("fail")
+                message_type = "fail"
             try:
-                message = message.format(**self.get_format_dicts(ctx))
-                await ctx.send(message)
+                message = self.format_command_message(ctx, message_type)
+                await self.reply(ctx, message, MessagePriority.MODERATION)
             except KeyError as e:
                 log.warning(f"Key {e} was not defined in {command.name}.cmd file. Please correct.")
 
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from data_types.stream import Stream
+    from data_types.types_collection import NotificationType
+
+log = logging.getLogger(__name__)
+
+
+class Alert:
+    """A notification that was taken from the queue of a stream and is shown on the overlays"""
+
+    def __init__(self, alert_id: str, name: str, notification_type: NotificationType, html: str, display_time: float) -> None:
+        self.id: str = alert_id
+        self.name: str = name
+        self.notification_type: NotificationType = notification_type
+        self.html: str = html
+        self.display_time: float = display_time
+        self.started_at: float = time.monotonic()
+
+    @property
+    def time_left(self) -> float:
+        return max(0.0, self.started_at + self.display_time - time.monotonic())
+
+    @property
+    def is_showing(self) -> bool:
+        return self.time_left > 0
+
+
+class AlertScheduler:
+    """Takes the alerts of a stream from its queue in the order they were received and shows them one after
+    another. Every alert is shown for display-time seconds followed by cooldown seconds without alert,
+    independent of how many overlays are open or how often they refresh."""
+    idle_interval: float = 0.5
+
+    def __init__(self, stream: Stream) -> None:
+        self.__stream: Stream = stream
+        self.__task: Optional[asyncio.Future] = None
+        self.current_alert: Optional[Alert] = None
+
+    def start(self) -> None:
+        if self.__task is None or self.__task.done():
+            log.debug(f"Starting alert scheduler for {self.__stream.streamer}")
+            self.__task = asyncio.ensure_future(self.__run())
+
+    def stop(self) -> None:
+        if self.__task is not None:
+            log.debug(f"Stopping alert scheduler for {self.__stream.streamer}")
+            self.__task.cancel()
+            self.__task = None
+
+    async def __run(self) -> None:
+        while True:
+            if len(self.__stream.queue) == 0:
+                await asyncio.sleep(self.idle_interval)
+                continue
+            notification_config = self.__stream.config['stream-overlays']['notifications']
+            try:
+                self.show(*self.__stream.pop_from_queue(), notification_config['display-time'])
+            except Exception as e:
+                log.error(f"Could not show alert for {self.__stream.streamer}: {e}")
+            await asyncio.sleep(notification_config['display-time'] + notification_config['cooldown'])
+
+    def show(self, name: str, notification_type: NotificationType, display_time: float) -> Alert:
+        alert_id = str(int(time.time() * 1000))
+        html = self.render(name, notification_type)
+        self.current_alert = Alert(alert_id, name, notification_type, html, display_time)
+        self.__stream.bump_version()
+        self.__stream.alert_events.publish({"type": "alert", "id": alert_id, "html": html, "duration": display_time})
+        return self.current_alert
+
+    def render(self, name: str, notification_type: NotificationType) -> str:
+        content = "<div id='queue_display'>"
+        notification_resource = self.__stream.get_alert_info(notification_type)
+        if notification_resource.has_image():
+            image_url, _ = notification_resource.get_image()
+            content = content + f"<img src=\"{image_url}\">"
+        if notification_resource.has_sound():
+            sound_url, sound_mime = notification_resource.get_sound()
+            content = content + f"<audio autoplay><source type=\"{sound_mime}\" src=\"{sound_url}\"></audio>"
+        if notification_resource.has_message():
+            formatted_name = f"<span>{name}</span>"
+            message = notification_resource.get_message().format(name=formatted_name)
+            content = content + f"<p id='message'>{message}</p>"
+        return content + "</div>"
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterator, Optional
+
+if TYPE_CHECKING:
+    from data_types.chat_message import ChatMessage
+
+log = logging.getLogger(__name__)
+
+
+class ChatBuffer:
+    """Ring buffer for the chat messages of a stream, bounded by message count, size and age.
+
+    Messages are kept in receive order, so pruning only ever has to look at the oldest entries.
+    Expiry is based on the monotonic receive time of a message and not on how often the buffer is read.
+    Messages are indexed by their twitch message id and by the id of the user that wrote them.
+    """
+
+    def __init__(self, max_messages: int, max_bytes: int, message_lifetime: float) -> None:
+        self.__messages: OrderedDict[str, ChatMessage] = OrderedDict()
+        self.__messages_by_user: dict[str, dict[str, ChatMessage]] = dict()
+        self.__local_ids = itertools.count()
+        self.__size: int = 0
+        self.max_messages: int = max_messages
+        self.max_bytes: int = max_bytes
+        self.message_lifetime: float = message_lifetime
+
+    def configure(self, max_messages: int, max_bytes: int, message_lifetime: float) -> None:
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.message_lifetime = message_lifetime
+        self.prune()
+
+    def append(self, message: ChatMessage) -> None:
+        if not message.message_id or message.message_id in self.__messages:
+            # messages without twitch id (e.g. bot echoes) get a local one so they can still be indexed
+            message.message_id = f"local-{next(self.__local_ids)}"
+        self.__messages[message.message_id] = message
+        self.__messages_by_user.setdefault(message.user_id, dict())[message.message_id] = message
+        self.__size += message.size
+        self.prune()
+
+    def get(self, message_id: str) -> Optional[ChatMessage]:
+        return self.__messages.get(message_id)
+
+    def get_by_user(self, user_id: str) -> list[ChatMessage]:
+        return list(self.__messages_by_user.get(user_id, dict()).values())
+
+    def remove(self, message: ChatMessage) -> None:
+        if self.__messages.pop(message.message_id, None) is not None:
+            self.__unindex(message)
+
+    def clear(self) -> None:
+        self.__messages.clear()
+        self.__messages_by_user.clear()
+        self.__size = 0
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drops expired messages and the oldest messages above the count or size limit, returns the number dropped"""
+        if now is None:
+            now = time.monotonic()
+        oldest_allowed = now - self.message_lifetime
+        removed = 0
+        while self.__messages:
+            _, oldest = next(iter(self.__messages.items()))
+            if oldest.received_at > oldest_allowed and len(self.__messages) <= self.max_messages and self.__size <= self.max_bytes:
+                break
+            self.__messages.popitem(last=False)
+            self.__unindex(oldest)
+            removed += 1
+        return removed
+
+    def __unindex(self, message: ChatMessage) -> None:
+        self.__size -= message.size
+        user_messages = self.__messages_by_user.get(message.user_id)
+        if user_messages is not None:
+            user_messages.pop(message.message_id, None)
+            if not user_messages:
+                del self.__messages_by_user[message.user_id]
+
+    def latest(self, count: int = 0) -> list[ChatMessage]:
+        """Returns the newest `count` messages in receive order, all messages if count is 0 or less"""
+        if count <= 0 or count >= len(self.__messages):
+            return list(self.__messages.values())
+        messages = list(itertools.islice(reversed(self.__messages.values()), count))
+        messages.reverse()
+        return messages
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        return iter(list(self.__messages.values()))
+
+    def __len__(self) -> int:
+        return len(self.__messages)
+
+    @property
+    def size(self) -> int:
+        return self.__size
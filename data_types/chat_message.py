@@ -1,57 +1,160 @@
 from __future__ import annotations
 
+import html
+import sys
+import time
+from typing import Optional
+
 from data_types.types_collection import ChatMessageType
 
 
 class ChatMessage:
-    __global_emotes = {}
-    __global_badges = {}
+    """A chat message of a stream, rendered into html on first access.
+
+    The emotes and badges are looked up in the table of the channel. Channels without own emotes or badges use the
+    global table itself, channels with own entries get a copy of the global table with their entries on top, which is
+    rebuilt when either changes. Names and urls are interned, so the tables of all channels share the strings.
+    Third party emotes are matched by word in the text around the Twitch emotes, in a table per channel that is
+    layered the same way.
+    """
+    # emote id -> (name, 1x url)
+    __global_emotes: dict[str, tuple[str, str]] = {}
+    # "set id/version" like in the badges tag -> 1x url
+    __global_badges: dict[str, str] = {}
+    # channel id -> own entries of the channel
+    __channel_emotes: dict[str, dict[str, tuple[str, str]]] = {}
+    __channel_badges: dict[str, dict[str, str]] = {}
+    # channel id -> global table with the own entries of the channel on top, only for channels with own entries
+    __emote_tables: dict[str, dict[str, tuple[str, str]]] = {}
+    __badge_tables: dict[str, dict[str, str]] = {}
+    # third party emote name -> 1x url
+    __global_third_party_emotes: dict[str, str] = {}
+    __third_party_emote_tables: dict[str, dict[str, str]] = {}
+    # (channel id, badges tag) -> html
+    __badge_cache: dict[tuple[str, str], str] = {}
+    __badge_cache_size: int = 4096
+
+    @staticmethod
+    def compact_emotes(emotes: dict) -> dict[str, tuple[str, str]]:
+        """Keeps only the name and the 1x url of every emote of a Helix emotes response"""
+        return {emote['id']: (emote['name'], emote['images']['url_1x']) for emote in emotes.get('data', [])}
+
+    @staticmethod
+    def compact_badges(badges: dict) -> dict[str, str]:
+        """Keeps only the 1x url of every badge version of a Helix badges response"""
+        return {f"{badge['set_id']}/{version['id']}": version['image_url_1x'] for badge in badges.get('data', []) for version in badge['versions']}
+
+    @staticmethod
+    def __intern_emotes(emotes: dict[str, tuple[str, str]]) -> dict[str, tuple[str, str]]:
+        return {sys.intern(emote_id): (sys.intern(name), sys.intern(url)) for emote_id, (name, url) in emotes.items()}
+
+    @staticmethod
+    def __intern_urls(urls: dict[str, str]) -> dict[str, str]:
+        return {sys.intern(key): sys.intern(url) for key, url in urls.items()}
+
+    @classmethod
+    def set_global_emotes(cls, emotes: dict[str, tuple[str, str]]) -> None:
+        cls.__global_emotes = cls.__intern_emotes(emotes)
+        cls.__emote_tables = {channel_id: {**cls.__global_emotes, **channel_emotes} for channel_id, channel_emotes in cls.__channel_emotes.items()}
+
+    @classmethod
+    def set_global_badges(cls, badges: dict[str, str]) -> None:
+        cls.__global_badges = cls.__intern_urls(badges)
+        cls.__badge_tables = {channel_id: {**cls.__global_badges, **channel_badges} for channel_id, channel_badges in cls.__channel_badges.items()}
+        cls.__badge_cache = {}
+
+    @classmethod
+    def set_channel_emotes(cls, channel_id: str, emotes: dict[str, tuple[str, str]]) -> None:
+        if emotes:
+            cls.__channel_emotes[channel_id] = cls.__intern_emotes(emotes)
+            cls.__emote_tables[channel_id] = {**cls.__global_emotes, **cls.__channel_emotes[channel_id]}
+        else:
+            cls.__channel_emotes.pop(channel_id, None)
+            cls.__emote_tables.pop(channel_id, None)
+
+    @classmethod
+    def set_channel_badges(cls, channel_id: str, badges: dict[str, str]) -> None:
+        if badges:
+            cls.__channel_badges[channel_id] = cls.__intern_urls(badges)
+            cls.__badge_tables[channel_id] = {**cls.__global_badges, **cls.__channel_badges[channel_id]}
+        else:
+            cls.__channel_badges.pop(channel_id, None)
+            cls.__badge_tables.pop(channel_id, None)
+        cls.__badge_cache = {}
 
     @classmethod
-    def set_global_emotes(cls, emotes: dict) -> None:
-        cls.__global_emotes: dict = {}
-        if 'data' in emotes:
-            for emote in emotes['data']:
-                cls.__global_emotes[emote['id']] = {k: emote[k] for k in set(list(emote.keys())) - {"id"}}
+    def set_third_party_emotes(cls, global_emotes: dict[str, str], channel_emotes: dict[str, dict[str, str]]) -> None:
+        """Replaces all third party emotes, channel_emotes only holds the own emotes of each channel by channel id"""
+        cls.__global_third_party_emotes = cls.__intern_urls(global_emotes)
+        cls.__third_party_emote_tables = {channel_id: {**cls.__global_third_party_emotes, **cls.__intern_urls(emotes)}
+                                          for channel_id, emotes in channel_emotes.items() if emotes}
 
     @classmethod
-    def set_global_badges(cls, badges: dict) -> None:
-        cls.__global_badges: dict = {}
-        if 'data' in badges:
-            for badge in badges['data']:
-                versions = {}
-                for version in badge['versions']:
-                    versions[version['id']] = {k: version[k] for k in set(list(version.keys())) - {"id"}}
-                cls.__global_badges[badge['set_id']] = versions
-
-    def __init__(self, message: str, time: int, refresh_time: int, tags: dict) -> None:
+    def get_global_emotes(cls) -> dict[str, tuple[str, str]]:
+        return cls.__global_emotes
+
+    @classmethod
+    def get_global_badges(cls) -> dict[str, str]:
+        return cls.__global_badges
+
+    @classmethod
+    def get_channel_emotes(cls, channel_id: str) -> dict[str, tuple[str, str]]:
+        """Only the own emotes of the channel, without the global emotes"""
+        return cls.__channel_emotes.get(channel_id, {})
+
+    @classmethod
+    def get_channel_badges(cls, channel_id: str) -> dict[str, str]:
+        """Only the own badges of the channel, without the global badges"""
+        return cls.__channel_badges.get(channel_id, {})
+
+    __slots__ = ('__received_at', 'message_id', '__channel_id', '__user_id', '__user', '__color', '__badges', '__emotes',
+                 '__type', '__is_deleted', '__message', '__html', '__size')
+
+    def __init__(self, message: str, tags: dict, channel_id: str = '') -> None:
+        self.__received_at: float = time.monotonic()
+        self.__channel_id: str = channel_id
+        self.message_id: Optional[str] = tags.get('id')
+        self.__user_id: str = tags.get('user-id', '')
         self.__user: str = tags['display-name']
-        self.__user_with_badges: str = self.format_user(tags)
-        if tags['first-msg'] == '1':
+        self.__color: str = tags.get('color') or ''
+        self.__badges: str = tags.get('badges') or ''
+        self.__emotes: str = tags.get('emotes') or ''
+        if tags.get('first-msg') == '1':
             self.__type: ChatMessageType = ChatMessageType.FIRST_TIME
         else:
             self.__type: ChatMessageType = ChatMessageType.NORMAL
         self.__is_deleted: bool = False
         self.__message: str = self.format_message(message)
-        self.__message_with_emotes: str = self.replace_twitch_emotes(self.__message, tags)
-        self.__time: int = time
-        self.__refresh_time: int = refresh_time
+        self.__html: Optional[str] = None
+        self.__size: int = len(self.__user) + len(self.__badges) + len(self.__emotes) + len(self.__message)
 
     def __eq__(self, other):
-        return isinstance(other, ChatMessage) and self.__user == other.__user and self.__message == other.__message
+        if not isinstance(other, ChatMessage):
+            return False
+        if self.message_id and other.message_id:
+            return self.message_id == other.message_id
+        return self.__user == other.__user and self.__message == other.__message
 
     @property
-    def time_left(self):
-        return self.__time
+    def received_at(self) -> float:
+        return self.__received_at
 
-    def decrease_time_left(self):
-        self.__time -= self.__refresh_time
+    @property
+    def size(self) -> int:
+        """Approximate number of characters of raw data held by this message, used to bound the chat buffer"""
+        return self.__size
 
     @property
     def chat_message(self):
-        if self.__type == ChatMessageType.COMMAND:
-            return f"{self.__user_with_badges} <i>{self.__message_with_emotes}</i>"
-        return f"{self.__user_with_badges}: {self.__message_with_emotes}"
+        """The html for this message, it is rendered on first access and reused after that"""
+        if self.__html is None:
+            user_with_badges = self.format_user(self.__badges, self.__color, self.__user, self.__channel_id)
+            message_with_emotes = self.replace_twitch_emotes(self.__message, self.__emotes, self.__channel_id)
+            if self.__type == ChatMessageType.COMMAND:
+                self.__html = f"{user_with_badges} <i>{message_with_emotes}</i>"
+            else:
+                self.__html = f"{user_with_badges}: {message_with_emotes}"
+        return self.__html
 
     @property
     def deleted(self):
@@ -61,6 +164,10 @@ class ChatMessage:
     def user(self):
         return self.__user
 
+    @property
+    def user_id(self) -> str:
+        return self.__user_id
+
     @property
     def message(self):
         return self.__message
@@ -76,39 +183,101 @@ class ChatMessage:
         self.__is_deleted = True
 
     @classmethod
-    def format_user(cls, tags: dict):
-        user = ""
-        badges = tags['badges'].split(',')
-        if len(badges) > 0 and len(cls.__global_badges) > 0:
-            user_badges = ""
-            for badge in badges:
-                key, version = badge.split('/')
-                if key in cls.__global_badges and str(version) in cls.__global_badges[key]:
-                    user_badges += f"<img id='badge' src='{cls.__global_badges[key][str(version)]['image_url_1x']}'>"
-            if len(user_badges) > 0:
-                user += f"<span id='badges'>{user_badges}</span>"
-
-        user += f"<span style='color:{tags['color']}'><b>{tags['display-name']}</b></span>"
-        return user
+    def format_user(cls, badges: str, color: str, display_name: str, channel_id: str = ''):
+        return cls.format_badges(badges, channel_id) + f"<span style='color:{color}'><b>{display_name}</b></span>"
 
     @classmethod
-    def replace_twitch_emotes(cls, message: str, tags: dict):
-        if len(tags['emotes']) > 0:
-            emotes = tags['emotes'].split("/")
-            replace = {}
-            for emote in emotes:
-                emote_parts = emote.split(":")
-                if emote_parts[0] in cls.__global_emotes:
-                    current_emote = cls.__global_emotes[emote_parts[0]]
-                    replace[current_emote['name']] = current_emote['images']['url_1x']
-                else:
-                    for part in emote_parts[1].split(","):
-                        from_str, to_str = part.split("-")
-                        name = message[int(from_str):int(to_str) + 1]
-                        url = f"https://static-cdn.jtvnw.net/emoticons/v2/{emote_parts[0]}/default/light/1.0"
-                        replace[name] = url
+    def format_badges(cls, badges: str, channel_id: str = '') -> str:
+        """Renders the badges tag into html, every distinct badges string is only rendered once per channel"""
+        key = (channel_id, badges)
+        if key in cls.__badge_cache:
+            return cls.__badge_cache[key]
+        table = cls.__badge_tables.get(channel_id, cls.__global_badges)
+        user_badges = ""
+        if len(table) > 0:
+            for badge in badges.split(','):
+                url = table.get(badge)
+                if url is not None:
+                    user_badges += f"<img id='badge' src='{url}'>"
+        rendered = f"<span id='badges'>{user_badges}</span>" if len(user_badges) > 0 else ""
+        if len(cls.__badge_cache) >= cls.__badge_cache_size:
+            cls.__badge_cache.clear()
+        cls.__badge_cache[key] = rendered
+        return rendered
 
-            for name, url in replace.items():
-                message = message.replace(name, f"<img src='{url}'>")
+    @staticmethod
+    def parse_emote_positions(emotes: str, message_length: int) -> list[tuple[int, int, str]]:
+        """Turns the emotes tag into a sorted list of (start, end, emote id) with end being exclusive.
+        Ranges that are out of bounds or overlap a previous range are dropped."""
+        positions = []
+        for emote in emotes.split("/"):
+            emote_id, _, ranges = emote.partition(":")
+            for part in ranges.split(","):
+                from_str, _, to_str = part.partition("-")
+                try:
+                    start, end = int(from_str), int(to_str) + 1
+                except ValueError:
+                    continue
+                if 0 <= start < end <= message_length:
+                    positions.append((start, end, emote_id))
+        positions.sort()
+        valid_positions = []
+        last_end = 0
+        for position in positions:
+            if position[0] >= last_end:
+                valid_positions.append(position)
+                last_end = position[1]
+        return valid_positions
 
-        return message
+    @classmethod
+    def replace_twitch_emotes(cls, message: str, emotes: str, channel_id: str = ''):
+        """Escapes the message for html and replaces the emotes at the positions given by the emotes tag in a single pass,
+        the third party emotes are replaced in the text between them"""
+        third_party_emotes = cls.__third_party_emote_tables.get(channel_id, cls.__global_third_party_emotes)
+        if not emotes:
+            return cls.replace_third_party_emotes(message, third_party_emotes)
+        table = cls.__emote_tables.get(channel_id, cls.__global_emotes)
+        # the text between the emotes of most messages has nothing to escape or replace and is copied as is
+        plain = not third_party_emotes and "&" not in message and "<" not in message and ">" not in message
+        images = {}
+        parts = []
+        last_end = 0
+        for start, end, emote_id in cls.parse_emote_positions(emotes, len(message)):
+            image = images.get(emote_id)
+            if image is None:
+                emote = table.get(emote_id)
+                if emote is not None:
+                    url = emote[1]
+                else:
+                    url = f"https://static-cdn.jtvnw.net/emoticons/v2/{emote_id}/default/light/1.0"
+                image = images[emote_id] = f"<img src='{url}'>"
+            if start > last_end:
+                text = message[last_end:start]
+                parts.append(text if plain else cls.replace_third_party_emotes(text, third_party_emotes))
+            parts.append(image)
+            last_end = end
+        if last_end < len(message):
+            text = message[last_end:]
+            parts.append(text if plain else cls.replace_third_party_emotes(text, third_party_emotes))
+        return "".join(parts)
+
+    @staticmethod
+    def replace_third_party_emotes(text: str, emotes: dict[str, str]) -> str:
+        """Escapes the text for html and replaces every word that is in emotes, the text is split into words once and
+        every word is a single dict probe"""
+        if not emotes:
+            return html.escape(text, quote=False)
+        parts = []
+        last_end = 0
+        position = 0
+        for word in text.split(' '):
+            url = emotes.get(word)
+            if url is not None:
+                parts.append(html.escape(text[last_end:position], quote=False))
+                parts.append(f"<img src='{url}'>")
+                last_end = position + len(word)
+            position += len(word) + 1
+        if not parts:
+            return html.escape(text, quote=False)
+        parts.append(html.escape(text[last_end:], quote=False))
+        return "".join(parts)
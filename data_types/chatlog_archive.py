@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import argparse
+import datetime
+import logging
+import pathlib
+import re
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+class ChatlogArchive:
+    """Optional SQLite archive of the chatlogs of all streams with a full-text index over the messages.
+
+    Rows are inserted in batches by the chatlog writers, the archive can be used from any thread. A message is stored
+    once per channel, time and user, so importing text logs the live writer already archived adds nothing.
+    """
+    __archive: Optional[ChatlogArchive] = None
+    __line_pattern = re.compile(r"^(\d{2}:\d{2}:\d{2}(?:\.\d+)?):(.*?): (.*)$")
+    __file_pattern = re.compile(r"^chatlog_(\d{4}-\d{2}-\d{2})\.txt$")
+
+    @classmethod
+    def set_archive(cls, archive: ChatlogArchive) -> None:
+        cls.__archive = archive
+
+    @classmethod
+    def get_archive(cls) -> Optional[ChatlogArchive]:
+        return cls.__archive
+
+    def __init__(self, db_path: Path) -> None:
+        log.debug(f"Chatlog archive {db_path} opened")
+        self.__lock: threading.Lock = threading.Lock()
+        self.__connection: sqlite3.Connection = sqlite3.connect(str(db_path), check_same_thread=False)
+        with self.__lock, self.__connection:
+            self.__connection.executescript("""
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = NORMAL;
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY,
+                    channel TEXT NOT NULL,
+                    user TEXT NOT NULL COLLATE NOCASE,
+                    timestamp REAL NOT NULL,
+                    message TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS messages_channel_timestamp ON messages (channel, timestamp);
+                CREATE INDEX IF NOT EXISTS messages_user_timestamp ON messages (user, timestamp);
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (message, content='messages', content_rowid='id');
+                CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+                    INSERT INTO messages_fts (rowid, message) VALUES (new.id, new.message);
+                END;
+                CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+                    INSERT INTO messages_fts (messages_fts, rowid, message) VALUES ('delete', old.id, old.message);
+                END;
+                CREATE TABLE IF NOT EXISTS imported_files (path TEXT PRIMARY KEY);
+            """)
+
+        self.__create_unique_index()
+
+    def __create_unique_index(self) -> None:
+        """Removes the duplicates older archives may contain, then creates the index that prevents them"""
+        with self.__lock, self.__connection:
+            if self.__connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'messages_unique'").fetchone():
+                return
+            removed = self.__connection.execute("DELETE FROM messages WHERE id NOT IN "
+                                                "(SELECT MIN(id) FROM messages GROUP BY channel, timestamp, user, message)").rowcount
+            self.__connection.execute("CREATE UNIQUE INDEX messages_unique ON messages (channel, timestamp, user, message)")
+        if removed:
+            log.info(f"Removed {removed} duplicate messages from the chatlog archive")
+
+    def insert_many(self, rows: Iterable[tuple[str, str, datetime.datetime, str]]) -> int:
+        """Inserts (channel, user, time, message) rows in a single transaction, returns the number of new rows"""
+        with self.__lock, self.__connection:
+            return self.__connection.executemany("INSERT OR IGNORE INTO messages (channel, user, timestamp, message) VALUES (?, ?, ?, ?)",
+                                                 ((channel.lower(), user, time.timestamp(), message) for channel, user, time, message in rows)).rowcount
+
+    def search(self, user: Optional[str] = None, channel: Optional[str] = None, start: Optional[datetime.datetime] = None,
+               end: Optional[datetime.datetime] = None, text: Optional[str] = None, limit: int = 100) -> list[tuple[str, str, datetime.datetime, str]]:
+        """Returns the newest (channel, user, time, message) rows matching all given filters, text is matched as a phrase"""
+        conditions = []
+        parameters = []
+        if text:
+            if user or channel:
+                # the user or channel index is more selective, only check the text of the rows found through it
+                conditions.append("messages.id IN (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? AND rowid = messages.id)")
+            else:
+                conditions.append("messages.id IN (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?)")
+            parameters.append('"' + text.replace('"', '""') + '"')
+        if user:
+            conditions.append("user = ?")
+            parameters.append(user)
+        if channel:
+            conditions.append("channel = ?")
+            parameters.append(channel.lower())
+        if start:
+            conditions.append("timestamp >= ?")
+            parameters.append(start.timestamp())
+        if end:
+            conditions.append("timestamp < ?")
+            parameters.append(end.timestamp())
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.__lock:
+            rows = self.__connection.execute(f"SELECT channel, user, timestamp, message FROM messages {where} ORDER BY timestamp DESC LIMIT ?",
+                                             parameters + [limit]).fetchall()
+        return [(channel, user, datetime.datetime.fromtimestamp(timestamp), message) for channel, user, timestamp, message in rows]
+
+    def import_text_logs(self, channel: str, log_path: Path) -> int:
+        """Imports the chatlog_YYYY-MM-DD.txt files of a channel, files that were imported before are skipped.
+        The file of today is still being written, it is imported once the day is over."""
+        imported = 0
+        today = datetime.date.today()
+        for log_file in sorted(log_path.glob("chatlog_*.txt")):
+            file_match = self.__file_pattern.match(log_file.name)
+            if file_match is None:
+                continue
+            day = datetime.date.fromisoformat(file_match.group(1))
+            if day >= today:
+                continue
+            with self.__lock:
+                if self.__connection.execute("SELECT 1 FROM imported_files WHERE path = ?", (str(log_file.resolve()),)).fetchone():
+                    continue
+            rows = []
+            with open(log_file, "r", errors="replace") as f:
+                for line in f:
+                    line_match = self.__line_pattern.match(line.rstrip("\n"))
+                    if line_match is None:
+                        continue
+                    time = datetime.datetime.combine(day, datetime.time.fromisoformat(line_match.group(1)))
+                    rows.append((channel, line_match.group(2), time, line_match.group(3)))
+            inserted = self.insert_many(rows)
+            with self.__lock, self.__connection:
+                self.__connection.execute("INSERT INTO imported_files (path) VALUES (?)", (str(log_file.resolve()),))
+            log.info(f"Imported {inserted} of {len(rows)} lines from {log_file}")
+            imported += inserted
+        return imported
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description="Import and search the chatlog archive")
+    parser.add_argument("database", type=pathlib.Path)
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    import_parser = subparsers.add_parser("import", help="import the text chatlogs of every stream in the base folder")
+    import_parser.add_argument("base_folder", type=pathlib.Path)
+    search_parser = subparsers.add_parser("search")
+    search_parser.add_argument("--user")
+    search_parser.add_argument("--channel")
+    search_parser.add_argument("--start", type=datetime.datetime.fromisoformat)
+    search_parser.add_argument("--end", type=datetime.datetime.fromisoformat)
+    search_parser.add_argument("--text")
+    search_parser.add_argument("--limit", type=int, default=100)
+    arguments = parser.parse_args()
+
+    archive = ChatlogArchive(arguments.database)
+    if arguments.action == "import":
+        for logs in sorted(arguments.base_folder.glob("*/logs")):
+            archive.import_text_logs(logs.parent.name, logs)
+    else:
+        for result in archive.search(arguments.user, arguments.channel, arguments.start, arguments.end, arguments.text, arguments.limit):
+            print(f"{result[2].isoformat(sep=' ')} #{result[0]} {result[1]}: {result[3]}")
+    archive.close()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import datetime
+import logging
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from data_types.chatlog_archive import ChatlogArchive
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+class ChatlogWriter:
+    """Buffers the chatlog of a stream in memory and appends it to the daily log files in a worker thread.
+
+    Lines are flushed once flush_size lines are pending or flush_interval seconds after the first pending line.
+    Every line remembers the day it was written, so lines are always written into the file of the right day.
+    If a chatlog archive is set up, every flushed batch is also inserted into the archive.
+    """
+    __executor: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="chatlog")
+
+    def __init__(self, channel: str, log_path: Path, flush_size: int = 100, flush_interval: float = 5.0) -> None:
+        self.channel: str = channel
+        self.log_path: Path = log_path
+        self.flush_size: int = flush_size
+        self.flush_interval: float = flush_interval
+        self.__pending: list[tuple[datetime.datetime, str, str]] = []
+        self.__in_flight: int = 0
+        self.__flush_task: Optional[asyncio.Future] = None
+        self.__write_future: Optional[concurrent.futures.Future] = None
+        self.__flush_timer: Optional[asyncio.TimerHandle] = None
+        self.__file_lock: threading.Lock = threading.Lock()
+        self.__falling_behind: bool = False
+
+    def write(self, user: str, message: str) -> None:
+        self.__pending.append((datetime.datetime.now(), user, message))
+        if len(self.__pending) >= self.flush_size:
+            self.__check_queue_depth()
+            self.__start_flush()
+        elif self.__flush_timer is None:
+            self.__flush_timer = asyncio.get_event_loop().call_later(self.flush_interval, self.__start_flush)
+
+    def __start_flush(self) -> None:
+        if self.__flush_timer is not None:
+            self.__flush_timer.cancel()
+            self.__flush_timer = None
+        if self.__flush_task is None or self.__flush_task.done():
+            self.__flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        """Writes all pending lines in a worker thread, lines added while writing are written afterwards"""
+        while self.__pending:
+            lines, self.__pending = self.__pending, []
+            self.__in_flight = len(lines)
+            self.__write_future = self.__executor.submit(self.__write_lines, lines)
+            try:
+                await asyncio.wrap_future(self.__write_future)
+            except (OSError, sqlite3.Error) as e:
+                log.error(f"Could not write chatlog to {self.log_path}: {e}")
+            finally:
+                self.__in_flight = 0
+
+    def close(self) -> None:
+        """Waits for the lines that are being written and writes all pending lines synchronously, used on shutdown"""
+        if self.__flush_timer is not None:
+            self.__flush_timer.cancel()
+            self.__flush_timer = None
+        if self.__write_future is not None and not self.__write_future.done():
+            log.debug(f"Waiting for the chatlog lines that are being written to {self.log_path}")
+            concurrent.futures.wait([self.__write_future])
+        lines, self.__pending = self.__pending, []
+        if lines:
+            log.debug(f"Writing {len(lines)} remaining chatlog lines to {self.log_path}")
+            try:
+                self.__write_lines(lines)
+            except (OSError, sqlite3.Error) as e:
+                log.error(f"Could not write chatlog to {self.log_path}: {e}")
+
+    def __write_lines(self, lines: list[tuple[datetime.datetime, str, str]]) -> None:
+        lines_per_day: dict[datetime.date, list[str]] = dict()
+        for time, user, message in lines:
+            lines_per_day.setdefault(time.date(), []).append(f"{time.time().isoformat()}:{user}: {message}\n")
+        with self.__file_lock:
+            for day, day_lines in lines_per_day.items():
+                with open(self.log_path / f"chatlog_{day.isoformat()}.txt", "a+") as f:
+                    f.writelines(day_lines)
+            archive = ChatlogArchive.get_archive()
+            if archive is not None:
+                archive.insert_many((self.channel, user, time, message) for time, user, message in lines)
+
+    def __check_queue_depth(self) -> None:
+        if self.queue_depth > self.flush_size * 10:
+            if not self.__falling_behind:
+                log.warning(f"Chatlog writer for {self.log_path} is falling behind, {self.queue_depth} lines queued")
+            self.__falling_behind = True
+        else:
+            self.__falling_behind = False
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of lines that are not on disk yet"""
+        return len(self.__pending) + self.__in_flight
@@ -6,6 +6,8 @@ from typing import Optional, TYPE_CHECKING
 
 from chat_bot.custom_cog import CustomCog
 from data_types.command_file import CommandConfig
+from data_types.command_template import CommandTemplate
+from data_types.types_collection import ValidationException
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -14,33 +16,44 @@ log = logging.getLogger(__name__)
 
 
 class Command:
-    __builtin_commands = None
 
     def __init__(self, file_path: Path):
         log.info(f"Loading command {file_path.name}")
-        if self.__builtin_commands is None:
-            self.__builtin_commands = CustomCog.get_commands()
         self.__file_path: Path = file_path
 
         self.__command_config: dict = CommandConfig.load_command_file(file_path)
-        self.__is_custom: bool = self.name not in self.__builtin_commands
-
-    def get_message(self, message_type: Optional[str] = None) -> str:
-        if type(self.__command_config["output"]["message"]) is dict:
-            if message_type in self.__command_config["output"]["message"]:
-                return self.__get_message(self.__command_config["output"]["message"][message_type])
-            else:
-                log.warning(f"No message for '{message_type}' found")
-        else:
-            return self.__get_message(self.__command_config["output"]["message"])
-
-    def __get_message(self, message: Optional[str, list]) -> str:
-        if type(message) is str:
-            return message
-        if type(message) is list:
-            return self.__get_message_from_list(message)
-
-    def __get_message_from_list(self, message_list: list) -> str:
+        self.__is_custom: bool = self.name not in CustomCog.get_builtin_commands()
+        self.__templates: dict[Optional[str], list[CommandTemplate]] = self.__compile_templates()
+
+    def __compile_templates(self) -> dict[Optional[str], list[CommandTemplate]]:
+        """Parses every message once and checks that it only uses placeholders that can be filled"""
+        messages = self.__command_config["output"]["message"]
+        if type(messages) is not dict:
+            messages = {None: messages}
+        random_options = self.get_random() or {}
+        allowed_fields = {f"param{number}" for number in range(self.parameter_count)} | set(random_options.keys())
+        allowed_fields |= set(self.__command_config["fields"])
+        templates = {}
+        for message_type, message in messages.items():
+            if message is None:
+                continue
+            message_list = [message] if type(message) is str else message
+            if len(message_list) == 0 or any(type(entry) is not str for entry in message_list):
+                raise ValidationException(f"Message '{message_type}' has to be a string or a list of strings")
+            templates[message_type] = [CommandTemplate(entry) for entry in message_list]
+            for template in templates[message_type]:
+                template.validate(allowed_fields)
+        return templates
+
+    def get_template(self, message_type: Optional[str] = None) -> CommandTemplate:
+        """Returns the compiled message, raises KeyError if the command has no message of that type"""
+        if type(self.__command_config["output"]["message"]) is not dict:
+            message_type = None
+        if message_type not in self.__templates:
+            raise KeyError(message_type)
+        return self.__get_message_from_list(self.__templates[message_type])
+
+    def __get_message_from_list(self, message_list: list[CommandTemplate]) -> CommandTemplate:
         if self.__command_config["output"]["random"]:
             return message_list[randint(0, len(message_list) - 1)]
         else:
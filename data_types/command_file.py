@@ -4,9 +4,10 @@ import logging
 from typing import TYPE_CHECKING
 
 import yaml
-from schema import Schema, And, Or, Optional, SchemaError
+from schema import Schema, And, Or, Optional, Regex, SchemaError
 
 from data_types.types_collection import ValidationException
+from data_types.validated_config_cache import ValidatedConfigCache, load_yaml, schema_version
 from utils.string_and_dict_operations import clean_empty
 
 if TYPE_CHECKING:
@@ -19,29 +20,12 @@ class PerStreamConfigError(Exception):
     pass
 
 
-def create_random_dict() -> dict:
-    random_dict = {}
-    for i in range(0, 100):
-        random_dict[Optional("random"+str(i))] = And(list)
-    return random_dict
-
-
-def create_param_dict() -> dict:
-    param_dict = {}
-    for i in range(0, 100):
-        param_dict[Optional("param"+str(i))] = {
-                Optional('isRequired', default=False): And(bool),
-                Optional('useCallerNameIfEmpty', default=False): And(bool)
-        }
-    return param_dict
-
-
 class CommandConfig:
     __schema: Schema = Schema(
         {
             'name': And(str),
             Optional('aliases', default=[]): Or(str, list),
-            Optional('rights', default={'user': True}): {
+            Optional('rights', default={'broadcaster': False, 'moderator': False, 'user': True}): {
                 Optional('broadcaster', default=False): And(bool),
                 Optional('moderator', default=False): And(bool),
                 Optional('user', default=True): And(bool)
@@ -53,21 +37,46 @@ class CommandConfig:
                     Optional('offline', default=None): Or(str, list, None),
                     Optional('success', default=None): Or(str, list, None),
                     Optional('fail', default=None): Or(str, list, None),
-                    Optional('not_found', default=None): Or(str, list, None)
+                    Optional('not_found', default=None): Or(str, list, None),
+                    Optional('list', default=None): Or(str, list, None),
+                    Optional('clear', default=None): Or(str, list, None),
+                    Optional('timeout_usage', default=None): Or(str, list, None),
+                    Optional('running', default=None): Or(str, list, None),
+                    Optional('empty', default=None): Or(str, list, None),
+                    Optional('processing', default=None): Or(str, list, None),
+                    Optional('status', default=None): Or(str, list, None),
+                    Optional('not_running', default=None): Or(str, list, None),
+                    Optional('cancelled', default=None): Or(str, list, None),
+                    Optional('stopped', default=None): Or(str, list, None),
+                    Optional('finished', default=None): Or(str, list, None),
+                    Optional('finished_with_failures', default=None): Or(str, list, None)
                 }, str, list),
             },
             Optional('help', default=None): Or(str, None),
             Optional('parameter-count', default=0): And(int),
-            Optional("params"): create_param_dict(),
-            Optional('random'): create_random_dict()
+            # placeholders that a builtin command fills in itself
+            Optional('fields', default=[]): [str],
+            Optional("params"): {
+                Optional(Regex(r'^param(\d|[1-9]\d)$')): {
+                    Optional('isRequired', default=False): And(bool),
+                    Optional('useCallerNameIfEmpty', default=False): And(bool)
+                }
+            },
+            Optional('random'): {
+                Optional(Regex(r'^random(\d|[1-9]\d)$')): And(list)
+            }
         }
     )
+    __schema_version: str = schema_version(__file__)
 
     @classmethod
     def load_command_file(cls, command_file: Path) -> dict:
         log.info(f"Reading Command File {command_file.name}")
+        cache = ValidatedConfigCache.get_cache()
+        if cache is not None:
+            return cache.load(command_file, cls.validate, cls.__schema_version)
         with open(command_file, 'r') as file:
-            command_config = yaml.safe_load(file)
+            command_config = load_yaml(file.read())
         return cls.validate(command_config)
 
     @classmethod
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from data_types.command import Command
+
+log = logging.getLogger(__name__)
+
+
+class ResolvedCommand(NamedTuple):
+    command: Command
+    enabled: bool
+    user_command: bool
+    moderator_command: bool
+    broadcaster_command: bool
+
+
+class CommandTable:
+    """Maps every name and alias that can be used in a stream to its command, whether it is enabled and the rights
+    needed to use it. Commands of the stream take precedence over global commands with the same name."""
+
+    def __init__(self, stream_commands: dict[str, Command], global_commands: dict[str, Command], ignored_commands: list[str]) -> None:
+        ignored = set(ignored_commands)
+        self.__entries: dict[str, ResolvedCommand] = dict()
+        for commands in (global_commands, stream_commands):
+            for name, command in commands.items():
+                self.__entries[name] = ResolvedCommand(command, name not in ignored, command.user_command,
+                                                       command.moderator_command, command.broadcaster_command)
+
+    def resolve(self, name: str) -> Optional[ResolvedCommand]:
+        return self.__entries.get(name)
+
+    def names(self) -> set[str]:
+        return set(self.__entries.keys())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
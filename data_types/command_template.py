@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import logging
+import string
+from typing import Mapping
+
+from data_types.types_collection import ValidationException
+
+log = logging.getLogger(__name__)
+
+
+class CommandTemplate:
+    """A command message that was parsed once when the command was loaded.
+
+    It knows which placeholders it uses, so only the values for those have to be computed when it is rendered.
+    """
+    context_fields: frozenset[str] = frozenset({"user", "channel", "command"})
+    stream_fields: frozenset[str] = frozenset({"streamer", "title", "game", "uptime_hours", "uptime_minutes"})
+
+    def __init__(self, template: str) -> None:
+        self.template: str = template
+        fields = set()
+        try:
+            for _, field_name, _, _ in string.Formatter().parse(template):
+                if field_name is not None:
+                    # only the name matters, not attribute access or indexing like {param0[0]}
+                    name = field_name.split(".", 1)[0].split("[", 1)[0]
+                    if name == "" or name.isdigit():
+                        raise ValidationException(f"Positional placeholder '{{{field_name}}}' in message '{template}', use a name")
+                    fields.add(name)
+        except ValueError as e:
+            raise ValidationException(f"Message '{template}' is not a valid template: {e}")
+        self.fields: frozenset[str] = frozenset(fields)
+
+    def validate(self, allowed_fields: set[str] | frozenset[str]) -> None:
+        unknown = self.fields - allowed_fields - self.context_fields - self.stream_fields
+        if unknown:
+            raise ValidationException(f"Unknown placeholders {', '.join(sorted(unknown))} in message '{self.template}'")
+
+    def render(self, values: Mapping[str, str]) -> str:
+        return self.template.format_map(values)
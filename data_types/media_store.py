@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+class MediaStore:
+    """Process wide registry of the media files used by the overlays.
+
+    Files are addressed by the hash of their content, so the same file used by several streams is only
+    registered once and the url of a file changes whenever its content changes. Only the paths are kept,
+    the webserver serves the file from disk. The size and modification time of every path are checked
+    before it is used, a file that was edited in place is hashed again and moves to its new key.
+    Files are registered from worker threads while the webserver requests them, the registry is only changed under
+    a lock and files are hashed outside of it.
+    """
+    # key -> mimetype and every path registered with that content
+    __media: dict[str, tuple[str, list[Path]]] = dict()
+    # path -> key and (size, modification time) of the file when it was hashed
+    __paths: dict[Path, tuple[str, tuple[int, int]]] = dict()
+    __url_prefix: str = "/display/media/"
+    __lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def set_url_prefix(cls, url_prefix: str) -> None:
+        cls.__url_prefix = url_prefix
+
+    @staticmethod
+    def __signature(path: Path) -> Optional[tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    @classmethod
+    def add(cls, path: Path, mimetype: str) -> str:
+        """Registers the file and returns the key it can be requested by, the file is only hashed again if it changed"""
+        signature = cls.__signature(path)
+        with cls.__lock:
+            if path in cls.__paths and cls.__paths[path][1] == signature:
+                return cls.__paths[path][0]
+        content_hash = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(65536), b""):
+                content_hash.update(chunk)
+        key = content_hash.hexdigest()[:32] + path.suffix.lower()
+        with cls.__lock:
+            cls.__remove(path)
+            cls.__media.setdefault(key, (mimetype, []))[1].append(path)
+            cls.__paths[path] = (key, signature)
+        log.debug(f"Media {path} stored as {key}")
+        return key
+
+    @classmethod
+    def __remove(cls, path: Path) -> None:
+        """Has to be called with the lock held"""
+        if path not in cls.__paths:
+            return
+        key = cls.__paths.pop(path)[0]
+        paths = cls.__media[key][1]
+        paths.remove(path)
+        if not paths:
+            del cls.__media[key]
+
+    @classmethod
+    def get(cls, key: str) -> Optional[tuple[Path, str]]:
+        """Returns a path that still has the content of the key and the mimetype,
+        paths that changed or were removed are moved to their new key or dropped"""
+        with cls.__lock:
+            if key not in cls.__media:
+                return None
+            mimetype, paths = cls.__media[key]
+            registered = [(path, cls.__paths[path][1]) for path in paths]
+        for path, known_signature in registered:
+            signature = cls.__signature(path)
+            if signature == known_signature:
+                return path, mimetype
+            if signature is None:
+                with cls.__lock:
+                    cls.__remove(path)
+            elif cls.add(path, mimetype) == key:
+                # only the modification time changed, e.g. after touch
+                return path, mimetype
+        return None
+
+    @classmethod
+    def get_url(cls, key: str) -> str:
+        return cls.__url_prefix + key
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import base64
 import logging
 import mimetypes
 from typing import TYPE_CHECKING, Optional
 
+from data_types.media_store import MediaStore
 from data_types.types_collection import NotificationType
 
 if TYPE_CHECKING:
@@ -20,28 +20,30 @@ class NotificationResource:
     def __init__(self, notification_type: NotificationType) -> None:
         self.notification_type: NotificationType = notification_type
         self._message: Optional[str] = None
-        self._image: Optional[str] = None
+        self._image: Optional[Path] = None
         self._image_mime: Optional[str] = None
-        self._sound: Optional[str] = None
+        self._sound: Optional[Path] = None
         self._sound_mime: Optional[str] = None
 
     def has_message(self) -> bool:
         return self._message is not None
 
     def has_image(self) -> bool:
-        return self._image is not None
+        return self._image is not None and self._image.is_file()
 
     def has_sound(self) -> bool:
-        return self._sound is not None
+        return self._sound is not None and self._sound.is_file()
 
     def get_message(self) -> str:
         return self._message
 
     def get_image(self) -> tuple[str, str]:
-        return self._image, self._image_mime
+        """Returns the url of the image and its mimetype, the url changes if the file was edited"""
+        return MediaStore.get_url(MediaStore.add(self._image, self._image_mime)), self._image_mime
 
     def get_sound(self) -> tuple[str, str]:
-        return self._sound, self._sound_mime
+        """Returns the url of the sound and its mimetype, the url changes if the file was edited"""
+        return MediaStore.get_url(MediaStore.add(self._sound, self._sound_mime)), self._sound_mime
 
     def set_message(self, message: str) -> None:
         self._message = message
@@ -54,7 +56,8 @@ class NotificationResource:
             else:
                 image_mimetype = mimetypes.guess_type(image_path)[0]
             if image_mimetype:
-                self._image = base64.b64encode(open(image_path, 'rb').read()).decode('utf-8')
+                MediaStore.add(image_path, image_mimetype)
+                self._image = image_path
                 self._image_mime = image_mimetype
 
     def set_sound(self, sound_name, resource_path: Path) -> None:
@@ -64,5 +67,6 @@ class NotificationResource:
             sound_mimetype = mimetypes.guess_type(str(sound_path))[0]
             log.debug(f"Sound mimetype: {sound_mimetype}")
             if sound_mimetype:
-                self._sound = base64.b64encode(open(sound_path, 'rb').read()).decode('utf-8')
+                MediaStore.add(sound_path, sound_mimetype)
+                self._sound = sound_path
                 self._sound_mime = sound_mimetype
@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING
 import yaml
 from schema import Schema, And, Or, Optional, SchemaError
 
+from data_types.validated_config_cache import ValidatedConfigCache, load_yaml, schema_version
 from utils.string_and_dict_operations import clean_empty
 
 if TYPE_CHECKING:
@@ -36,6 +37,7 @@ class PerStreamConfig:
             'stream-overlays': {
                 'notifications': {
                     'cooldown': And(int),
+                    Optional('display-time', default=10): And(int),
                     Optional('block', default=[]): And(list),
                     'follow': {
                         'message': And(str),
@@ -53,12 +55,16 @@ class PerStreamConfig:
                     'include-command-output': And(bool),
                     'message-stays-for': And(int),
                     'message-refresh-rate': And(int),
-                    'max-number-of-messages': And(int)
+                    'max-number-of-messages': And(int),
+                    Optional('max-buffered-messages', default=200): And(int),
+                    Optional('max-buffered-bytes', default=262144): And(int)
                 }
             }
         }
     )
 
+    __schema_version: str = schema_version(__file__)
+
     __fallback = """
     sync-bans: False
 
@@ -87,15 +93,17 @@ class PerStreamConfig:
     @classmethod
     def load_config(cls, config_file: Path) -> dict:
         log.info("Reading Config")
-        with open(config_file, 'r') as file:
-            config = yaml.safe_load(file)
-
         try:
-            validated = cls.__schema.validate(config)
+            cache = ValidatedConfigCache.get_cache()
+            if cache is not None:
+                validated = cache.load(config_file, cls.__schema.validate, cls.__schema_version)
+            else:
+                with open(config_file, 'r') as file:
+                    validated = cls.__schema.validate(load_yaml(file.read()))
         except SchemaError as e:
             log.warning(f"Config file {config_file} invalid, using fallback configuration: {e}")
             try:
-                config = yaml.safe_load(cls.__fallback)
+                config = load_yaml(cls.__fallback)
                 validated = cls.__schema.validate(config)
             except SchemaError as e:
                 log.error(f"Fallback configuration invalid. This should not happen, contact developer: {e}")
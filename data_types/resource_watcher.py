@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import pathlib
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from data_types.stream import Stream
+
+log = logging.getLogger(__name__)
+
+
+class ResourceWatcher:
+    """Polls the config and the resources folder of a stream and reloads only the files that changed.
+
+    Scanning, reading and validating is done in a worker thread, the results are swapped into the stream on the
+    event loop. A change is only applied once the file was unchanged for one more poll, so files that are still
+    being written are not loaded half finished.
+    """
+    poll_interval: float = 1.0
+
+    def __init__(self, stream: Stream) -> None:
+        self.__stream: Stream = stream
+        self.__task: Optional[asyncio.Future] = None
+        self.__files: dict[Path, tuple[int, int]] = dict()
+        self.__pending: dict[Path, Optional[tuple[int, int]]] = dict()
+
+    def start(self) -> None:
+        if self.__task is None or self.__task.done():
+            log.debug(f"Starting resource watcher for {self.__stream.streamer}")
+            self.__task = asyncio.ensure_future(self.__run())
+
+    def stop(self) -> None:
+        if self.__task is not None:
+            log.debug(f"Stopping resource watcher for {self.__stream.streamer}")
+            self.__task.cancel()
+            self.__task = None
+
+    async def __run(self) -> None:
+        loop = asyncio.get_event_loop()
+        self.__files = await loop.run_in_executor(None, self.scan)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                files = await loop.run_in_executor(None, self.scan)
+                changed = self.__settled_changes(files)
+                if changed:
+                    await self.reload(changed)
+            except Exception as e:
+                log.error(f"Could not reload resources of {self.__stream.streamer}: {e}")
+
+    def scan(self) -> dict[Path, tuple[int, int]]:
+        """Returns the mtime and size of the config and of every file in the resources folder"""
+        files = dict()
+        config_file = self.__stream.paths["config"]
+        try:
+            stat = os.stat(config_file)
+            files[config_file] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        for directory, _, file_names in os.walk(self.__stream.paths["resources"]):
+            for file_name in file_names:
+                path = pathlib.Path(directory) / file_name
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def __settled_changes(self, files: dict[Path, tuple[int, int]]) -> set[Path]:
+        """Returns the files whose change was already seen in the previous poll and did not change since"""
+        settled = set()
+        candidates = set(self.__pending.keys())
+        candidates.update(path for path in self.__files.keys() | files.keys() if self.__files.get(path) != files.get(path))
+        for path in candidates:
+            state = files.get(path)
+            if path in self.__pending and self.__pending[path] == state:
+                settled.add(path)
+                del self.__pending[path]
+            elif self.__files.get(path) != state:
+                self.__pending[path] = state
+            else:
+                self.__pending.pop(path, None)
+        for path in settled:
+            if path in files:
+                self.__files[path] = files[path]
+            else:
+                self.__files.pop(path, None)
+        return settled
+
+    async def reload(self, changed: set[Path]) -> None:
+        stream = self.__stream
+        loop = asyncio.get_event_loop()
+        log.info(f"Reloading changed files of {stream.streamer}: {', '.join(sorted(path.name for path in changed))}")
+        chat_bot_was_enabled = stream.config['chat-bot']['enabled']
+        if stream.paths["config"] in changed:
+            config = await loop.run_in_executor(None, stream.read_config)
+            notifications = await loop.run_in_executor(None, stream.read_notifications, config)
+            stream.apply_config(config, notifications)
+        elif any(stream.uses_resource(path) for path in changed):
+            notifications = await loop.run_in_executor(None, stream.read_notifications, stream.config)
+            stream.apply_notifications(notifications)
+
+        if stream.config['chat-bot']['enabled'] != chat_bot_was_enabled:
+            command_files = await loop.run_in_executor(None, stream.read_command_files, stream.config)
+            stream.apply_command_files(command_files, replace=True)
+        else:
+            changed_commands = [path for path in changed if path.suffix == ".cmd"]
+            if not changed_commands:
+                return
+            command_files = await loop.run_in_executor(None, stream.read_command_files, stream.config, changed_commands)
+            stream.apply_command_files(command_files)
+        self.__register_commands()
+
+    def __register_commands(self) -> None:
+        from chat_bot import ChatBot
+        bot = ChatBot.get_bot()
+        if bot is not None:
+            cog = bot.get_cog("CustomCommands")
+            if cog is not None:
+                cog.load_custom_commands(self.__stream)
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import logging
-from typing import TYPE_CHECKING, Optional
+from collections import deque
+from typing import TYPE_CHECKING, Iterable, Optional
 
+from data_types.alert_scheduler import AlertScheduler
+from data_types.chat_buffer import ChatBuffer
 from data_types.chat_message import ChatMessage
+from data_types.chatlog_writer import ChatlogWriter
+from data_types.command_table import CommandTable
 from data_types.notification_resource import NotificationResource
 from data_types.per_stream_config import PerStreamConfig
+from data_types.resource_watcher import ResourceWatcher
+from data_types.stream_events import StreamEventHub
 from data_types.types_collection import NotificationType, ValidationException
 
 if TYPE_CHECKING:
@@ -15,6 +23,7 @@ if TYPE_CHECKING:
     from data_types.types_collection import EventSubType, PubSubType
     from aiohttp.web_ws import WebSocketResponse
     from twitch_api.twitch_user_api import TwitchUserAPI
+    from twitch_api.bulk_moderation import BulkModerationJob
     from data_types.command import Command
 
 log = logging.getLogger(__name__)
@@ -57,13 +66,22 @@ class Stream:
         self.config: dict = dict()
         self.__notifications: dict[NotificationType, NotificationResource] = dict()
         self.commands: dict[str, Command] = dict()
+        self.__command_files: dict[Path, Command] = dict()
+        self.__command_table: Optional[CommandTable] = None
 
-        self.__chat_messages: list[ChatMessage] = []
+        self.__chat_messages: ChatBuffer = ChatBuffer(200, 262144, 60)
+        self.chatlog_writer: Optional[ChatlogWriter] = None
+        self.__version: int = 0
+        self.chat_events: StreamEventHub = StreamEventHub()
+        self.alert_events: StreamEventHub = StreamEventHub()
+        self.alert_scheduler: AlertScheduler = AlertScheduler(self)
+        self.resource_watcher: ResourceWatcher = ResourceWatcher(self)
 
         self.__stream_start: Optional[datetime.datetime] = None
-        self.__current_cooldown: int = 0
-        self.queue: list[tuple[str, NotificationType]] = []
-        self.ban_queue: list[str] = []
+        self.queue: deque[tuple[str, NotificationType]] = deque()
+        # ordered set of the names to ban, only the keys are used
+        self.ban_queue: dict[str, None] = dict()
+        self.ban_queue_job: Optional[BulkModerationJob] = None
         self.active_callbacks: dict[EventSubType, str] = dict()
         self.active_pubsub_uuids: dict[PubSubType, UUID] = dict()
 
@@ -77,23 +95,107 @@ class Stream:
 
     def load_resources_and_settings(self) -> None:
         log.info(f"Loading Stream resources for {self.streamer}")
-
-        self.__notifications = {}
-
+        config = self.read_config()
+        self.apply_config(config, self.read_notifications(config))
+        self.apply_command_files(self.read_command_files(config), replace=True)
+
+    async def reload_resources_and_settings(self) -> None:
+        """Reads all files in a worker thread and swaps them in afterwards, so the event loop is not blocked"""
+        log.info(f"Reloading Stream resources for {self.streamer}")
+        loop = asyncio.get_event_loop()
+        config = await loop.run_in_executor(None, self.read_config)
+        notifications = await loop.run_in_executor(None, self.read_notifications, config)
+        command_files = await loop.run_in_executor(None, self.read_command_files, config)
+        self.apply_config(config, notifications)
+        self.apply_command_files(command_files, replace=True)
+
+    def read_config(self) -> dict:
+        """Reads the config of the stream, does not change the stream and can be called from any thread"""
         if self.paths["config"].is_file():
             log.debug(f"Config file found")
-            self.config = PerStreamConfig.load_config(self.paths["config"])
-        else:
-            log.debug(f"Using default stream config")
-            self.config = PerStreamConfig.load_config(self.paths["base"] / "default.yaml")
-
-        self.__setup_notifications()
+            return PerStreamConfig.load_config(self.paths["config"])
+        log.debug(f"Using default stream config")
+        return PerStreamConfig.load_config(self.paths["base"] / "default.yaml")
+
+    def read_notifications(self, config: dict) -> dict[NotificationType, NotificationResource]:
+        """Loads the notification resources for the config and registers their media in the MediaStore, which is
+        thread safe. Does not change the stream and can be called from any thread"""
+        notifications = config['stream-overlays']['notifications']
+        resources = dict()
+        for notification_type in NotificationType:
+            resources[notification_type] = NotificationResource(notification_type)
+            resources[notification_type].set_message(notifications[notification_type.value]['message'])
+            image_name = notifications[notification_type.value]['image']
+            if image_name:
+                resources[notification_type].set_image(image_name, self.paths["resources"])
+            sound_name = notifications[notification_type.value]['sound']
+            if sound_name:
+                resources[notification_type].set_sound(sound_name, self.paths["resources"])
+        return resources
 
-        if self.config['chat-bot']['enabled']:
-            if self.config['chat-bot']['save-chatlog']:
-                self.paths["chatlog"] = self.paths["stream"] / "logs"
-                self.paths["chatlog"].mkdir(parents=True, exist_ok=True)
-            self.__setup_commands()
+    def read_command_files(self, config: dict, command_files: Optional[Iterable[Path]] = None) -> dict[Path, Optional[Command]]:
+        """Loads the given command files or all command files of the stream, can be called from any thread.
+        Files that are invalid or don't exist anymore are mapped to None."""
+        from data_types.command import Command
+        if not config['chat-bot']['enabled']:
+            return dict()
+        if command_files is None:
+            command_files = self.paths["resources"].glob('**/*' + self.__command_suffix)
+        commands = dict()
+        for command_file in command_files:
+            commands[command_file] = None
+            if not command_file.is_file():
+                continue
+            try:
+                commands[command_file] = Command(command_file)
+            except ValidationException as e:
+                log.warning(f"Problem loading command {command_file.name}: {e}")
+        return commands
+
+    def apply_config(self, config: dict, notifications: dict[NotificationType, NotificationResource]) -> None:
+        self.config = config
+        self.__notifications = notifications
+
+        chat_config = self.config['stream-overlays']['chat']
+        self.__chat_messages.configure(chat_config['max-buffered-messages'], chat_config['max-buffered-bytes'], chat_config['message-stays-for'])
+
+        if self.config['chat-bot']['enabled'] and self.config['chat-bot']['save-chatlog']:
+            self.paths["chatlog"] = self.paths["stream"] / "logs"
+            self.paths["chatlog"].mkdir(parents=True, exist_ok=True)
+            if self.chatlog_writer is None:
+                self.chatlog_writer = ChatlogWriter(self.streamer, self.paths["chatlog"])
+        self.invalidate_command_table()
+        self.bump_version()
+
+    def apply_notifications(self, notifications: dict[NotificationType, NotificationResource]) -> None:
+        self.__notifications = notifications
+        self.bump_version()
+
+    def apply_command_files(self, command_files: dict[Path, Optional[Command]], replace: bool = False) -> None:
+        """Swaps in the commands of the given files, with replace all other command files are dropped"""
+        files = dict() if replace else dict(self.__command_files)
+        for command_file, command in command_files.items():
+            if command is None:
+                files.pop(command_file, None)
+            else:
+                files[command_file] = command
+        commands = dict()
+        for command in files.values():
+            for name in command.names:
+                commands[name] = command
+        self.__command_files = files
+        self.commands = commands
+        self.invalidate_command_table()
+
+    def uses_resource(self, resource_file: Path) -> bool:
+        """Whether the file is the image or sound of a notification"""
+        notifications = self.config['stream-overlays']['notifications']
+        for notification_type in NotificationType:
+            for key in ('image', 'sound'):
+                name = notifications[notification_type.value][key]
+                if name and self.paths["resources"] / name == resource_file:
+                    return True
+        return False
 
     def save_settings(self) -> None:
         log.info(f"Saving Stream settings for {self.streamer}")
@@ -106,29 +208,6 @@ class Stream:
     def set_twitch_user_api(self, twitch_api: TwitchUserAPI) -> None:
         self.__twitch_user_api = twitch_api
 
-    def __setup_notifications(self) -> None:
-        notifications = self.config['stream-overlays']['notifications']
-        for notification_type in NotificationType:
-            self.__notifications[notification_type] = NotificationResource(notification_type)
-            self.__notifications[notification_type].set_message(notifications[notification_type.value]['message'])
-            image_name = notifications[notification_type.value]['image']
-            if image_name:
-                self.__notifications[notification_type].set_image(image_name, self.paths["resources"])
-            sound_name = notifications[notification_type.value]['sound']
-            if sound_name:
-                self.__notifications[notification_type].set_sound(sound_name, self.paths["resources"])
-
-    def __setup_commands(self) -> None:
-        from data_types.command import Command
-        command_files = self.paths["resources"].glob('**/*' + self.__command_suffix)
-        for command_file in command_files:
-            try:
-                command = Command(command_file)
-                for name in command.names:
-                    self.commands[name] = command
-            except ValidationException as e:
-                log.warning(f"Problem loading command {command_file.name}: {e}")
-
     def stream_started(self, start: str) -> None:
         self.__is_streaming = True
         self.__stream_start = datetime.datetime.fromisoformat(start.replace('Z', ''))
@@ -157,28 +236,30 @@ class Stream:
 
     def add_to_queue(self, name: str, notification_type: NotificationType) -> None:
         for entry in self.config['stream-overlays']['notifications']['block']:
-            if entry in name and name not in self.ban_queue:
-                self.ban_queue.append(name)
+            if entry in name:
+                self.ban_queue[name] = None
+                break
         if name not in self.ban_queue:
             self.queue.append((name, notification_type))
+            self.bump_version()
+
+    def pop_from_queue(self) -> tuple[str, NotificationType]:
+        entry = self.queue.popleft()
+        self.bump_version()
+        return entry
 
     def get_alert_info(self, notification_type: NotificationType) -> NotificationResource:
         if notification_type in self.__notifications:
             return self.__notifications[notification_type]
 
-    def decrease_cooldown(self) -> None:
-        if self.__current_cooldown > 0:
-            self.__current_cooldown = self.__current_cooldown - 1
-
-    def reset_cooldown(self) -> None:
-        self.__current_cooldown = self.config['stream-overlays']['notifications']['cooldown']
-
     def write_into_chatlog(self, user: str, message: str) -> None:
-        if self.config['chat-bot']['save-chatlog']:
-            filename = self.paths["chatlog"] / f"chatlog_{datetime.datetime.now().date().isoformat()}.txt"
-            with open(filename, "a+") as f:
-                time = datetime.datetime.now().time().isoformat()
-                f.write(f"{time}:{user}: {message}\n")
+        if self.config['chat-bot']['save-chatlog'] and self.chatlog_writer is not None:
+            self.chatlog_writer.write(user, message)
+
+    def flush_chatlog(self) -> None:
+        """Writes everything that is still buffered for the chatlog, intended to be called on shutdown"""
+        if self.chatlog_writer is not None:
+            self.chatlog_writer.close()
 
     def add_chat_message(self, message: str, tags: dict[str, dict], is_bot_message: Optional[bool] = False) -> None:
         if is_bot_message:
@@ -186,34 +267,57 @@ class Stream:
                 tags['color'] = self.config['chat-bot']['bot-color']
             else:
                 return
-        self.__chat_messages.append(ChatMessage(message, self.config['stream-overlays']['chat']['message-stays-for'],
-                                                self.config['stream-overlays']['chat']['message-refresh-rate'], tags))
+        chat_message = ChatMessage(message, tags, self.user_id)
+        self.__chat_messages.append(chat_message)
+        self.bump_version()
+        if self.chat_events.has_subscribers:
+            self.chat_events.publish({"type": "add", "id": chat_message.message_id, "html": chat_message.chat_message})
 
     def remove_chat_message(self, message: ChatMessage) -> None:
-        """Completely removes the chat message from the list as if it was never there"""
+        """Completely removes the chat message from the buffer as if it was never there"""
         self.__chat_messages.remove(message)
+        self.bump_version()
+        self.chat_events.publish({"type": "delete", "ids": [message.message_id]})
 
-    def find_chat_message(self, message: str, user: str) -> ChatMessage | None:
-        """Finds the ChatMessage instance"""
-        for chat_message in self.__chat_messages:
-            if chat_message.user == user and chat_message.message == message:
-                return chat_message
-        return None
+    def prune_chat_messages(self) -> None:
+        """Drops expired chat messages from the buffer"""
+        if self.__chat_messages.prune() > 0:
+            self.bump_version()
+
+    def get_chat_messages(self, count: int = 0) -> list[ChatMessage]:
+        """Returns the newest `count` chat messages that have not expired yet, all of them if count is 0 or less"""
+        self.prune_chat_messages()
+        return self.__chat_messages.latest(count)
+
+    def find_chat_message(self, message_id: str) -> ChatMessage | None:
+        """Finds the ChatMessage instance by its twitch message id"""
+        return self.__chat_messages.get(message_id)
 
-    def delete_all_messages_by_user(self, user: str) -> None:
+    def delete_all_messages_by_user(self, user_id: str) -> None:
         """delete all messages written by user. Intended to delete messages on ban"""
-        for chat_message in self.__chat_messages:
-            if chat_message.user == user:
-                chat_message.delete()
+        chat_messages = self.__chat_messages.get_by_user(user_id)
+        for chat_message in chat_messages:
+            chat_message.delete()
+        self.bump_version()
+        if chat_messages:
+            self.chat_events.publish({"type": "delete", "ids": [chat_message.message_id for chat_message in chat_messages]})
 
-    def delete_chat_message(self, message: str, user: str) -> None:
+    def delete_chat_message(self, message_id: str) -> None:
         """Marks a chat message as deleted for display purposes. Intended to be called if a mod deletes a message"""
-        chat_message = self.find_chat_message(message, user)
+        chat_message = self.find_chat_message(message_id)
         if chat_message:
             chat_message.delete()
+            self.bump_version()
+            self.chat_events.publish({"type": "delete", "ids": [chat_message.message_id]})
 
     def clear_chat(self) -> None:
-        self.__chat_messages = []
+        self.__chat_messages.clear()
+        self.bump_version()
+        self.chat_events.publish({"type": "clear"})
+
+    def bump_version(self) -> None:
+        """Marks everything displayed for this stream as changed, overlays will be rendered again on the next request"""
+        self.__version += 1
 
     def set_beatsaber_websocket(self, websocket: WebSocketResponse) -> None:
         self._beatsaber_websocket = websocket
@@ -223,6 +327,18 @@ class Stream:
             return self.commands[command_name]
         return None
 
+    def invalidate_command_table(self) -> None:
+        """Has to be called whenever the commands or the ignored commands change, the table is rebuilt on next use"""
+        self.__command_table = None
+
+    @property
+    def command_table(self) -> CommandTable:
+        if self.__command_table is None:
+            from chat_bot.custom_cog import CustomCog
+            log.debug(f"Building command table for {self.streamer}")
+            self.__command_table = CommandTable(self.commands, CustomCog.global_commands, self.config['chat-bot']['ignore-commands'])
+        return self.__command_table
+
     def get_custom_commands(self) -> list[str]:
         return [x.name for x in self.commands.values() if x.is_custom_command]
 
@@ -231,8 +347,8 @@ class Stream:
         return self._beatsaber_websocket
 
     @property
-    def current_cooldown(self):
-        return self.__current_cooldown
+    def version(self) -> int:
+        return self.__version
 
     @property
     def title(self):
@@ -261,5 +377,5 @@ class Stream:
         return None
 
     @property
-    def chat_messages(self):
-        return self.__chat_messages
+    def chat_messages(self) -> list[ChatMessage]:
+        return self.get_chat_messages()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class StreamEventHub:
+    """Fans out events of a stream (e.g. new chat messages) to every connected overlay client.
+
+    Every client gets its own bounded queue. A client that falls behind gets its pending events replaced by
+    a single resync event, so it can start over from a snapshot instead of slowing down everyone else.
+    Events can be published from other threads (the EventSub callbacks run in their own thread),
+    they are always delivered on the event loop of the subscriber.
+    """
+    RESYNC: dict = {"type": "resync"}
+
+    def __init__(self, max_pending: int = 256) -> None:
+        self.__subscribers: dict[asyncio.Queue, asyncio.AbstractEventLoop] = dict()
+        self.__max_pending: int = max_pending
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.__max_pending)
+        self.__subscribers[queue] = asyncio.get_event_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.__subscribers.pop(queue, None)
+
+    def publish(self, event: dict) -> None:
+        try:
+            running_loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        for queue, loop in list(self.__subscribers.items()):
+            if loop is running_loop:
+                self.__deliver(queue, event)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(self.__deliver, queue, event)
+
+    def __deliver(self, queue: asyncio.Queue, event: dict) -> None:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            log.debug("Overlay client fell behind, requesting resync")
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self.RESYNC)
+
+    @property
+    def has_subscribers(self) -> bool:
+        return len(self.__subscribers) > 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self.__subscribers)
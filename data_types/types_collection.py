@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class ChatMessageType(Enum):
@@ -53,6 +53,7 @@ class EventSubType(Enum):
     USER_UPDATE = 37
     CHAT_CLEAR = 38
     CHAT_CLEAR_USER = 39
+    CHAT_MESSAGE_DELETE = 40
 
 
 class PubSubType(Enum):
@@ -63,6 +64,7 @@ class ModerationActionType(Enum):
     CLEAR = "clear"
     BAN = "ban"
     UNBAN = "unban"
+    DELETE = "delete"
 
 
 class BeatSaberMessageType(Enum):
@@ -85,6 +87,13 @@ class ChatBotModuleType(Enum):
     BEATSABER = "chat_bot.beatsaber_commands"
 
 
+class MessagePriority(IntEnum):
+    MODERATION = 0
+    COMMAND = 1
+    ANNOUNCEMENT = 2
+    RELAY = 3
+
+
 class InvalidDataException(Exception):
     pass
 
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+import yaml
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# libyaml is a lot faster than the pure Python loader, it is only missing if PyYAML was built without it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml(content: str | bytes) -> Any:
+    return yaml.load(content, Loader=YamlLoader)
+
+
+class ValidatedConfigCache:
+    """Keeps the validated content of config and command files, so unchanged files don't have to be parsed and
+    validated again, also across restarts.
+
+    An entry is used as long as the mtime and size of the file are unchanged. If they changed, the file is read
+    and its hash compared, so touching a file without changing it does not trigger a new validation. Entries
+    are also dropped when the schema they were validated with changes. Callers get their own copy of the result.
+    The cache file is JSON written by save(), results that JSON can't represent exactly are not cached.
+    """
+    __cache: Optional[ValidatedConfigCache] = None
+    __format_version: int = 2
+
+    @classmethod
+    def set_cache(cls, cache: ValidatedConfigCache) -> None:
+        cls.__cache = cache
+
+    @classmethod
+    def get_cache(cls) -> Optional[ValidatedConfigCache]:
+        return cls.__cache
+
+    def __init__(self, cache_file: Path) -> None:
+        self.cache_file: Path = cache_file
+        self.__lock: threading.Lock = threading.Lock()
+        # path -> (mtime_ns, size, content hash, schema version, validated content as JSON)
+        self.__entries: dict[str, tuple[int, int, str, str, str]] = dict()
+        self.__changed: bool = False
+        self.hits: int = 0
+        self.misses: int = 0
+        self.__read_cache_file()
+
+    def __read_cache_file(self) -> None:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as file:
+                content = json.load(file)
+            if content.get("version") == self.__format_version:
+                self.__entries = {key: (int(entry[0]), int(entry[1]), str(entry[2]), str(entry[3]), str(entry[4]))
+                                  for key, entry in content["entries"].items()}
+                log.debug(f"Loaded {len(self.__entries)} validated config files from {self.cache_file}")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError, KeyError, TypeError, IndexError) as e:
+            log.warning(f"Could not read config cache {self.cache_file}, starting empty: {e}")
+
+    def load(self, file_path: Path, validate: Callable[[Any], dict], schema_version: str) -> dict:
+        """Returns the validated content of the file, exceptions raised by validate are passed on and not cached"""
+        key = str(file_path.resolve())
+        stat = os.stat(key)
+        with self.__lock:
+            entry = self.__entries.get(key)
+        if entry is not None and entry[3] == schema_version and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            self.hits += 1
+            return json.loads(entry[4])
+
+        with open(key, "rb") as file:
+            content = file.read()
+        digest = hashlib.sha256(content).hexdigest()
+        if entry is not None and entry[3] == schema_version and entry[2] == digest:
+            self.hits += 1
+            with self.__lock:
+                self.__entries[key] = (stat.st_mtime_ns, stat.st_size, digest, schema_version, entry[4])
+                self.__changed = True
+            return json.loads(entry[4])
+
+        self.misses += 1
+        validated = validate(load_yaml(content))
+        try:
+            encoded = json.dumps(validated)
+        except (TypeError, ValueError):
+            encoded = None
+        if encoded is None or json.loads(encoded) != validated:
+            # e.g. dates or tuples in the file, they would come back as strings or lists
+            log.debug(f"{file_path} is not cached, its content can't be stored as JSON")
+            return validated
+        with self.__lock:
+            self.__entries[key] = (stat.st_mtime_ns, stat.st_size, digest, schema_version, encoded)
+            self.__changed = True
+        return validated
+
+    def save(self) -> None:
+        """Writes the cache file if entries changed, entries of files that no longer exist are dropped"""
+        with self.__lock:
+            if not self.__changed:
+                return
+            self.__entries = {key: entry for key, entry in self.__entries.items() if os.path.exists(key)}
+            content = json.dumps({"version": self.__format_version, "entries": self.__entries}, separators=(",", ":"))
+            self.__changed = False
+        temporary_file = self.cache_file.with_name(self.cache_file.name + ".tmp")
+        try:
+            with open(temporary_file, "w", encoding="utf-8") as file:
+                file.write(content)
+            os.replace(temporary_file, self.cache_file)
+            log.debug(f"Saved {len(self.__entries)} validated config files to {self.cache_file}")
+        except OSError as e:
+            log.warning(f"Could not write config cache {self.cache_file}: {e}")
+
+
+def schema_version(module_file: str) -> str:
+    """Fingerprint of the module that defines a schema, entries validated by an older version of it are not used"""
+    with open(module_file, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
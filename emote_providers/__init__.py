@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Optional
+
+import aiohttp
+
+from data_types.chat_message import ChatMessage
+from data_types.stream import Stream
+from emote_providers.providers import EmoteProvider, EmoteProviderError, FileEmoteProvider, emote_providers
+
+if TYPE_CHECKING:
+    from configparser import SectionProxy
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+class ThirdPartyEmotes:
+    """Loads the emotes of the third party providers into ChatMessage.
+
+    The emotes of every provider are kept separately, so a provider that can't be reached keeps its last emotes.
+    Earlier providers win if two providers have an emote with the same name and the emotes of a channel win over
+    the global ones. The emotes are stored in a snapshot on disk that is loaded at startup and refreshed every ttl
+    seconds.
+    """
+    __third_party_emotes: Optional[ThirdPartyEmotes] = None
+    snapshot_version: int = 1
+    ttl: float = 60 * 60
+    retry_interval: float = 60.0
+
+    @classmethod
+    def set_third_party_emotes(cls, third_party_emotes: ThirdPartyEmotes) -> None:
+        cls.__third_party_emotes = third_party_emotes
+
+    @classmethod
+    def get_third_party_emotes(cls) -> Optional[ThirdPartyEmotes]:
+        return cls.__third_party_emotes
+
+    @classmethod
+    def from_config(cls, section: SectionProxy, base_path: Path) -> ThirdPartyEmotes:
+        """Creates the providers listed in the providers option, <provider>_url overrides the endpoint of a provider
+        and file adds the emotes of a json file relative to the base folder"""
+        providers: list[EmoteProvider] = []
+        for name in section.get("providers", "").split():
+            if name.lower() not in emote_providers:
+                log.warning(f"Unknown emote provider {name}, known are {', '.join(emote_providers)}")
+                continue
+            providers.append(emote_providers[name.lower()](section.get(f"{name.lower()}_url")))
+        if section.get("file"):
+            providers.insert(0, FileEmoteProvider(base_path / section["file"]))
+        return cls(providers, base_path / "third_party_emotes.json")
+
+    def __init__(self, providers: list[EmoteProvider], snapshot_path: Path) -> None:
+        self.__providers: list[EmoteProvider] = providers
+        self.__path: Path = snapshot_path
+        # provider name -> emote name -> url
+        self.__global_emotes: dict[str, dict[str, str]] = {}
+        # channel id -> provider name -> emote name -> url
+        self.__channel_emotes: dict[str, dict[str, dict[str, str]]] = {}
+        self.__fetched_at: float = 0.0
+        self.__task: Optional[asyncio.Future] = None
+
+    def load(self) -> bool:
+        """Loads the snapshot into ChatMessage, returns False if there is no usable snapshot"""
+        try:
+            snapshot = json.loads(self.__path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not read the third party emote snapshot {self.__path}: {e}")
+            return False
+        if snapshot.get("version") != self.snapshot_version:
+            return False
+        self.__global_emotes = snapshot["global"]
+        self.__channel_emotes = snapshot["channels"]
+        self.__fetched_at = snapshot["fetched_at"]
+        self.__apply()
+        return True
+
+    async def refresh(self) -> None:
+        """Requests the global and channel emotes of every provider concurrently"""
+        streams = Stream.get_streams()
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*(self.__refresh_global(session, provider) for provider in self.__providers),
+                                 *(self.__refresh_channel(session, provider, stream) for provider in self.__providers for stream in streams))
+        self.__fetched_at = time.time()
+        self.__apply()
+        self.save()
+
+    async def __refresh_global(self, session: aiohttp.ClientSession, provider: EmoteProvider) -> None:
+        try:
+            self.__global_emotes[provider.name] = await provider.get_global_emotes(session)
+        except EmoteProviderError as e:
+            log.warning(f"Could not retrieve the global {provider.name} emotes: {e}")
+        except (KeyError, TypeError, AttributeError) as e:
+            log.warning(f"Unexpected response for the global {provider.name} emotes: {e!r}")
+
+    async def __refresh_channel(self, session: aiohttp.ClientSession, provider: EmoteProvider, stream: Stream) -> None:
+        try:
+            self.__channel_emotes.setdefault(stream.user_id, {})[provider.name] = await provider.get_channel_emotes(session, stream)
+        except EmoteProviderError as e:
+            log.warning(f"Could not retrieve the {provider.name} emotes of {stream.streamer}: {e}")
+        except (KeyError, TypeError, AttributeError) as e:
+            log.warning(f"Unexpected response for the {provider.name} emotes of {stream.streamer}: {e!r}")
+
+    def __merge(self, emotes_by_provider: dict[str, dict[str, str]]) -> dict[str, str]:
+        merged = {}
+        for provider in reversed(self.__providers):
+            merged.update(emotes_by_provider.get(provider.name, {}))
+        return merged
+
+    def __apply(self) -> None:
+        global_emotes = self.__merge(self.__global_emotes)
+        channel_emotes = {channel_id: self.__merge(emotes) for channel_id, emotes in self.__channel_emotes.items()}
+        ChatMessage.set_third_party_emotes(global_emotes, channel_emotes)
+        log.info(f"{len(global_emotes)} global third party emotes, {sum(len(emotes) for emotes in channel_emotes.values())} "
+                 f"in {len(channel_emotes)} channels")
+
+    def save(self) -> None:
+        snapshot = {"version": self.snapshot_version, "fetched_at": self.__fetched_at, "global": self.__global_emotes, "channels": self.__channel_emotes}
+        temporary_path = self.__path.with_name(self.__path.name + ".tmp")
+        try:
+            temporary_path.write_text(json.dumps(snapshot, separators=(",", ":")), encoding="utf-8")
+            os.replace(temporary_path, self.__path)
+        except OSError as e:
+            log.warning(f"Could not write the third party emote snapshot {self.__path}: {e}")
+
+    def start(self) -> None:
+        """Refreshes the emotes periodically, right away if the snapshot is missing streams"""
+        if any(stream.user_id not in self.__channel_emotes for stream in Stream.get_streams()):
+            self.__fetched_at = 0.0
+        if self.__task is None or self.__task.done():
+            self.__task = asyncio.ensure_future(self.__refresh_periodically())
+
+    def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+
+    async def __refresh_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(max(0.0, self.__fetched_at + self.ttl - time.time()))
+            try:
+                await self.refresh()
+            except Exception as e:
+                # the emotes have to be refreshed again later, a failed refresh must not end the task
+                log.exception(f"Error while refreshing the third party emotes: {e}")
+                await asyncio.sleep(self.retry_interval)
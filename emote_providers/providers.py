@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Optional
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from data_types.stream import Stream
+
+log = logging.getLogger(__name__)
+
+
+class EmoteProviderError(Exception):
+    pass
+
+
+class EmoteProvider(ABC):
+    """A source of third party emotes, the emote sets are returned as emote name -> 1x url"""
+    name: str = ""
+    default_base_url: str = ""
+    timeout: float = 10.0
+
+    def __init__(self, base_url: Optional[str] = None) -> None:
+        self.base_url: str = (base_url or self.default_base_url).rstrip("/") + "/"
+
+    @abstractmethod
+    async def get_global_emotes(self, session: aiohttp.ClientSession) -> dict[str, str]:
+        pass
+
+    @abstractmethod
+    async def get_channel_emotes(self, session: aiohttp.ClientSession, stream: Stream) -> dict[str, str]:
+        pass
+
+    async def _get_json(self, session: aiohttp.ClientSession, path: str) -> Optional[dict]:
+        """Returns the decoded response, None if the provider does not know the channel"""
+        try:
+            async with session.get(self.base_url + path, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status == 404:
+                    return None
+                if response.status >= 400:
+                    raise EmoteProviderError(f"{self.name} {path} failed with {response.status}")
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            raise EmoteProviderError(f"{self.name} {path} failed: {e!r}")
+
+
+class BTTVEmoteProvider(EmoteProvider):
+    name = "bttv"
+    default_base_url = "https://api.betterttv.net/3/"
+    cdn_url: str = "https://cdn.betterttv.net/emote/"
+
+    def __emotes(self, emotes: list[dict]) -> dict[str, str]:
+        return {emote["code"]: f"{self.cdn_url}{emote['id']}/1x" for emote in emotes}
+
+    async def get_global_emotes(self, session: aiohttp.ClientSession) -> dict[str, str]:
+        return self.__emotes(await self._get_json(session, "cached/emotes/global") or [])
+
+    async def get_channel_emotes(self, session: aiohttp.ClientSession, stream: Stream) -> dict[str, str]:
+        user = await self._get_json(session, f"cached/users/twitch/{stream.user_id}") or {}
+        return self.__emotes(user.get("channelEmotes", []) + user.get("sharedEmotes", []))
+
+
+class FFZEmoteProvider(EmoteProvider):
+    name = "ffz"
+    default_base_url = "https://api.frankerfacez.com/v1/"
+
+    @staticmethod
+    def __emotes(sets: dict, set_ids: list) -> dict[str, str]:
+        emotes = {}
+        for set_id in set_ids:
+            for emote in sets.get(str(set_id), {}).get("emoticons", []):
+                url = emote["urls"]["1"]
+                emotes[emote["name"]] = f"https:{url}" if url.startswith("//") else url
+        return emotes
+
+    async def get_global_emotes(self, session: aiohttp.ClientSession) -> dict[str, str]:
+        response = await self._get_json(session, "set/global") or {}
+        return self.__emotes(response.get("sets", {}), response.get("default_sets", []))
+
+    async def get_channel_emotes(self, session: aiohttp.ClientSession, stream: Stream) -> dict[str, str]:
+        response = await self._get_json(session, f"room/id/{stream.user_id}") or {}
+        return self.__emotes(response.get("sets", {}), [response.get("room", {}).get("set")])
+
+
+class SevenTVEmoteProvider(EmoteProvider):
+    name = "7tv"
+    default_base_url = "https://7tv.io/v3/"
+
+    @staticmethod
+    def __emotes(emotes: list[dict]) -> dict[str, str]:
+        urls = {}
+        for emote in emotes:
+            host = emote["data"]["host"]["url"]
+            urls[emote["name"]] = f"https:{host}/1x.webp" if host.startswith("//") else f"{host}/1x.webp"
+        return urls
+
+    async def get_global_emotes(self, session: aiohttp.ClientSession) -> dict[str, str]:
+        return self.__emotes((await self._get_json(session, "emote-sets/global") or {}).get("emotes", []))
+
+    async def get_channel_emotes(self, session: aiohttp.ClientSession, stream: Stream) -> dict[str, str]:
+        user = await self._get_json(session, f"users/twitch/{stream.user_id}") or {}
+        return self.__emotes((user.get("emote_set") or {}).get("emotes", []))
+
+
+class FileEmoteProvider(EmoteProvider):
+    """Emotes from a local json file like {"global": {name: url}, "channels": {login: {name: url}}}"""
+    name = "file"
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path.as_uri())
+        self.__path: Path = path
+
+    def __read(self) -> dict:
+        try:
+            return json.loads(self.__path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise EmoteProviderError(f"Could not read {self.__path}: {e}")
+
+    async def get_global_emotes(self, session: aiohttp.ClientSession) -> dict[str, str]:
+        return self.__read().get("global", {})
+
+    async def get_channel_emotes(self, session: aiohttp.ClientSession, stream: Stream) -> dict[str, str]:
+        return self.__read().get("channels", {}).get(stream.streamer.lower(), {})
+
+
+# name in the providers option of the [EMOTES] section -> provider
+emote_providers: dict[str, type[EmoteProvider]] = {
+    BTTVEmoteProvider.name: BTTVEmoteProvider,
+    FFZEmoteProvider.name: FFZEmoteProvider,
+    SevenTVEmoteProvider.name: SevenTVEmoteProvider,
+}
@@ -10,6 +10,6 @@ setuptools.setup(
     python_requires='>=3.7, <3.9',
     install_requires=["twitchAPI", "twitchio", "PyYAML", "schema", "simplematch"],
     package_data={
-        '': ['streams/default.yaml', 'chat_bot/commands/*.cmd'],
+        '': ['streams/default.yaml', 'chat_bot/commands/*.cmd', 'webserver/static/*'],
     }
 )
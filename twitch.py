@@ -10,9 +10,16 @@ from typing import TYPE_CHECKING
 from beatsaber_request_websocket import BeatSaberIntegration
 from chat_bot import ChatBot
 from data_types.chat_message import ChatMessage
+from data_types.chatlog_archive import ChatlogArchive
+from data_types.stream import Stream
 from data_types.types_collection import ChatBotModuleType
 from data_types.twitch_bot_config import TwitchBotConfig
+from data_types.validated_config_cache import ValidatedConfigCache
+from emote_providers import ThirdPartyEmotes
 from twitch_api import TwitchAPI, AuthScope
+from twitch_api.ban_sync import BanSync
+from twitch_api.chat_asset_cache import ChatAssetCache
+from utils.startup_timer import StartupTimer
 from webserver import Webserver
 from aenum import extend_enum
 
@@ -43,23 +50,36 @@ def startup():
     beatsaber_exclusive = config.has_section('BEATSABER') and config['BEATSABER'].getboolean("EXCLUSIVE")
 
     base_path = pathlib.Path(__file__).resolve().parent / config['GENERAL']['BASE_FOLDER_NAME']
+    ValidatedConfigCache.set_cache(ValidatedConfigCache(base_path / ".config_cache"))
 
-    TwitchAPI.set_twitch_api(TwitchAPI(config['APP']['CLIENT_ID'], config['APP']['CLIENT_SECRET'], config['USER']['refresh_token'], config['GENERAL']['MONITOR_STREAMS'].split(" "), base_path))
-    if not beatsaber_exclusive:
-        TwitchAPI.get_twitch_api().setup_event_subs(config['GENERAL']['TWITCH_CALLBACK_URL'], config['GENERAL'].getint('TWITCH_CALLBACK_PORT'))
-        # TwitchAPI.get_twitch_api().setup_pubsub(TwitchAPI.get_twitch_api().get_user_id_by_name(config['BOT']['NICK']))
-        ChatMessage.set_global_emotes(TwitchAPI.get_twitch_api().get_global_chat_emotes())
-        ChatMessage.set_global_badges(TwitchAPI.get_twitch_api().get_global_chat_badges())
-    else:
-        ChatMessage.set_global_emotes({})
-        ChatMessage.set_global_badges({})
+    if config.has_section('ARCHIVE') and config['ARCHIVE'].getboolean("ENABLED"):
+        log.info("Opening chatlog archive")
+        ChatlogArchive.set_archive(ChatlogArchive(base_path / config['ARCHIVE'].get("PATH", "chatlog_archive.sqlite")))
+
+    timer = StartupTimer()
+    with timer.phase("authentication"):
+        TwitchAPI.set_twitch_api(TwitchAPI(config['APP']['CLIENT_ID'], config['APP']['CLIENT_SECRET'], config['USER']['refresh_token'], config['GENERAL']['MONITOR_STREAMS'].split(" "), base_path,
+                                           helix_url=config['APP'].get('HELIX_URL')))
+    asyncio.get_event_loop().run_until_complete(collect_twitch_data(timer, beatsaber_exclusive, base_path))
+    BanSync.set_ban_sync(BanSync(TwitchAPI.get_twitch_api(), base_path / "ban_ledger.sqlite", TwitchAPI.get_twitch_api().moderation_rate_limit))
+
+    if config.has_section('EMOTES') and not beatsaber_exclusive:
+        log.info("Loading third party emotes")
+        ThirdPartyEmotes.set_third_party_emotes(ThirdPartyEmotes.from_config(config['EMOTES'], base_path))
+        ThirdPartyEmotes.get_third_party_emotes().load()
+        ThirdPartyEmotes.get_third_party_emotes().start()
 
     log.info("Setting up bot")
-    ChatBot.set_bot(ChatBot(config['BOT']['NICK'], config['BOT']['CHAT_OAUTH']))
+    with timer.phase("chat bot"):
+        ChatBot.set_bot(ChatBot(config['BOT']['NICK'], config['BOT']['CHAT_OAUTH'],
+                                channels_per_connection=config['BOT'].getint('CHANNELS_PER_CONNECTION', fallback=50)))
     # asyncio.ensure_future(_bot.start())
     asyncio.ensure_future(ChatBot.get_bot().start_chat_bot())
 
     if not beatsaber_exclusive:
+        # the subscriptions wait for the confirmation of twitch, so they don't hold back joining the chats
+        asyncio.ensure_future(setup_event_subs(timer, config['GENERAL']['TWITCH_CALLBACK_URL'], config['GENERAL'].getint('TWITCH_CALLBACK_PORT')))
+        # TwitchAPI.get_twitch_api().setup_pubsub(TwitchAPI.get_twitch_api().get_user_id_by_name(config['BOT']['NICK']))
         log.info("Setup Webserver")
         Webserver.set_webserver(Webserver())
         asyncio.ensure_future(Webserver.get_webserver().start_webserver(config['WEBSERVER']['BIND_IP'], config['WEBSERVER'].getint('BIND_PORT')))
@@ -73,11 +93,43 @@ def startup():
             ChatBot.get_bot().unload_all_modules()
         ChatBot.get_bot().load_module_by_type(ChatBotModuleType.BEATSABER)
 
+    for stream in Stream.get_streams():
+        stream.resource_watcher.start()
+    ValidatedConfigCache.get_cache().save()
     log.info("Finished Setup")
+    timer.report()
+
+
+async def collect_twitch_data(timer: StartupTimer, beatsaber_exclusive: bool, base_path: pathlib.Path) -> None:
+    """Creates the streams while the global emotes and badges are retrieved, if there is no snapshot of them yet"""
+    twitch_api = TwitchAPI.get_twitch_api()
+    if beatsaber_exclusive:
+        await timer.measure("streams and users", twitch_api.collect_stream_info())
+        ChatMessage.set_global_emotes({})
+        ChatMessage.set_global_badges({})
+        return
+    ChatAssetCache.set_chat_asset_cache(ChatAssetCache(twitch_api, base_path / "chat_assets.json"))
+    if ChatAssetCache.get_chat_asset_cache().load():
+        await timer.measure("streams and users", twitch_api.collect_stream_info())
+    else:
+        await asyncio.gather(timer.measure("streams and users", twitch_api.collect_stream_info()),
+                             timer.measure("emotes and badges", ChatAssetCache.get_chat_asset_cache().refresh(include_streams=False)))
+    # retrieves the emotes and badges of the streams and refreshes the snapshot in the background once it is too old
+    ChatAssetCache.get_chat_asset_cache().start()
+
+
+async def setup_event_subs(timer: StartupTimer, callback_url: str, callback_port: int) -> None:
+    await timer.measure("eventsub subscriptions", TwitchAPI.get_twitch_api().setup_event_subs(callback_url, callback_port))
+    log.info(f"EventSub subscriptions finished after {timer.phases['eventsub subscriptions']:.2f}s")
 
 
 def exit_handler(signal_number: int, _: FrameType):
     log.info(f"Exiting ({signal_to_name[signal_number]})")
+    for stream in Stream.get_streams():
+        stream.resource_watcher.stop()
+        stream.flush_chatlog()
+    if ValidatedConfigCache.get_cache():
+        ValidatedConfigCache.get_cache().save()
     if Webserver.get_webserver():
         log.debug("Trying to stop Webserver")
         asyncio.ensure_future(Webserver.get_webserver().stop_webserver())
@@ -86,6 +138,12 @@ def exit_handler(signal_number: int, _: FrameType):
         asyncio.ensure_future(ChatBot.get_bot().stop_chat_bot())
     if TwitchAPI.get_twitch_api():
         TwitchAPI.get_twitch_api().stop_twitch_api()
+    if BanSync.get_ban_sync():
+        BanSync.get_ban_sync().close()
+    if ChatAssetCache.get_chat_asset_cache():
+        ChatAssetCache.get_chat_asset_cache().stop()
+    if ThirdPartyEmotes.get_third_party_emotes():
+        ThirdPartyEmotes.get_third_party_emotes().stop()
     if BeatSaberIntegration.get_beatsaber():
         asyncio.ensure_future(BeatSaberIntegration.get_beatsaber().stop_beatsaber_integration())
 
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING, Optional
 
 from twitchAPI import Twitch, AuthScope, EventSub, EventSubSubscriptionError, PubSub, TwitchAuthorizationException, \
@@ -11,7 +14,10 @@ from data_types.stream import Stream
 from data_types.twitch_bot_config import TwitchBotConfig
 from data_types.types_collection import EventSubType, PubSubType
 from twitch_api.event_sub_callbacks import EventSubCallbacks
+from twitch_api.helix_client import HelixClient, HelixError
 from twitch_api.pubsub_callbacks import PubSubCallbacks
+from utils.lru_cache import LRUCache
+from utils.token_bucket import TokenBucket
 
 if TYPE_CHECKING:
     from pathlib import Path
@@ -28,6 +34,7 @@ log = logging.getLogger(__name__)
 
 class TwitchAPI:
     __twitch_api: Optional[TwitchAPI] = None
+    event_sub_workers: int = 8
 
     @classmethod
     def set_twitch_api(cls, twitch_api: TwitchAPI):
@@ -45,7 +52,8 @@ class TwitchAPI:
             TwitchBotConfig.get_config()['USER']['REFRESH_TOKEN'] = refresh_token
 
     def __init__(self, client_id: str, client_secret: str, refresh_token: str, monitored_streams: list[str],
-                 base_path: Path, user_auth_scope: Optional[list[AuthScope]] = None, app_auth_scope: Optional[list[AuthScope]] = None) -> None:
+                 base_path: Path, user_auth_scope: Optional[list[AuthScope]] = None, app_auth_scope: Optional[list[AuthScope]] = None,
+                 helix_url: Optional[str] = None) -> None:
         log.debug("Twitch API Object created")
 
         if user_auth_scope is None:
@@ -64,8 +72,13 @@ class TwitchAPI:
         self._event_sub_hook: Optional[EventSub] = None
         self._pubsub: Optional[PubSub] = None
         self._bot_id: Optional[str] = None
+        self._helix_url: Optional[str] = helix_url
         self.authenticate()
-        self.collect_stream_info()
+        self._helix: HelixClient = HelixClient(self._client_id, self._twitch.get_user_auth_token, self._twitch.refresh_used_token, helix_url)
+        # Helix allows 800 requests per minute for a token, bans and timeouts of all features share this bucket
+        self.moderation_rate_limit: TokenBucket = TokenBucket(800 / 60, 800)
+        # login -> user id, logins can be renamed so the ids are looked up again after an hour
+        self.__user_ids: LRUCache[str, str] = LRUCache(10000, ttl=60 * 60)
 
     def authenticate(self) -> None:
         log.info("Authentication started")
@@ -94,109 +107,180 @@ class TwitchAPI:
             self._twitch.set_user_authentication(self._token, self._user_auth_scope, self._refresh_token)
             TwitchAPI.user_refresh(self._token, self._refresh_token)
 
-    def collect_stream_info(self) -> None:
+    async def collect_stream_info(self) -> None:
+        """Creates the monitored streams and resolves the user id of the bot.
+
+        The users and the live streams are looked up concurrently in batches of 100 logins, the authentications for
+        the channel edit commands run in parallel in the executor.
+        """
         log.info("Collecting User Info and Stream Data for monitored streams")
         from twitch_api.twitch_user_api import TwitchUserAPI
 
-        stream_info = self._twitch.get_streams(user_login=self._monitored_streams)
+        monitored = list(dict.fromkeys(login.lower() for login in self._monitored_streams if login))
+        bot_login = TwitchBotConfig.get_config()['BOT']['NICK'].lower()
+        users, live_streams = await asyncio.gather(self.__get_batched("users", "login", monitored + [bot_login]),
+                                                   self.__get_batched("streams", "user_login", monitored, {"first": 100}))
+        users = {info['login']: info for info in users}
+        for login, info in users.items():
+            self.__user_ids.put(login, info['id'])
+        live_streams = {info['user_login']: info for info in live_streams}
+        self._bot_id = users[bot_login]['id']
 
-        for info in stream_info['data']:
-            stream = Stream(info['user_name'], info['id'], self._base_path)
-            stream.stream_started(info['started_at'])
-            stream.stream_info_changed(info['title'], info['game_name'], info['is_mature'], info['language'])
+        channel_edit_streams = []
+        for login in monitored:
+            if login not in users:
+                log.warning(f"Monitored stream {login} does not exist")
+                continue
+            stream = Stream(users[login]['display_name'], users[login]['id'], self._base_path)
+            if login in live_streams:
+                info = live_streams[login]
+                stream.stream_started(info['started_at'])
+                stream.stream_info_changed(info['title'], info['game_name'], info['is_mature'], info['language'])
             Stream.add_stream(stream)
             if stream.config["chat-bot"]["enable-channel-edit-commands"]:
-                stream.set_twitch_user_api(TwitchUserAPI(self._client_id, self._client_secret, stream.streamer))
+                channel_edit_streams.append(stream)
+
+        loop = asyncio.get_running_loop()
+        user_apis = await asyncio.gather(*(loop.run_in_executor(None, functools.partial(TwitchUserAPI, self._client_id, self._client_secret, stream.streamer,
+                                                                                        helix_url=self._helix_url, loop=loop))
+                                           for stream in channel_edit_streams))
+        for stream, user_api in zip(channel_edit_streams, user_apis):
+            stream.set_twitch_user_api(user_api)
 
-        user_info = self._twitch.get_users(logins=self._monitored_streams)
-        for info in user_info['data']:
-            stream = Stream.get_stream(info['display_name'])
-            if stream is None:
-                stream = Stream(info['display_name'], info['id'], self._base_path)
-                Stream.add_stream(stream)
-                if stream.config["chat-bot"]["enable-channel-edit-commands"]:
-                    stream.set_twitch_user_api(TwitchUserAPI(self._client_id, self._client_secret, stream.streamer))
+    async def __get_batched(self, endpoint: str, key: str, logins: list[str], params: Optional[dict] = None) -> list[dict]:
+        """Helix accepts 100 logins per request, the batches are requested concurrently"""
+        batches = [logins[start:start + 100] for start in range(0, len(logins), 100)]
+        responses = await asyncio.gather(*(self._helix.get(endpoint, {key: batch, **(params or {})}) for batch in batches))
+        return [info for response in responses for info in response["data"]]
+
+    async def request_ban(self, channel_id: str, user_id: str, reason: str, duration: int = None) -> None:
+        """Bans the user in the channel as the bot, raises HelixError if it failed"""
+        body = {"data": {"user_id": user_id, "reason": reason}}
+        if duration is not None:
+            body["data"]["duration"] = duration
+        try:
+            await self._helix.post("moderation/bans", {"broadcaster_id": channel_id, "moderator_id": self._bot_id}, body)
+        except HelixError as e:
+            if e.status != 400 or "already banned" not in e.message.lower():
+                raise
 
-        bot_info = self._twitch.get_users(logins=[TwitchBotConfig.get_config()['BOT']['NICK']])
-        self._bot_id = bot_info['data'][0]['id']
+    async def request_unban(self, channel_id: str, user_id: str) -> None:
+        """Unbans the user in the channel as the bot, raises HelixError if it failed"""
+        try:
+            await self._helix.delete("moderation/bans", {"broadcaster_id": channel_id, "moderator_id": self._bot_id, "user_id": user_id})
+        except HelixError as e:
+            if e.status != 400 or "is not banned" not in e.message.lower():
+                raise
 
-    def ban_user(self, channel_id: str, user_id: str, reason: str, duration: int = None) -> bool:
+    async def ban_user(self, channel_id: str, user_id: str, reason: str, duration: int = None) -> bool:
         try:
-            self._twitch.ban_user(channel_id, self._bot_id, user_id, reason, duration)
-        except TwitchAPIException:
+            await self.request_ban(channel_id, user_id, reason, duration)
+        except HelixError as e:
+            log.debug(f"Ban of {user_id} in {channel_id} failed: {e}")
             return False
         return True
 
-    def unban_user(self, channel_id: str, user_id: str) -> bool:
+    async def unban_user(self, channel_id: str, user_id: str) -> bool:
         try:
-            self._twitch.unban_user(channel_id, self._bot_id, user_id)
-        except TwitchAPIException:
+            await self.request_unban(channel_id, user_id)
+        except HelixError as e:
+            log.debug(f"Unban of {user_id} in {channel_id} failed: {e}")
             return False
         return True
 
-    def get_global_chat_emotes(self) -> dict:
+    async def get_user_ids(self, logins: list[str]) -> dict[str, str]:
+        """Returns the user ids by login, only logins that were not looked up recently are requested, unknown logins are left out"""
+        user_ids = {login.lower(): None for login in logins}
+        for login in user_ids:
+            user_ids[login] = self.__user_ids.get(login)
+        missing = [login for login, user_id in user_ids.items() if user_id is None]
+        if missing:
+            for user in await self.__get_batched("users", "login", missing):
+                self.__user_ids.put(user["login"], user["id"])
+                user_ids[user["login"]] = user["id"]
+        return {login: user_id for login, user_id in user_ids.items() if user_id is not None}
+
+    async def get_global_chat_emotes(self, etag: Optional[str] = None) -> tuple[Optional[dict], Optional[str]]:
+        """Returns the emotes and their ETag, the emotes are None if they did not change since etag"""
         log.info("Retrieving chat emotes")
-        return self._twitch.get_global_emotes()
+        return await self._helix.get_if_changed("chat/emotes/global", etag=etag)
 
-    def get_global_chat_badges(self) -> dict:
+    async def get_global_chat_badges(self, etag: Optional[str] = None) -> tuple[Optional[dict], Optional[str]]:
+        """Returns the badges and their ETag, the badges are None if they did not change since etag"""
         log.info("Retrieving Badges")
-        return self._twitch.get_global_chat_badges()
+        return await self._helix.get_if_changed("chat/badges/global", etag=etag)
+
+    async def get_channel_chat_emotes(self, channel_id: str, etag: Optional[str] = None) -> tuple[Optional[dict], Optional[str]]:
+        """Returns the own emotes of the channel and their ETag, the emotes are None if they did not change since etag"""
+        return await self._helix.get_if_changed("chat/emotes", {"broadcaster_id": channel_id}, etag)
+
+    async def get_channel_chat_badges(self, channel_id: str, etag: Optional[str] = None) -> tuple[Optional[dict], Optional[str]]:
+        """Returns the own badges of the channel and their ETag, the badges are None if they did not change since etag"""
+        return await self._helix.get_if_changed("chat/badges", {"broadcaster_id": channel_id}, etag)
 
     def get_user_id_by_name(self, name: str) -> str:
         log.info(f"Retrieving user id for {name}")
         return self._twitch.get_users(logins=[name])['data'][0]['id']
 
-    def setup_event_subs(self, callback_url: str, callback_port: int) -> None:
+    async def setup_event_subs(self, callback_url: str, callback_port: int) -> None:
+        """Subscribes to the EventSub topics of all streams, every subscription blocks until Twitch confirmed it, so
+        the streams are subscribed in parallel on event_sub_workers threads"""
         log.info("Setting up EventSub webhooks")
+        loop = asyncio.get_running_loop()
         self._event_sub_hook = EventSub(callback_url, self._client_id, callback_port, self._twitch)
-        self._event_sub_hook.unsubscribe_all()
-        self._event_sub_hook.start()
+        await loop.run_in_executor(None, self._event_sub_hook.unsubscribe_all)
+        await loop.run_in_executor(None, self._event_sub_hook.start)
 
-        bot_user_id = self.get_user_id_by_name(TwitchBotConfig.get_config()["BOT"]["NICK"])
+        with ThreadPoolExecutor(max_workers=self.event_sub_workers, thread_name_prefix="eventsub-setup") as executor:
+            await asyncio.gather(*(loop.run_in_executor(executor, self.__subscribe_stream, stream) for stream in Stream.get_streams()))
 
-        for stream in Stream.get_streams():
-            try:
-                stream.set_callback_id(
-                    self._event_sub_hook.listen_stream_online(stream.user_id, EventSubCallbacks.on_stream_online),
-                    EventSubType.STREAM_ONLINE)
-                stream.set_callback_id(
-                    self._event_sub_hook.listen_stream_offline(stream.user_id, EventSubCallbacks.on_stream_offline),
-                    EventSubType.STREAM_OFFLINE)
-                stream.set_callback_id(
-                    self._event_sub_hook.listen_channel_update(stream.user_id, EventSubCallbacks.on_channel_update),
-                    EventSubType.CHANNEL_UPDATE)
-                # stream.set_callback_id(
-                #     self._event_sub_hook.listen_channel_follow(stream.user_id, EventSubCallbacks.on_channel_follow),
-                #     EventSubType.CHANNEL_FOLLOW)
-            except EventSubSubscriptionError:
-                log.warning(f"Something went wrong here: No auth for {stream.streamer}.")
-            except EventSubSubscriptionTimeout:
-                log.error(f"EventSub timed out.")
-            try:
-                stream.set_callback_id(
-                    self._event_sub_hook.listen_channel_ban(stream.user_id, EventSubCallbacks.on_ban),
-                    EventSubType.CHANNEL_BAN)
-                stream.set_callback_id(
-                    self._event_sub_hook.listen_channel_unban(stream.user_id, EventSubCallbacks.on_unban),
-                    EventSubType.CHANNEL_UNBAN)
-            except EventSubSubscriptionError:
-                log.warning(f"{stream.streamer} does not have the app authorized.")
-            except EventSubSubscriptionTimeout:
-                log.error(f"EventSub timed out.")
-            try:
-                stream.set_callback_id(
-                    self._event_sub_hook._subscribe("channel.chat.clear", "1", {'broadcaster_user_id': stream.user_id, "user_id": bot_user_id}, EventSubCallbacks.on_chat_clear),
-                    EventSubType.CHAT_CLEAR
-                )
-                stream.set_callback_id(
-                    self._event_sub_hook._subscribe("channel.chat.clear_user_messages", "1", {'broadcaster_user_id': stream.user_id, "user_id": bot_user_id}, EventSubCallbacks.on_chat_clear_user),
-                    EventSubType.CHAT_CLEAR_USER
-                )
-            except EventSubSubscriptionError as e:
-                log.error(e)
-                log.warning(f"{stream.streamer} does not have permissions for clear chat.")
-            except EventSubSubscriptionTimeout:
-                log.error(f"EventSub timed out.")
+    def __subscribe_stream(self, stream: Stream) -> None:
+        try:
+            stream.set_callback_id(
+                self._event_sub_hook.listen_stream_online(stream.user_id, EventSubCallbacks.on_stream_online),
+                EventSubType.STREAM_ONLINE)
+            stream.set_callback_id(
+                self._event_sub_hook.listen_stream_offline(stream.user_id, EventSubCallbacks.on_stream_offline),
+                EventSubType.STREAM_OFFLINE)
+            stream.set_callback_id(
+                self._event_sub_hook.listen_channel_update(stream.user_id, EventSubCallbacks.on_channel_update),
+                EventSubType.CHANNEL_UPDATE)
+            # stream.set_callback_id(
+            #     self._event_sub_hook.listen_channel_follow(stream.user_id, EventSubCallbacks.on_channel_follow),
+            #     EventSubType.CHANNEL_FOLLOW)
+        except EventSubSubscriptionError:
+            log.warning(f"Something went wrong here: No auth for {stream.streamer}.")
+        except EventSubSubscriptionTimeout:
+            log.error(f"EventSub timed out.")
+        try:
+            stream.set_callback_id(
+                self._event_sub_hook.listen_channel_ban(stream.user_id, EventSubCallbacks.on_ban),
+                EventSubType.CHANNEL_BAN)
+            stream.set_callback_id(
+                self._event_sub_hook.listen_channel_unban(stream.user_id, EventSubCallbacks.on_unban),
+                EventSubType.CHANNEL_UNBAN)
+        except EventSubSubscriptionError:
+            log.warning(f"{stream.streamer} does not have the app authorized.")
+        except EventSubSubscriptionTimeout:
+            log.error(f"EventSub timed out.")
+        try:
+            stream.set_callback_id(
+                self._event_sub_hook._subscribe("channel.chat.clear", "1", {'broadcaster_user_id': stream.user_id, "user_id": self._bot_id}, EventSubCallbacks.on_chat_clear),
+                EventSubType.CHAT_CLEAR
+            )
+            stream.set_callback_id(
+                self._event_sub_hook._subscribe("channel.chat.clear_user_messages", "1", {'broadcaster_user_id': stream.user_id, "user_id": self._bot_id}, EventSubCallbacks.on_chat_clear_user),
+                EventSubType.CHAT_CLEAR_USER
+            )
+            stream.set_callback_id(
+                self._event_sub_hook._subscribe("channel.chat.message_delete", "1", {'broadcaster_user_id': stream.user_id, "user_id": self._bot_id}, EventSubCallbacks.on_chat_message_delete),
+                EventSubType.CHAT_MESSAGE_DELETE
+            )
+        except EventSubSubscriptionError as e:
+            log.error(e)
+            log.warning(f"{stream.streamer} does not have permissions for clear chat.")
+        except EventSubSubscriptionTimeout:
+            log.error(f"EventSub timed out.")
 
     def setup_pubsub(self, user_id: str) -> None:
         log.info("Setting up PubSub")
@@ -226,3 +310,7 @@ class TwitchAPI:
         if self._pubsub:
             self._pubsub.stop()
             log.debug("PubSub stopped")
+        asyncio.ensure_future(self._helix.close())
+        for stream in Stream.get_streams():
+            if stream.get_twitch_user_api() is not None:
+                asyncio.ensure_future(stream.get_twitch_user_api().close())
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from data_types.stream import Stream
+from twitch_api.helix_client import HelixError
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from twitch_api import TwitchAPI
+    from utils.token_bucket import TokenBucket
+
+log = logging.getLogger(__name__)
+
+
+class BanSync:
+    """Mirrors bans and unbans to every stream that has sync-bans enabled.
+
+    The requests for all channels are sent concurrently, limited by the rate limit of the moderation requests.
+    Requests that failed because of the rate limit, a timeout or a server error are retried with exponential backoff.
+    Every applied ban and unban is recorded per user and channel in a ledger, so repeated events, restarts and the ban
+    events caused by the sync itself don't send any requests.
+    """
+    __ban_sync: Optional[BanSync] = None
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    @classmethod
+    def set_ban_sync(cls, ban_sync: BanSync) -> None:
+        cls.__ban_sync = ban_sync
+
+    @classmethod
+    def get_ban_sync(cls) -> Optional[BanSync]:
+        return cls.__ban_sync
+
+    def __init__(self, twitch_api: TwitchAPI, ledger_path: Path, rate_limit: TokenBucket, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.__twitch_api: TwitchAPI = twitch_api
+        self.__bucket: TokenBucket = rate_limit
+        self.__loop: asyncio.AbstractEventLoop = loop or asyncio.get_event_loop()
+        self.__in_flight: set[tuple[str, str, str]] = set()
+        self.applied: int = 0
+        self.skipped: int = 0
+        self.failed: int = 0
+        self.__lock: threading.Lock = threading.Lock()
+        self.__connection: sqlite3.Connection = sqlite3.connect(str(ledger_path), check_same_thread=False)
+        with self.__lock, self.__connection:
+            self.__connection.executescript("""
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = NORMAL;
+                CREATE TABLE IF NOT EXISTS ban_ledger (
+                    user_id TEXT NOT NULL,
+                    channel_id TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    applied_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, channel_id)
+                );
+            """)
+            # user id, channel id -> "ban" or "unban"
+            self.__ledger: dict[tuple[str, str], str] = {(user_id, channel_id): action for user_id, channel_id, action in
+                                                         self.__connection.execute("SELECT user_id, channel_id, action FROM ban_ledger")}
+        log.debug(f"Ban ledger {ledger_path} opened with {len(self.__ledger)} entries")
+
+    def submit_ban(self, source: Stream, user_id: str, user_name: str, reason: str) -> None:
+        """Starts syncing a ban, can be called from any thread"""
+        self.__loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.sync("ban", source, user_id, user_name, reason)))
+
+    def submit_unban(self, source: Stream, user_id: str, user_name: str) -> None:
+        """Starts syncing an unban, can be called from any thread"""
+        self.__loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.sync("unban", source, user_id, user_name)))
+
+    async def sync(self, action: str, source: Stream, user_id: str, user_name: str, reason: Optional[str] = None) -> int:
+        """Applies the ban or unban that happened in source to all other streams, returns the number of requests sent"""
+        # the ban already happened in the source channel, so its own echo is ignored as well
+        self.__record(user_id, source.user_id, action)
+        targets = [stream for stream in Stream.get_streams() if stream.user_id != source.user_id and stream.config['sync-bans']]
+        results = await asyncio.gather(*(self.__apply(action, stream, user_id, user_name, reason) for stream in targets))
+        return sum(results)
+
+    def is_applied(self, action: str, user_id: str, channel_id: str) -> bool:
+        return self.__ledger.get((user_id, channel_id)) == action
+
+    async def __apply(self, action: str, stream: Stream, user_id: str, user_name: str, reason: Optional[str]) -> bool:
+        if self.is_applied(action, user_id, stream.user_id) or (action, user_id, stream.user_id) in self.__in_flight:
+            self.skipped += 1
+            return False
+        self.__in_flight.add((action, user_id, stream.user_id))
+        try:
+            for attempt in range(self.max_attempts):
+                await self.__bucket.acquire()
+                try:
+                    if action == "ban":
+                        await self.__twitch_api.request_ban(stream.user_id, user_id, reason)
+                    else:
+                        await self.__twitch_api.request_unban(stream.user_id, user_id)
+                except HelixError as e:
+                    if not e.is_retryable or attempt == self.max_attempts - 1:
+                        log.warning(f"Sync {action} of {user_name} in channel {stream.streamer} failed. Check the permissions. {e}")
+                        self.failed += 1
+                        return False
+                    await asyncio.sleep(e.retry_delay(attempt, self.base_delay, self.max_delay))
+                    continue
+                log.info(f"Sync {action} of {user_name} in channel {stream.streamer}" + (f" for {reason}" if reason else ""))
+                break
+            self.__record(user_id, stream.user_id, action)
+            self.applied += 1
+            return True
+        finally:
+            self.__in_flight.discard((action, user_id, stream.user_id))
+
+    def __record(self, user_id: str, channel_id: str, action: str) -> None:
+        self.__ledger[(user_id, channel_id)] = action
+        with self.__lock, self.__connection:
+            self.__connection.execute("INSERT OR REPLACE INTO ban_ledger (user_id, channel_id, action, applied_at) VALUES (?, ?, ?, ?)",
+                                      (user_id, channel_id, action, time.time()))
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from twitch_api.helix_client import HelixError
+
+if TYPE_CHECKING:
+    from data_types.stream import Stream
+    from twitch_api import TwitchAPI
+    from utils.token_bucket import TokenBucket
+
+log = logging.getLogger(__name__)
+
+
+class BulkModerationJob:
+    """Bans or times out all users of the ban queue of a stream.
+
+    The user ids are looked up in batches, then the requests are sent in parallel as fast as the rate limit of
+    the moderation requests allows. Users are removed from the ban queue once they were banned. The progress is
+    reported every progress_interval seconds and when the job ends, the job can be cancelled at any time. Reports
+    are passed to report as the message type and the values of the message, the caller renders them.
+    """
+    progress_interval: float = 5.0
+    max_attempts: int = 3
+
+    def __init__(self, stream: Stream, twitch_api: TwitchAPI, rate_limit: TokenBucket,
+                 report: Callable[[str, dict[str, str]], Awaitable], reason: str, duration: Optional[int] = None) -> None:
+        self.__stream: Stream = stream
+        self.__twitch_api: TwitchAPI = twitch_api
+        self.__bucket: TokenBucket = rate_limit
+        self.__report: Callable[[str, dict[str, str]], Awaitable] = report
+        self.reason: str = reason
+        self.duration: Optional[int] = duration
+        self.names: list[str] = list(stream.ban_queue)
+        self.done: int = 0
+        self.failed: list[str] = []
+        self.__task: Optional[asyncio.Future] = None
+        self.__started_at: float = 0.0
+
+    @property
+    def action(self) -> str:
+        return "banned" if self.duration is None else "timed out"
+
+    @property
+    def is_running(self) -> bool:
+        return self.__task is not None and not self.__task.done()
+
+    def start(self) -> None:
+        if not self.is_running:
+            self.__task = asyncio.ensure_future(self.__run())
+
+    def cancel(self) -> bool:
+        if self.is_running:
+            self.__task.cancel()
+            return True
+        return False
+
+    async def wait(self) -> None:
+        if self.__task is not None:
+            await asyncio.wait([self.__task])
+
+    def progress(self) -> str:
+        return f"{self.done}/{len(self.names)} {self.action}, {len(self.failed)} failed"
+
+    async def __run(self) -> None:
+        self.__started_at = time.monotonic()
+        log.info(f"Bulk moderation of {len(self.names)} users in {self.__stream.streamer} started")
+        reporter = asyncio.ensure_future(self.__report_progress())
+        try:
+            user_ids = await self.__twitch_api.get_user_ids(self.names)
+            for name in self.names:
+                if name.lower() not in user_ids:
+                    self.failed.append(name)
+            await asyncio.gather(*(self.__moderate(name, user_ids[name.lower()]) for name in self.names if name.lower() in user_ids))
+        except asyncio.CancelledError:
+            await self.__send("cancelled")
+            raise
+        except HelixError as e:
+            log.error(f"Bulk moderation in {self.__stream.streamer} failed: {e}")
+            await self.__send("stopped")
+        else:
+            await self.__send("finished_with_failures" if self.failed else "finished")
+        finally:
+            reporter.cancel()
+
+    async def __moderate(self, name: str, user_id: str) -> None:
+        for attempt in range(self.max_attempts):
+            await self.__bucket.acquire()
+            try:
+                await self.__twitch_api.request_ban(self.__stream.user_id, user_id, self.reason, self.duration)
+            except HelixError as e:
+                if e.is_retryable and attempt < self.max_attempts - 1:
+                    await asyncio.sleep(e.retry_delay(attempt))
+                    continue
+                log.warning(f"Could not moderate {name} in {self.__stream.streamer}: {e}")
+                self.failed.append(name)
+                return
+            self.__stream.ban_queue.pop(name, None)
+            self.done += 1
+            return
+
+    async def __report_progress(self) -> None:
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            await self.__send("status")
+
+    async def __send(self, message_type: str) -> None:
+        values = {"progress": self.progress(), "failed": ", ".join(self.failed[:20]),
+                  "seconds": f"{time.monotonic() - self.__started_at:.0f}"}
+        try:
+            await self.__report(message_type, values)
+        except Exception as e:
+            log.warning(f"Could not report bulk moderation progress to {self.__stream.streamer}: {e}")
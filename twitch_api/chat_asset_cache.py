@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Optional
+
+from data_types.chat_message import ChatMessage
+from data_types.stream import Stream
+from twitch_api.helix_client import HelixError
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from twitch_api import TwitchAPI
+
+log = logging.getLogger(__name__)
+
+
+class ChatAssetCache:
+    """Keeps the global emotes and badges and those of every stream in a compact snapshot on disk.
+
+    Only the names and 1x urls are stored, the snapshot is loaded at startup so a restart does not wait for the
+    downloads. After ttl seconds the emotes and badges are requested again with the ETag of the last response and
+    only replaced if they changed. Streams that are not in the snapshot yet are requested right away.
+    """
+    __chat_asset_cache: Optional[ChatAssetCache] = None
+    snapshot_version: int = 2
+    ttl: float = 6 * 60 * 60
+    retry_delay: float = 5 * 60
+
+    @classmethod
+    def set_chat_asset_cache(cls, chat_asset_cache: ChatAssetCache) -> None:
+        cls.__chat_asset_cache = chat_asset_cache
+
+    @classmethod
+    def get_chat_asset_cache(cls) -> Optional[ChatAssetCache]:
+        return cls.__chat_asset_cache
+
+    def __init__(self, twitch_api: TwitchAPI, snapshot_path: Path) -> None:
+        self.__twitch_api: TwitchAPI = twitch_api
+        self.__path: Path = snapshot_path
+        # "emotes", "badges", "emotes/<channel id>" or "badges/<channel id>" -> ETag of the last response
+        self.__etags: dict[str, Optional[str]] = {}
+        # ids of the channels that were retrieved at least once
+        self.__channels: set[str] = set()
+        self.__fetched_at: float = 0.0
+        self.__task: Optional[asyncio.Future] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() - self.__fetched_at < self.ttl
+
+    def load(self) -> bool:
+        """Loads the snapshot into ChatMessage, returns False if there is no usable snapshot"""
+        try:
+            snapshot = json.loads(self.__path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not read the chat asset snapshot {self.__path}: {e}")
+            return False
+        if snapshot.get("version") != self.snapshot_version:
+            return False
+        ChatMessage.set_global_emotes({emote_id: (name, url) for emote_id, (name, url) in snapshot["emotes"].items()})
+        ChatMessage.set_global_badges(snapshot["badges"])
+        for channel_id, channel in snapshot["channels"].items():
+            ChatMessage.set_channel_emotes(channel_id, {emote_id: (name, url) for emote_id, (name, url) in channel["emotes"].items()})
+            ChatMessage.set_channel_badges(channel_id, channel["badges"])
+        self.__channels = set(snapshot["channels"])
+        self.__etags = snapshot["etags"]
+        self.__fetched_at = snapshot["fetched_at"]
+        log.info(f"Loaded {len(snapshot['emotes'])} emotes, {len(snapshot['badges'])} badges and those of {len(self.__channels)} channels "
+                 f"from {self.__path.name}")
+        return True
+
+    async def refresh(self, include_streams: bool = True) -> bool:
+        """Requests the emotes and badges that changed since the last response, returns False if the global ones failed"""
+        streams = Stream.get_streams() if include_streams else []
+        results = await asyncio.gather(self.__refresh_global(), *(self.__refresh_channel(stream) for stream in streams))
+        if not results[0]:
+            return False
+        self.__fetched_at = time.time()
+        self.save()
+        return True
+
+    async def __refresh_global(self) -> bool:
+        try:
+            (emotes, emotes_etag), (badges, badges_etag) = await asyncio.gather(
+                self.__twitch_api.get_global_chat_emotes(self.__etags.get("emotes")),
+                self.__twitch_api.get_global_chat_badges(self.__etags.get("badges")))
+        except HelixError as e:
+            log.warning(f"Could not retrieve the global emotes and badges: {e}")
+            return False
+        if emotes is not None:
+            ChatMessage.set_global_emotes(ChatMessage.compact_emotes(emotes))
+        if badges is not None:
+            ChatMessage.set_global_badges(ChatMessage.compact_badges(badges))
+        self.__etags["emotes"], self.__etags["badges"] = emotes_etag, badges_etag
+        return True
+
+    async def __refresh_channel(self, stream: Stream) -> bool:
+        channel_id = stream.user_id
+        try:
+            (emotes, emotes_etag), (badges, badges_etag) = await asyncio.gather(
+                self.__twitch_api.get_channel_chat_emotes(channel_id, self.__etags.get(f"emotes/{channel_id}")),
+                self.__twitch_api.get_channel_chat_badges(channel_id, self.__etags.get(f"badges/{channel_id}")))
+        except HelixError as e:
+            log.warning(f"Could not retrieve the emotes and badges of {stream.streamer}: {e}")
+            return False
+        if emotes is not None:
+            ChatMessage.set_channel_emotes(channel_id, ChatMessage.compact_emotes(emotes))
+        if badges is not None:
+            ChatMessage.set_channel_badges(channel_id, ChatMessage.compact_badges(badges))
+        self.__etags[f"emotes/{channel_id}"], self.__etags[f"badges/{channel_id}"] = emotes_etag, badges_etag
+        self.__channels.add(channel_id)
+        return True
+
+    def save(self) -> None:
+        snapshot = {"version": self.snapshot_version, "fetched_at": self.__fetched_at, "etags": self.__etags,
+                    "emotes": ChatMessage.get_global_emotes(), "badges": ChatMessage.get_global_badges(),
+                    "channels": {channel_id: {"emotes": ChatMessage.get_channel_emotes(channel_id), "badges": ChatMessage.get_channel_badges(channel_id)}
+                                 for channel_id in sorted(self.__channels)}}
+        temporary_path = self.__path.with_name(self.__path.name + ".tmp")
+        try:
+            temporary_path.write_text(json.dumps(snapshot, separators=(",", ":")), encoding="utf-8")
+            os.replace(temporary_path, self.__path)
+        except OSError as e:
+            log.warning(f"Could not write the chat asset snapshot {self.__path}: {e}")
+
+    def start(self) -> None:
+        if self.__task is None or self.__task.done():
+            self.__task = asyncio.ensure_future(self.__refresh_periodically())
+
+    def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+
+    def __has_all_streams(self) -> bool:
+        return all(stream.user_id in self.__channels for stream in Stream.get_streams())
+
+    async def __refresh_periodically(self) -> None:
+        retry = False
+        while True:
+            if retry:
+                await asyncio.sleep(self.retry_delay)
+            elif self.__has_all_streams():
+                await asyncio.sleep(max(0.0, self.__fetched_at + self.ttl - time.time()))
+            retry = not await self.refresh() or not self.__has_all_streams()
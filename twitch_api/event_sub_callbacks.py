@@ -42,36 +42,30 @@ class EventSubCallbacks:
     @staticmethod
     async def on_chat_clear_user(data: dict):
         stream = Stream.get_stream(data['event']['broadcaster_user_name'])
-        stream.delete_all_messages_by_user(data['event']['target_user_name'])
+        stream.delete_all_messages_by_user(data['event']['target_user_id'])
+
+    @staticmethod
+    async def on_chat_message_delete(data: dict):
+        stream = Stream.get_stream(data['event']['broadcaster_user_name'])
+        stream.delete_chat_message(data['event']['message_id'])
 
     @staticmethod
     async def on_ban(data: dict):
         log.debug("Ban callback")
         stream = Stream.get_stream(data['event']['broadcaster_user_name'])
-        ban_user = data['event']['user_name']
-        stream.delete_all_messages_by_user(ban_user)
+        stream.delete_all_messages_by_user(data['event']['user_id'])
         if data['event']['is_permanent']:
             reason = f"banned in channel {stream.streamer}"
             if data['event']['reason'] != "":
                 reason = f"{reason}: {data['event']['reason']}"
-            for s in Stream.get_streams():
-                if stream.streamer != s.streamer and s.config['sync-bans']:
-                    from twitch_api import TwitchAPI
-                    if TwitchAPI.get_twitch_api().ban_user(stream.user_id, data['event']['user_id'], reason):
-                        log.info(f"Banning {ban_user} in channel {s.streamer} for {reason}")
-                    else:
-                        log.warning(f"Banning {ban_user} in channel {s.streamer} for {reason} failed. Check the permissions.")
+            from twitch_api.ban_sync import BanSync
+            if BanSync.get_ban_sync() is not None:
+                BanSync.get_ban_sync().submit_ban(stream, data['event']['user_id'], data['event']['user_name'], reason)
 
     @staticmethod
     async def on_unban(data: dict):
         log.debug("Unban callback")
         stream = Stream.get_stream(data['event']['broadcaster_user_name'])
-        unban_user = data['event']['user_login']
-        for s in Stream.get_streams():
-            if stream.streamer != s.streamer and s.config['sync-bans']:
-                from twitch_api import TwitchAPI
-                if TwitchAPI.get_twitch_api().unban_user(stream.user_id, data['event']['user_id']):
-                    log.info(f"Unbanning {unban_user} in channel {s.streamer}")
-                else:
-                    log.warning(f"Unbanning {unban_user} in channel {s.streamer} failed. Check the permissions.")
-
+        from twitch_api.ban_sync import BanSync
+        if BanSync.get_ban_sync() is not None:
+            BanSync.get_ban_sync().submit_unban(stream, data['event']['user_id'], data['event']['user_login'])
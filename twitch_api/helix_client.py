@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Callable, Optional, Union
+
+import aiohttp
+
+log = logging.getLogger(__name__)
+
+
+class HelixError(Exception):
+    """A Helix request failed, status is 0 if no response was received.
+    For rate limited requests, reset_at is the unix time at which the rate limit is reset."""
+
+    def __init__(self, status: int, message: str, reset_at: Optional[float] = None) -> None:
+        super().__init__(f"{status}: {message}")
+        self.status: int = status
+        self.message: str = message
+        self.reset_at: Optional[float] = reset_at
+
+    @property
+    def is_retryable(self) -> bool:
+        """Whether the same request can succeed later, after a timeout, the rate limit or a server error"""
+        return self.status == 0 or self.status == 429 or self.status >= 500
+
+    def retry_delay(self, attempt: int, base_delay: float = 1.0, max_delay: float = 30.0) -> float:
+        """Seconds to wait before the next attempt, until the rate limit is reset or with exponential backoff"""
+        if self.reset_at is not None:
+            return min(max_delay, max(0.0, self.reset_at - time.time()) + random.uniform(0, 0.5))
+        return min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class HelixClient:
+    """Asynchronous client for the Helix API sharing one keep-alive connection pool.
+
+    Every endpoint has its own timeout and a limit of concurrent requests, so a slow or busy endpoint can't use up
+    the whole pool. The session belongs to the event loop the client was created on. Requests from other event
+    loops, like the EventSub callbacks running in their own thread, are passed over to that loop.
+    If a request is rejected with 401, the token is refreshed once and the request is sent again.
+    """
+    default_base_url: str = "https://api.twitch.tv/helix/"
+    # endpoint -> (timeout in seconds, concurrent requests)
+    endpoint_limits: dict[str, tuple[float, int]] = {
+        "moderation/bans": (10.0, 50),
+        "channels": (10.0, 4),
+        "games": (5.0, 4),
+        "users": (10.0, 8),
+        "streams": (10.0, 8),
+        "chat/emotes/global": (20.0, 1),
+        "chat/badges/global": (20.0, 1),
+        "chat/emotes": (10.0, 8),
+        "chat/badges": (10.0, 8),
+    }
+    default_limits: tuple[float, int] = (10.0, 8)
+
+    def __init__(self, client_id: str, get_token: Callable[[], str], refresh_token: Callable[[], Any],
+                 base_url: Optional[str] = None, max_connections: int = 50, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        self.client_id: str = client_id
+        self.base_url: str = (base_url or self.default_base_url).rstrip("/") + "/"
+        self.max_connections: int = max_connections
+        self.__get_token: Callable[[], str] = get_token
+        self.__refresh_token: Callable[[], Any] = refresh_token
+        self.__loop: asyncio.AbstractEventLoop = loop or asyncio.get_event_loop()
+        self.__session: Optional[aiohttp.ClientSession] = None
+        self.__semaphores: dict[str, asyncio.Semaphore] = dict()
+        self.__refreshing: Optional[asyncio.Future] = None
+
+    async def get(self, endpoint: str, params: Union[dict, list, None] = None) -> dict:
+        return await self.request("GET", endpoint, params)
+
+    async def post(self, endpoint: str, params: Union[dict, list, None] = None, body: Optional[dict] = None) -> dict:
+        return await self.request("POST", endpoint, params, body)
+
+    async def patch(self, endpoint: str, params: Union[dict, list, None] = None, body: Optional[dict] = None) -> dict:
+        return await self.request("PATCH", endpoint, params, body)
+
+    async def delete(self, endpoint: str, params: Union[dict, list, None] = None) -> dict:
+        return await self.request("DELETE", endpoint, params)
+
+    async def request(self, method: str, endpoint: str, params: Union[dict, list, None] = None, body: Optional[dict] = None) -> dict:
+        """Sends the request and returns the decoded response, raises HelixError if it failed"""
+        data, _ = await self.__dispatch(method, endpoint, params, body)
+        return data
+
+    async def get_if_changed(self, endpoint: str, params: Union[dict, list, None] = None, etag: Optional[str] = None) -> tuple[Optional[dict], Optional[str]]:
+        """Sends a conditional GET and returns the decoded response with its ETag, the response is None if it did not
+        change since etag"""
+        return await self.__dispatch("GET", endpoint, params, None, {"If-None-Match": etag} if etag else None)
+
+    async def __dispatch(self, method: str, endpoint: str, params: Union[dict, list, None], body: Optional[dict],
+                         headers: Optional[dict[str, str]] = None) -> tuple[Optional[dict], Optional[str]]:
+        if asyncio.get_running_loop() is not self.__loop:
+            future = asyncio.run_coroutine_threadsafe(self.__request(method, endpoint, self.__query(params), body, headers), self.__loop)
+            return await asyncio.wrap_future(future)
+        return await self.__request(method, endpoint, self.__query(params), body, headers)
+
+    @staticmethod
+    def __query(params: Union[dict, list, None]) -> list[tuple[str, str]]:
+        """Turns a dict with list values into repeated query parameters like Helix expects them, None is left out"""
+        if params is None:
+            return []
+        items = params.items() if isinstance(params, dict) else params
+        query = []
+        for key, value in items:
+            if isinstance(value, (list, tuple, set)):
+                query.extend((key, str(entry)) for entry in value)
+            elif value is not None:
+                query.append((key, str(value)))
+        return query
+
+    async def __request(self, method: str, endpoint: str, query: list[tuple[str, str]], body: Optional[dict],
+                        extra_headers: Optional[dict[str, str]]) -> tuple[Optional[dict], Optional[str]]:
+        if self.__session is None or self.__session.closed:
+            self.__session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60))
+        timeout, concurrency = self.endpoint_limits.get(endpoint, self.default_limits)
+        if endpoint not in self.__semaphores:
+            self.__semaphores[endpoint] = asyncio.Semaphore(concurrency)
+        async with self.__semaphores[endpoint]:
+            for attempt in range(2):
+                headers = {"Client-ID": self.client_id, "Authorization": f"Bearer {self.__get_token()}", **(extra_headers or {})}
+                try:
+                    async with self.__session.request(method, self.base_url + endpoint, params=query, json=body, headers=headers,
+                                                      timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        if response.status == 401 and attempt == 0:
+                            log.debug(f"{method} {endpoint} unauthorized, refreshing token")
+                            await self.__refresh()
+                            continue
+                        if response.status == 429 and "Ratelimit-Reset" in response.headers:
+                            raise HelixError(response.status, await response.text(), float(response.headers["Ratelimit-Reset"]))
+                        if response.status >= 400:
+                            raise HelixError(response.status, await response.text())
+                        if response.status == 304:
+                            return None, response.headers.get("ETag", (extra_headers or {}).get("If-None-Match"))
+                        if response.status == 204 or response.content_length == 0:
+                            return {}, None
+                        return await response.json(), response.headers.get("ETag")
+                except asyncio.TimeoutError:
+                    raise HelixError(0, f"{method} {endpoint} timed out after {timeout}s")
+                except aiohttp.ClientError as e:
+                    raise HelixError(0, f"{method} {endpoint} failed: {e}")
+        raise HelixError(401, f"{method} {endpoint} unauthorized after refreshing the token")
+
+    async def __refresh(self) -> None:
+        """Refreshes the token in a worker thread, concurrent requests wait for the same refresh"""
+        if self.__refreshing is None or self.__refreshing.done():
+            self.__refreshing = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(None, self.__refresh_token))
+        await asyncio.shield(self.__refreshing)
+
+    async def close(self) -> None:
+        if self.__session is not None:
+            await self.__session.close()
+            self.__session = None
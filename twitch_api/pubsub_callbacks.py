@@ -18,16 +18,21 @@ class PubSubCallbacks:
     @staticmethod
     def on_chat_moderator_action(uuid: UUID, data: dict) -> None:
         action = data['data']['moderation_action']
-        if action == ModerationActionType.CLEAR:
+        if action == ModerationActionType.CLEAR.value:
             stream = PubSubCallbacks.get_stream_for_action(uuid, PubSubType.CHAT_MODERATOR_ACTIONS)
             if stream:
                 stream.clear_chat()
-        elif action == ModerationActionType.BAN:
+        elif action == ModerationActionType.BAN.value:
             # only delete messages by banned user, multi-ban is handled by eventsub
             stream = PubSubCallbacks.get_stream_for_action(uuid, PubSubType.CHAT_MODERATOR_ACTIONS)
             if stream:
-                stream.delete_all_messages_by_user(data['data']['target_user_login'])
-        elif action == ModerationActionType.UNBAN:
+                stream.delete_all_messages_by_user(data['data']['target_user_id'])
+        elif action == ModerationActionType.DELETE.value:
+            # args are [user login, message text, message id]
+            stream = PubSubCallbacks.get_stream_for_action(uuid, PubSubType.CHAT_MODERATOR_ACTIONS)
+            if stream:
+                stream.delete_chat_message(data['data']['args'][2])
+        elif action == ModerationActionType.UNBAN.value:
             # do nothing, multi-unban is handled by eventsub
             pass
         else:
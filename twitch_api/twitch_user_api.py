@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 
 from typing import TYPE_CHECKING, Optional
@@ -7,6 +8,9 @@ from typing import TYPE_CHECKING, Optional
 from twitchAPI import AuthScope, Twitch, refresh_access_token, InvalidRefreshTokenException, UserAuthenticator, \
     MissingScopeException
 
+from twitch_api.helix_client import HelixClient, HelixError
+from utils.lru_cache import LRUCache
+
 if TYPE_CHECKING:
     from data_types.stream import Stream
 
@@ -14,6 +18,9 @@ log = logging.getLogger(__name__)
 
 
 class TwitchUserAPI:
+    # game name -> game id, shared by all streams
+    __game_ids: LRUCache[str, str] = LRUCache(512, ttl=24 * 60 * 60)
+
     def user_refresh(self, _: str, refresh_token: str):
         log.debug("User token refreshed")
         from data_types.stream import Stream
@@ -23,7 +30,8 @@ class TwitchUserAPI:
             stream.config['chat-bot']['refresh-token'] = refresh_token
             stream.save_settings()
 
-    def __init__(self, client_id: str, client_secret: str, streamer: str, user_auth_scope: list[AuthScope] = None):
+    def __init__(self, client_id: str, client_secret: str, streamer: str, user_auth_scope: list[AuthScope] = None, helix_url: Optional[str] = None,
+                 loop: Optional[asyncio.AbstractEventLoop] = None):
         log.debug("Twitch User API Object created")
         if user_auth_scope is None:
             user_auth_scope = [AuthScope.CHANNEL_MANAGE_BROADCAST]
@@ -34,6 +42,7 @@ class TwitchUserAPI:
         self._twitch: Optional[Twitch] = None
         self._token: Optional[str] = None
         self.authenticate()
+        self._helix: HelixClient = HelixClient(self._client_id, self._twitch.get_user_auth_token, self._twitch.refresh_used_token, helix_url, loop=loop)
 
     def authenticate(self):
         log.info(f"User Specific Authentication for user {self._streamer} started")
@@ -60,13 +69,30 @@ class TwitchUserAPI:
             self._twitch.set_user_authentication(self._token, self._user_auth_scope, refresh_token)
             self.user_refresh(self._token, refresh_token)
 
-    def set_title(self, stream: Stream, title: str) -> bool:
+    async def set_title(self, stream: Stream, title: str) -> bool:
         log.info(f"Setting title \"{title}\" for {stream.streamer}")
-        return self._twitch.modify_channel_information(broadcaster_id=stream.user_id, title=title)
+        try:
+            await self._helix.patch("channels", {"broadcaster_id": stream.user_id}, {"title": title})
+        except HelixError as e:
+            log.warning(f"Setting title for {stream.streamer} failed: {e}")
+            return False
+        return True
 
-    def set_game(self, stream: Stream, game: str) -> bool:
+    async def set_game(self, stream: Stream, game: str) -> bool:
         log.info(f"Setting game {game} for {stream.streamer}")
-        games = self._twitch.get_games(names=[game])
-        if len(games["data"]) == 1:
-            return self._twitch.modify_channel_information(broadcaster_id=stream.user_id, game_id=games["data"][0]["id"])
-        return False
+        try:
+            game_id = self.__game_ids.get(game.lower())
+            if game_id is None:
+                games = await self._helix.get("games", {"name": game})
+                if len(games["data"]) != 1:
+                    return False
+                game_id = games["data"][0]["id"]
+                self.__game_ids.put(game.lower(), game_id)
+            await self._helix.patch("channels", {"broadcaster_id": stream.user_id}, {"game_id": game_id})
+        except HelixError as e:
+            log.warning(f"Setting game for {stream.streamer} failed: {e}")
+            return False
+        return True
+
+    async def close(self) -> None:
+        await self._helix.close()
@@ -0,0 +1,37 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Keeps the maxsize most recently used entries, entries older than ttl seconds are treated as missing"""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None) -> None:
+        self.maxsize: int = maxsize
+        self.ttl: Optional[float] = ttl
+        self.__entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        entry = self.__entries.get(key)
+        if entry is None:
+            return default
+        if self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+            del self.__entries[key]
+            return default
+        self.__entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: K, value: V) -> None:
+        self.__entries[key] = (time.monotonic(), value)
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.maxsize:
+            self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.__entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Iterator, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class StartupTimer:
+    """Measures the phases of the startup, phases may run concurrently"""
+
+    def __init__(self) -> None:
+        self.__started_at: float = time.perf_counter()
+        self.phases: dict[str, float] = dict()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started_at
+            log.debug(f"Startup phase {name} took {self.phases[name]:.2f}s")
+
+    async def measure(self, name: str, awaitable: Awaitable[T]) -> T:
+        with self.phase(name):
+            return await awaitable
+
+    def report(self) -> None:
+        log.info(f"Startup took {time.perf_counter() - self.__started_at:.2f}s")
+        width = max((len(name) for name in self.phases), default=0)
+        for name, duration in self.phases.items():
+            log.info(f"  {name:<{width}}  {duration:6.2f}s")
@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Allows rate acquisitions per second on average with bursts of up to capacity acquisitions"""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self.__tokens: float = capacity
+        self.__updated: float = time.monotonic()
+        self.__lock: asyncio.Lock = asyncio.Lock()
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+    def try_acquire(self) -> bool:
+        self.__refill()
+        if self.__tokens >= 1:
+            self.__tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """Waits until a token is available, waiting callers are served in order"""
+        async with self.__lock:
+            while not self.try_acquire():
+                await asyncio.sleep((1 - self.__tokens) / self.rate)
+
+    @property
+    def available(self) -> float:
+        self.__refill()
+        return self.__tokens
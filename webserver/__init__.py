@@ -5,8 +5,10 @@ from typing import Optional
 
 from aiohttp import web
 
-from webserver.independent_display import display_time
+from data_types.media_store import MediaStore
+from webserver.independent_display import display_time, display_media
 from webserver.per_stream_display import display_uptime, display_notifications, display_chat_messages
+from webserver.push_display import display_chat_live, chat_websocket, display_notifications_live, notifications_websocket
 
 log = logging.getLogger(__name__)
 
@@ -26,9 +28,15 @@ class Webserver:
         log.debug("Webserver Object Created")
         self._path: str = path
         self._app: web.Application = web.Application()
+        MediaStore.set_url_prefix(path + "/media/")
         self._app.add_routes([web.get(path + "/time" + '{tail:.*}', display_time),
+                              web.get(path + "/media/{key}", display_media),
                               web.get(path + "/uptime" + '{tail:.*}', display_uptime),
+                              web.get(path + "/notifications/live", display_notifications_live),
+                              web.get(path + "/notifications/ws", notifications_websocket),
                               web.get(path + "/notifications" + '{tail:.*}', display_notifications),
+                              web.get(path + "/chat/live", display_chat_live),
+                              web.get(path + "/chat/ws", chat_websocket),
                               web.get(path + "/chat" + '{tail:.*}', display_chat_messages)])
         self._runner: web.AppRunner = web.AppRunner(self._app)
         self._site: Optional[web.TCPSite] = None
@@ -40,9 +48,15 @@ class Webserver:
         self._site = web.TCPSite(self._runner, host, port)
         await self._site.start()
         log.debug("Site started")
+        from data_types.stream import Stream
+        for stream in Stream.get_streams():
+            stream.alert_scheduler.start()
 
     async def stop_webserver(self) -> None:
         log.info("Stopping Webserver")
+        from data_types.stream import Stream
+        for stream in Stream.get_streams():
+            stream.alert_scheduler.stop()
         await self._runner.cleanup()
         log.debug("Cleanup done (Stopped site and runner)")
 
@@ -17,3 +17,13 @@ default_html = "<html><head><meta charset=\"UTF-8\"/><meta http-equiv=\"refresh\
 async def display_time(_: Request):
     response_html = default_html.format(refresh=1, content=f"{datetime.datetime.now().strftime('%H:%M:%S')}")
     return web.Response(text=response_html, content_type='text/html')
+
+
+async def display_media(request: Request):
+    from data_types.media_store import MediaStore
+    media = MediaStore.get(request.match_info['key'])
+    if media is None:
+        return web.Response(status=404, text="Not found")
+    path, mimetype = media
+    # the key is the hash of the content and MediaStore only returns paths that still have it
+    return web.FileResponse(path, headers={'Content-Type': mimetype, 'Cache-Control': 'public, max-age=31536000, immutable'})
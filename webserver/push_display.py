@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import pathlib
+import time
+from typing import TYPE_CHECKING, Callable
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from aiohttp.web_request import Request
+    from data_types.stream import Stream
+    from data_types.stream_events import StreamEventHub
+
+log = logging.getLogger(__name__)
+
+static_path = pathlib.Path(__file__).resolve().parent / "static"
+
+
+async def display_chat_live(_: Request):
+    return web.FileResponse(static_path / "chat.html")
+
+
+async def display_notifications_live(_: Request):
+    return web.FileResponse(static_path / "notifications.html")
+
+
+async def chat_websocket(request: Request):
+    from data_types.stream import Stream
+    if request.rel_url.query.get('stream', '') not in Stream.get_channels():
+        return web.Response(text="Error")
+    stream = Stream.get_stream(request.rel_url.query.get('stream', ''))
+    try:
+        message_number = int(request.rel_url.query.get('count', 'blah'))
+    except ValueError:
+        message_number = stream.config['stream-overlays']['chat']['max-number-of-messages']
+    return await push_events(request, stream.chat_events, lambda: chat_snapshot(stream, message_number))
+
+
+async def notifications_websocket(request: Request):
+    from data_types.stream import Stream
+    if request.rel_url.query.get('stream', '') not in Stream.get_channels():
+        return web.Response(text="Error")
+    stream = Stream.get_stream(request.rel_url.query.get('stream', ''))
+    return await push_events(request, stream.alert_events, lambda: notifications_snapshot(stream))
+
+
+async def push_events(request: Request, events: StreamEventHub, snapshot: Callable[[], dict]) -> web.WebSocketResponse:
+    """Sends a snapshot followed by every event published on the hub until the client disconnects"""
+    websocket = web.WebSocketResponse(heartbeat=30)
+    await websocket.prepare(request)
+    log.debug(f"Push client connected to {request.rel_url}")
+
+    queue = events.subscribe()
+
+    async def send_events():
+        await websocket.send_json(snapshot())
+        while True:
+            event = await queue.get()
+            if event is events.RESYNC:
+                event = snapshot()
+            await websocket.send_json(event)
+
+    sender = asyncio.ensure_future(send_events())
+    try:
+        # the client does not send anything, this only waits for the connection to close
+        async for _ in websocket:
+            pass
+    finally:
+        sender.cancel()
+        events.unsubscribe(queue)
+        log.debug(f"Push client disconnected from {request.rel_url}")
+    return websocket
+
+
+def chat_snapshot(stream: Stream, message_number: int) -> dict:
+    now = time.monotonic()
+    chat_config = stream.config['stream-overlays']['chat']
+    return {
+        "type": "snapshot",
+        "lifetime": chat_config['message-stays-for'],
+        "count": message_number,
+        "messages": [{"id": message.message_id, "html": message.chat_message, "age": now - message.received_at}
+                     for message in stream.get_chat_messages(message_number) if not message.deleted]
+    }
+
+
+def notifications_snapshot(stream: Stream) -> dict:
+    alert = stream.alert_scheduler.current_alert
+    if alert is not None and alert.is_showing:
+        return {"type": "alert", "id": alert.id, "html": alert.html, "duration": alert.time_left}
+    return {"type": "idle"}
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import TYPE_CHECKING, Callable, Hashable
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from aiohttp.web_request import Request
+
+log = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """Keeps the last rendered body per overlay url together with the version it was rendered for.
+
+    A body is only rendered again once the version changes, the ETag is the hash of the body so it
+    stays valid across restarts.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.__entries: dict[Hashable, tuple[Hashable, str, str]] = dict()
+        self.__max_entries: int = max_entries
+
+    def get(self, key: Hashable, version: Hashable, render: Callable[[], str]) -> tuple[str, str]:
+        """Returns body and etag for key, render is only called if there is no body for this version yet"""
+        entry = self.__entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1], entry[2]
+        body = render()
+        etag = f"\"{hashlib.sha1(body.encode('utf-8')).hexdigest()}\""
+        if entry is None and len(self.__entries) >= self.__max_entries:
+            self.__entries.clear()
+        self.__entries[key] = (version, body, etag)
+        return body, etag
+
+    def response(self, request: Request, key: Hashable, version: Hashable, render: Callable[[], str]) -> web.Response:
+        """Creates the response for a cached body, answers with 304 if the client already has it"""
+        body, etag = self.get(key, version, render)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]:
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=body, content_type='text/html', headers=headers)
+
+    def clear(self) -> None:
+        self.__entries.clear()